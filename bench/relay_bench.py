@@ -0,0 +1,177 @@
+# bench/relay_bench.py
+"""
+Benchmark do caminho do relay (mensagens/s), antes x depois do EV_FAST_RUNTIME.
+
+Por mensagem: protect_markup → TranslationGateway.translate (scheduler, rate,
+CB, deadline) → translate.py decodificando a resposta no formato do Google →
+restore_markup → corpo do webhook serializado. O provedor é uma sessão falsa
+em memória (sem rede), então o número mede o overhead do processo.
+
+Uso (na raiz do repo):
+    python bench/relay_bench.py                    # baseline e fast, lado a lado
+    python bench/relay_bench.py --messages 20000 --concurrency 64 --latency-ms 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# gateway sem cache/langid/lote (toda mensagem vai ao "provedor"), sem jitter e sem teto de rate
+_CHILD_ENV = {
+    "DISCORD_TOKEN": "bench",
+    # evtranslator.config aborta sem estas; o benchmark não fala com o Supabase
+    "SUPABASE_URL": "http://127.0.0.1:9",
+    "SUPABASE_KEY": "bench",
+    "EV_CACHE": "false",
+    "EV_LANGID": "false",
+    "EV_BATCH_WINDOW_MS": "0",
+    "EV_PROVIDER_RATE_CAP": "1000000",
+    "EV_PROVIDER_BURST": "1000000",
+    "EV_GUILD_MAX_INFLIGHT": "0",
+    "EV_HEDGE": "false",
+    "EV_JITTER_MS": "0",
+    "EV_TRANSLATE_ENDPOINTS": "",
+}
+
+_SAMPLE = (
+    "Hey <@123456789012345678>, a raid começa às <t:1700000000:R> no canal <#123456789012345679>! "
+    "Tragam poções e não esqueçam do `/checkin` antes. ||spoiler: o boss tem duas fases|| <:pog:123456789012345680>"
+)
+
+
+class _FakeResponse:
+    def __init__(self, body: bytes, latency: float):
+        self.status = 200
+        self._body = body
+        self._latency = latency
+
+    async def __aenter__(self):
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def json(self, content_type=None, loads=json.loads):
+        return loads(self._body)
+
+
+class _FakeSession:
+    """Responde como o endpoint translate_a/single (JSON em bytes, segmentos em data[0])."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.closed = False
+
+    def get(self, url, timeout=None):
+        from urllib.parse import parse_qs, urlsplit
+        q = parse_qs(urlsplit(url).query)["q"][0]
+        words = q.split(" ")
+        mid = len(words) // 2
+        segs = [[" ".join(words[:mid]) + " ", None, None, None], [" ".join(words[mid:]), None, None, None]]
+        body = json.dumps([segs, None, "pt"]).encode("utf-8")
+        return _FakeResponse(body, self.latency)
+
+
+class _FakeBot:
+    def __init__(self, concurrency: int):
+        self.sem = asyncio.Semaphore(concurrency)
+        self.adaptive = None
+
+
+async def _run_child(messages: int, concurrency: int, latency_ms: float) -> dict:
+    from evtranslator import fastjson
+    from evtranslator.relay.gateway import TranslationGateway
+    from evtranslator.relay.markup import protect_markup, restore_markup
+
+    gw = TranslationGateway(_FakeBot(concurrency), db_path=":memory:")
+    gw.session = _FakeSession(latency_ms / 1000.0)
+    work = asyncio.Semaphore(concurrency)
+    sent_bytes = 0
+
+    async def one(i: int) -> None:
+        nonlocal sent_bytes
+        async with work:
+            marked, spans = protect_markup(f"{_SAMPLE} #{i}")
+            out = await gw.translate(marked, "pt", "en", guild_id=i % 50)
+            if out is None:
+                raise RuntimeError("tradução falhou no benchmark")
+            payload = {
+                "content": restore_markup(out, spans),
+                "username": "bench",
+                "allowed_mentions": {"parse": []},
+            }
+            sent_bytes += len(fastjson.dumps_bytes(payload))
+
+    await asyncio.gather(*(one(i) for i in range(min(200, messages))))  # aquecimento
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    elapsed = time.perf_counter() - t0
+    return {
+        "messages": messages,
+        "elapsed_sec": round(elapsed, 3),
+        "msgs_per_sec": round(messages / elapsed, 1),
+        "json": fastjson.BACKEND,
+        "bytes": sent_bytes,
+    }
+
+
+def _child(args) -> None:
+    sys.path.insert(0, ROOT)
+    from evtranslator.runtime import install_event_loop
+    loop_name = install_event_loop()
+    res = asyncio.run(_run_child(args.messages, args.concurrency, args.latency_ms))
+    res["loop"] = loop_name
+    print(json.dumps(res))
+
+
+def _spawn(fast: bool, args) -> dict:
+    env = {**os.environ, **_CHILD_ENV, "EV_FAST_RUNTIME": "true" if fast else "false"}
+    cmd = [
+        sys.executable, os.path.abspath(__file__), "--child",
+        "--messages", str(args.messages),
+        "--concurrency", str(args.concurrency),
+        "--latency-ms", str(args.latency_ms),
+    ]
+    out = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--messages", type=int, default=5000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="latência simulada do provedor")
+    ap.add_argument("--repeat", type=int, default=3, help="rodadas por modo (vale a melhor)")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        _child(args)
+        return
+
+    results = {}
+    for name, fast in (("baseline", False), ("fast", True)):
+        runs = [_spawn(fast, args) for _ in range(max(1, args.repeat))]
+        results[name] = max(runs, key=lambda r: r["msgs_per_sec"])
+
+    for name, r in results.items():
+        print(f"{name:>8}: {r['msgs_per_sec']:>10.1f} msgs/s  (loop={r['loop']}, json={r['json']}, {r['elapsed_sec']}s)")
+    base = results["baseline"]["msgs_per_sec"]
+    if base:
+        print(f" speedup: {results['fast']['msgs_per_sec'] / base:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,10 +10,15 @@ import discord
 from discord.ext import commands
 
 from .config import INTENTS, TEST_GUILD_ID, CONCURRENCY
-from .db import init_db, get_gloss_rows_for_cache
+from .db import init_db, get_gloss_rows_for_cache, list_all_links, list_webhook_ids
+from .webhook_index import OwnWebhookIndex
 
 from evtranslator.glossario import Glossario
+from evtranslator.link_index import LinkIndex
 from .webhook import WebhookSender
+from .http_pools import HttpPools
+from .relay.adaptive import AdaptiveController, AIMDCfg
+from .relay.gateway import TranslationGateway
 
 # Cogs
 from .cogs.links import LinksCog
@@ -39,25 +44,62 @@ class EVTranslatorBot(commands.Bot):
         )
 
         self.db_path = db_path
-        self.sem = asyncio.Semaphore(CONCURRENCY)
 
+        # EV_ADAPTIVE=true → concorrência/rate do provedor ajustados por AIMD (em vez de fixos)
+        self.adaptive: Optional[AdaptiveController] = None
+        if os.getenv("EV_ADAPTIVE", "false").lower() == "true":
+            self.adaptive = AdaptiveController(
+                AIMDCfg(
+                    min_concurrency=int(os.getenv("EV_ADAPTIVE_MIN_CONC", "2")),
+                    max_concurrency=int(os.getenv("EV_ADAPTIVE_MAX_CONC", "24")),
+                    min_rate=float(os.getenv("EV_ADAPTIVE_MIN_RATE", "2")),
+                    max_rate=float(os.getenv("EV_ADAPTIVE_MAX_RATE", "40")),
+                    latency_target=float(os.getenv("EV_ADAPTIVE_LATENCY_SEC", "2.0")),
+                ),
+                init_concurrency=CONCURRENCY,
+                init_rate=float(os.getenv("EV_PROVIDER_RATE_CAP", "12")),
+            )
+        self.sem = self.adaptive if self.adaptive is not None else asyncio.Semaphore(CONCURRENCY)
+
+        # uma sessão por upstream (translate/discord/media); http_session = alias de compat (discord)
+        self.http_pools: Optional[HttpPools] = None
         self.http_session: Optional[aiohttp.ClientSession] = None
+        self._prewarm_task: asyncio.Task | None = None
         self.webhooks: Optional[WebhookSender] = None
         self.reconcile_interval = float(os.getenv("EV_RECONCILE_SEC", "45"))  # segundos
         self.leave_if_missing = os.getenv("EV_LEAVE_IF_MISSING", "false").lower() == "true"
         self._reconcile_task: asyncio.Task | None = None
         self.gloss = Glossario()
+        self.links = LinkIndex()  # espelho da tabela links (roteamento do relay sem I/O)
+        self.own_webhooks = OwnWebhookIndex()  # IDs de webhook_tokens (eco dos nossos webhooks)
+
+        # caminho único até o provedor de tradução (limiter/CB/cache compartilhados)
+        self.gateway = TranslationGateway(self, db_path)
 
 
 
 
     async def setup_hook(self) -> None:
         await init_db(self.db_path)
-        timeout = aiohttp.ClientTimeout(total=12)
-        self.http_session = aiohttp.ClientSession(
-            headers={"User-Agent": "EVTranslator/1.0 (+github.com/you)"},
-            timeout=timeout,
-        )
+        try:
+            self.links.carregar(await list_all_links(self.db_path))
+            log.info("[links] índice carregado: %s", self.links.snapshot())
+        except Exception as e:
+            log.warning("[links] falha ao carregar índice (relay consulta o banco): %s", e)
+        try:
+            self.own_webhooks.carregar(await list_webhook_ids(self.db_path))
+            log.info("[webhooks] índice de webhooks próprios: %s", self.own_webhooks.snapshot())
+        except Exception as e:
+            log.warning("[webhooks] falha ao carregar IDs próprios (consulta sob demanda): %s", e)
+        self.http_pools = HttpPools()
+        self.http_session = self.http_pools.discord
+        self.gateway.session = self.http_pools.translate
+        # TLS já aberto com o provedor antes das primeiras mensagens (em background)
+        prewarm = int(os.getenv("EV_HTTP_PREWARM", "2"))
+        if prewarm > 0:
+            self._prewarm_task = asyncio.create_task(
+                self.http_pools.prewarm("translate", self.gateway.provider_urls(), per_origin=prewarm)
+            )
         bot_user_id = self.user.id if self.user else None  # type: ignore[union-attr]
         self.webhooks = WebhookSender(bot_user_id=bot_user_id)
 
@@ -131,8 +173,10 @@ class EVTranslatorBot(commands.Bot):
                 pass
 
     async def close(self):
-        if self.http_session and not self.http_session.closed:
-            await self.http_session.close()
+        if self._prewarm_task and not self._prewarm_task.done():
+            self._prewarm_task.cancel()
+        if self.http_pools is not None:
+            await self.http_pools.close()
         await super().close()
 
 
@@ -9,8 +9,8 @@ from discord import app_commands
 from discord.ext import commands
 import aiohttp
 
-from evtranslator.translate import google_web_translate
 from evtranslator.webhook import WebhookSender
+from evtranslator.relay.scheduler import Priority
 
 MAX_MSGS = 50
 MAX_LEN = 1900
@@ -94,7 +94,7 @@ class Clonar(commands.Cog):
                 ephemeral=True,
             )
 
-        # sessão única para tradução E execução do webhook via URL (com token)
+        # sessão para executar o webhook via URL (com token) e baixar imagens
         async with aiohttp.ClientSession() as session:
             # executor tokenizado do webhook (sempre executável)
             exec_wh = discord.Webhook.from_url(wh.url, session=session)
@@ -150,10 +150,20 @@ class Clonar(commands.Cog):
 
                 translated = ""
                 if text_for_translation:
-                    try:
-                        translated = await google_web_translate(session, text_for_translation, src="auto", dest="en")
-                    except Exception:
-                        translated = "[Translation error]"
+                    # idioma detectado localmente; se já for EN, não chama o provedor
+                    gateway = self.bot.gateway
+                    lang, _conf = gateway.langid.detect(text_for_translation) if gateway.langid else (None, 0.0)
+                    if lang == "en":
+                        gateway.langid.stats["skips"] += 1
+                        translated = text_for_translation
+                    else:
+                        # passa pelo gateway (rate limit/CB/cache compartilhados com o relay)
+                        translated = await gateway.translate(
+                            text_for_translation, lang or "auto", "en",
+                            priority=Priority.BULK, guild_id=canal_src.guild.id,
+                        )
+                        if translated is None:
+                            translated = "[Translation error]"
 
                 # recoloca links não-imagem (se quiser manter)
                 for u in other_urls_in_text:
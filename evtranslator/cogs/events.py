@@ -19,6 +19,7 @@ class EventsCog(commands.Cog):
             return
         try:
             removed = await unlink_any_for_channel(DB_PATH, channel.guild.id, channel.id)
+            self.bot.links.remove_channel(channel.guild.id, channel.id)  # type: ignore[attr-defined]
             log.info("🧹 Removidos %s link(s) envolvendo canal deletado #%s (%s) em guild %s",
                      removed, channel.name, channel.id, channel.guild.id)
         except Exception as e:
@@ -176,6 +176,7 @@ class LinksCog(commands.Cog):
         if not created:
             # fallback para API antiga
             await link_pair(DB_PATH, inter.guild.id, canal_pt.id, canal_en.id)  # type: ignore[arg-type]
+        self.bot.links.set_pair(inter.guild.id, canal_pt.id, canal_en.id)  # type: ignore[attr-defined]
 
         log.info(f"[links] {inter.guild.id}: link {canal_pt.id}<->{canal_en.id} (by {created_by})")
         # ✅ sucesso sempre ephemeral
@@ -240,6 +241,7 @@ class LinksCog(commands.Cog):
                 )
 
         await unlink_pair(DB_PATH, inter.guild.id, current_ch.id, target_id)  # type: ignore[arg-type]
+        self.bot.links.remove_pair(inter.guild.id, current_ch.id, target_id)  # type: ignore[attr-defined]
         pair_txt = f"{current_ch.mention} ({src_lang}) ⇄ {target_ch.mention if isinstance(target_ch, discord.TextChannel) else f'#{target_id}'} ({tgt_lang})"
 
         log.info(f"[links] {inter.guild.id}: unlink {current_ch.id}<->{target_id} (by {user.id})")
@@ -257,6 +259,7 @@ class LinksCog(commands.Cog):
             return await inter.response.send_message("🚫 Requer permissão: **Gerenciar Servidor**.", ephemeral=True)
 
         count = await unlink_all(DB_PATH, inter.guild.id)  # type: ignore[arg-type]
+        self.bot.links.remove_guild(inter.guild.id)  # type: ignore[attr-defined]
         log.warning(f"[links] {inter.guild.id}: unlink_all ({count} pares)")
         await inter.response.send_message(f"🧹 Todos os links foram removidos. ({count} par(es))", ephemeral=True)
 
@@ -327,6 +330,7 @@ class LinksCog(commands.Cog):
 
             if ra is None or rb is None:
                 await unlink_pair(DB_PATH, inter.guild.id, a, b)  # type: ignore[arg-type]
+                self.bot.links.remove_pair(inter.guild.id, a, b)  # type: ignore[attr-defined]
                 removed += 1
                 continue
 
@@ -66,6 +66,7 @@ if os.getenv("TEST_GUILD_ID"):
 TRANSLATED_FLAG = "\u200b"  # marcador invisível para evitar loops
 MIN_MSG_LEN = 4
 MAX_MSG_LEN = 2000  # limite hard do Discord
+MAX_INPUT_LEN = 4000  # maior mensagem de origem aceita (Nitro); a saída é quebrada em blocos de MAX_MSG_LEN
 
 # --- Intents mínimos ---
 INTENTS = discord.Intents.default()
@@ -68,6 +68,34 @@ async def init_db(db_path: str):
         await db.execute("CREATE INDEX IF NOT EXISTS idx_xlate_created ON xlate_msgs(created_at);")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_xlate_tgt ON xlate_msgs(tgt_msg_id);")
 
+        # === Segmentos (frases) de cada mensagem traduzida: edição re-traduz só o que mudou ===
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS xlate_segments (
+                guild_id    INTEGER NOT NULL,
+                src_msg_id  INTEGER NOT NULL,
+                idx         INTEGER NOT NULL,
+                src_hash    TEXT    NOT NULL,
+                translated  TEXT    NOT NULL,
+                PRIMARY KEY (guild_id, src_msg_id, idx)
+            );
+            """
+        )
+
+        # === Cache persistente de traduções (chave = hash de src|tgt|glossário|texto) ===
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS xlate_cache (
+                cache_key   TEXT    NOT NULL PRIMARY KEY,
+                translated  TEXT    NOT NULL,
+                created_at  INTEGER NOT NULL,  -- epoch seconds
+                last_hit_at INTEGER NOT NULL
+            );
+            """
+        )
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_xcache_created ON xlate_cache(created_at);")
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_xcache_hit ON xlate_cache(last_hit_at);")
+
 
         # === Tokens de webhooks por canal (permitir editar pós-restart) ===
         await db.execute(
@@ -143,10 +171,12 @@ async def unlink_pair(db_path: str, guild_id: int, ch1: int, ch2: int):
         )
         await db.commit()
 
-async def unlink_all(db_path: str, guild_id: int):
+async def unlink_all(db_path: str, guild_id: int) -> int:
+    """Remove todos os links da guild. Retorna quantos pares existiam."""
     async with aiosqlite.connect(db_path) as db:
-        await db.execute("DELETE FROM links WHERE guild_id=?", (guild_id,))
+        cur = await db.execute("DELETE FROM links WHERE guild_id=?", (guild_id,))
         await db.commit()
+        return (cur.rowcount or 0) // 2  # cada par tem os dois sentidos
 
 async def get_link_info(db_path: str, guild_id: int, ch_id: int) -> Optional[Tuple[int, str, str]]:
     """Para o canal ch_id (lado A), retorna (target_id, src_lang, tgt_lang)."""
@@ -179,6 +209,13 @@ async def list_links(db_path: str, guild_id: int) -> List[Tuple[int, str, int, s
             out.append((int(a), str(la), int(b), str(lb)))
         return out
 
+async def list_all_links(db_path: str) -> List[Tuple[int, int, str, int, str]]:
+    """Todos os links (um por sentido): (guild_id, ch_a, lang_a, ch_b, lang_b). Carrega o LinkIndex."""
+    async with aiosqlite.connect(db_path) as db:
+        cur = await db.execute("SELECT guild_id, ch_a, lang_a, ch_b, lang_b FROM links")
+        rows = await cur.fetchall()
+        return [(int(g), int(a), str(la), int(b), str(lb)) for (g, a, la, b, lb) in rows]
+
 # ✅ Helper opcional: remove qualquer link que envolva um canal (src OU dst)
 async def unlink_any_for_channel(db_path: str, guild_id: int, channel_id: int) -> int:
     async with aiosqlite.connect(db_path) as db:
@@ -322,11 +359,17 @@ async def touch_translation_edit(db_path: str, guild_id: int, src_msg_id: int, t
         await db.commit()
 
 async def purge_xlate_older_than(db_path: str, cutoff_epoch: int) -> int:
-    """Apaga vínculos antigos; retorna quantos deletou."""
+    """Apaga vínculos antigos (e seus segmentos); retorna quantos vínculos deletou."""
     async with aiosqlite.connect(db_path) as db:
         cur = await db.execute("DELETE FROM xlate_msgs WHERE created_at < ?", (cutoff_epoch,))
+        deleted = cur.rowcount or 0
+        await db.execute(
+            "DELETE FROM xlate_segments WHERE NOT EXISTS ("
+            "SELECT 1 FROM xlate_msgs m WHERE m.guild_id=xlate_segments.guild_id "
+            "AND m.src_msg_id=xlate_segments.src_msg_id)"
+        )
         await db.commit()
-        return cur.rowcount or 0
+        return deleted
     
 async def delete_translation_map(db_path: str, guild_id: int, src_msg_id: int) -> int:
     """Remove o vínculo de edição para uma mensagem original. Retorna quantas linhas removeu."""
@@ -335,11 +378,84 @@ async def delete_translation_map(db_path: str, guild_id: int, src_msg_id: int) -
             "DELETE FROM xlate_msgs WHERE guild_id=? AND src_msg_id=?",
             (guild_id, src_msg_id),
         )
+        await db.execute(
+            "DELETE FROM xlate_segments WHERE guild_id=? AND src_msg_id=?",
+            (guild_id, src_msg_id),
+        )
         await db.commit()
         return cur.rowcount or 0
+
+async def save_translation_segments(db_path: str, guild_id: int, src_msg_id: int,
+                                    rows: List[Tuple[int, str, str]]) -> None:
+    """Substitui os segmentos (idx, src_hash, translated) de uma mensagem."""
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute(
+            "DELETE FROM xlate_segments WHERE guild_id=? AND src_msg_id=?",
+            (guild_id, src_msg_id),
+        )
+        await db.executemany(
+            "INSERT INTO xlate_segments (guild_id, src_msg_id, idx, src_hash, translated) VALUES (?, ?, ?, ?, ?)",
+            [(guild_id, src_msg_id, idx, h, t) for idx, h, t in rows],
+        )
+        await db.commit()
+
+async def get_translation_segments(db_path: str, guild_id: int, src_msg_id: int) -> dict[str, str]:
+    """Retorna {src_hash: translated} dos segmentos salvos da mensagem (vazio se não houver)."""
+    async with aiosqlite.connect(db_path) as db:
+        cur = await db.execute(
+            "SELECT src_hash, translated FROM xlate_segments WHERE guild_id=? AND src_msg_id=? ORDER BY idx",
+            (guild_id, src_msg_id),
+        )
+        rows = await cur.fetchall()
+        return {str(h): str(t) for h, t in rows}
     
 
 
+# ============== Cache de traduções ==============
+
+async def get_cached_translation(db_path: str, cache_key: str, min_created_at: int, now: int) -> Optional[str]:
+    """Retorna a tradução salva (se criada após min_created_at) e marca o hit."""
+    async with aiosqlite.connect(db_path) as db:
+        cur = await db.execute(
+            "SELECT translated FROM xlate_cache WHERE cache_key=? AND created_at>=?",
+            (cache_key, min_created_at),
+        )
+        row = await cur.fetchone()
+        if not row:
+            return None
+        await db.execute("UPDATE xlate_cache SET last_hit_at=? WHERE cache_key=?", (now, cache_key))
+        await db.commit()
+        return str(row[0])
+
+async def put_cached_translation(db_path: str, cache_key: str, translated: str, now: int) -> None:
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute(
+            "INSERT INTO xlate_cache (cache_key, translated, created_at, last_hit_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(cache_key) DO UPDATE SET translated=excluded.translated, "
+            "created_at=excluded.created_at, last_hit_at=excluded.last_hit_at",
+            (cache_key, translated, now, now),
+        )
+        await db.commit()
+
+async def purge_xlate_cache(db_path: str, cutoff_epoch: int, max_rows: int) -> int:
+    """Remove entradas expiradas e, se passar de max_rows, as menos usadas. Retorna quantas apagou."""
+    async with aiosqlite.connect(db_path) as db:
+        cur = await db.execute("DELETE FROM xlate_cache WHERE created_at < ?", (cutoff_epoch,))
+        deleted = cur.rowcount or 0
+        cur = await db.execute("SELECT COUNT(*) FROM xlate_cache")
+        row = await cur.fetchone()
+        excess = int(row[0]) - max_rows if row else 0
+        if excess > 0:
+            cur = await db.execute(
+                "DELETE FROM xlate_cache WHERE cache_key IN ("
+                "SELECT cache_key FROM xlate_cache ORDER BY last_hit_at ASC LIMIT ?)",
+                (excess,),
+            )
+            deleted += cur.rowcount or 0
+        await db.commit()
+        return deleted
+
+
 # ============== Webhook tokens (persistência) ==============
 
 async def upsert_webhook_token(db_path: str, guild_id: int, channel_id: int, webhook_id: int, token: str, created_at: int) -> None:
@@ -379,6 +495,13 @@ async def delete_webhook_token(db_path: str, webhook_id: int) -> int:
         await db.commit()
         return cur.rowcount or 0
 
+async def list_webhook_ids(db_path: str) -> List[int]:
+    """Todos os webhook_id salvos (carrega o índice de webhooks próprios no boot)."""
+    async with aiosqlite.connect(db_path) as db:
+        cur = await db.execute("SELECT webhook_id FROM webhook_tokens")
+        rows = await cur.fetchall()
+        return [int(r[0]) for r in rows]
+
 
 
 # ============== Glossário (painel fechado) ==============
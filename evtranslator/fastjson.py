@@ -0,0 +1,42 @@
+# evtranslator/fastjson.py
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any
+
+from .runtime import FAST_RUNTIME
+
+log = logging.getLogger(__name__)
+
+# EV_FAST_RUNTIME=true → orjson (se instalado) nos pontos quentes: respostas do
+# Google, corpo das RPCs do Supabase e payloads de webhook. Sem orjson, stdlib.
+BACKEND = "json"
+_orjson = None
+if FAST_RUNTIME:
+    try:
+        import orjson as _orjson  # type: ignore[no-redef]
+        BACKEND = "orjson"
+    except ImportError:
+        log.info("fastjson: orjson não instalado, usando json da stdlib")
+
+
+def loads(data: str | bytes | bytearray) -> Any:
+    """Decodifica JSON (str ou bytes). Erros são ValueError nos dois backends."""
+    if _orjson is not None:
+        return _orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """JSON compacto em UTF-8 (corpo de requisição)."""
+    if _orjson is not None:
+        return _orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Mesma saída de dumps_bytes, como str (assinatura do json_serialize do aiohttp)."""
+    if _orjson is not None:
+        return _orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
@@ -1,5 +1,6 @@
 # evtranslator/glossario.py
 from __future__ import annotations
+import hashlib
 import re
 from typing import List, Tuple, Dict, Optional
 
@@ -25,6 +26,9 @@ class Glossario:
         self._pat_src_en: Optional[re.Pattern] = None  # procura termos em EN (termo_src)
         self._pat_src_pt: Optional[re.Pattern] = None  # procura termos em PT (termo_dst)
 
+        # Versão do conteúdo (hash dos termos ativos); entra na chave do cache de traduções
+        self.versao: str = "0"
+
     # ---------------- utils ----------------
 
     @staticmethod
@@ -79,6 +83,8 @@ class Glossario:
         self._pat_src_en = self._compile_pattern(en_terms)  # quando src_lang == 'en'
         self._pat_src_pt = self._compile_pattern(pt_terms)  # quando src_lang == 'pt'
 
+        self.versao = hashlib.sha1(repr(ativos).encode("utf-8")).hexdigest()[:12] if ativos else "0"
+
     # ---------------- proteger/restaurar (recomendado) ----------------
 
     def proteger(self, texto: str, src_lang: str, tgt_lang: str):
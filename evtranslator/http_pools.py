@@ -0,0 +1,203 @@
+# evtranslator/http_pools.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import urllib.parse
+from types import SimpleNamespace
+from typing import Iterable
+
+import aiohttp
+
+from . import fastjson
+from .relay.ratelimit import WaitHistogram
+
+log = logging.getLogger(__name__)
+
+_USER_AGENT = "EVTranslator/1.0 (+github.com/you)"
+
+# limit | limit_per_host | ttl_dns_cache (s) | keepalive_timeout (s) | timeout total (s)
+_DEFAULTS = {
+    "translate": "64|32|300|60|12",   # provedor de tradução: poucos hosts, muito tráfego
+    "discord": "50|20|300|30|15",     # webhooks crus / Webhook.partial
+    "media": "16|4|600|15|6",         # HEAD/GET em hosts de mídia (Imgur): pool pequeno e curto
+}
+
+
+def _parse_pool(name: str) -> tuple[int, int, int, float, float]:
+    """Lê EV_HTTP_<NOME> ("limit|per_host|dns_ttl|keepalive|timeout"); campos vazios = padrão."""
+    defaults = _DEFAULTS[name].split("|")
+    raw = os.getenv(f"EV_HTTP_{name.upper()}", "")
+    parts = [p.strip() for p in raw.split("|")] if raw else []
+    vals = [parts[i] if i < len(parts) and parts[i] else defaults[i] for i in range(len(defaults))]
+    try:
+        return int(vals[0]), int(vals[1]), int(vals[2]), float(vals[3]), float(vals[4])
+    except ValueError:
+        log.warning("http: EV_HTTP_%s=%r inválido, usando padrão", name.upper(), raw)
+        d = defaults
+        return int(d[0]), int(d[1]), int(d[2]), float(d[3]), float(d[4])
+
+
+class PoolStats:
+    """
+    Métricas de um pool via aiohttp.TraceConfig:
+      - tempo esperando conexão livre (fila do connector, quando bate no limit);
+      - tempo para abrir conexão nova (DNS + TCP + TLS);
+      - conexões novas x reaproveitadas (keep-alive).
+    """
+
+    def __init__(self):
+        self.queue_wait = WaitHistogram()
+        self.connect_time = WaitHistogram()
+        self.stats = {"requests": 0, "errors": 0, "queued": 0, "new_conns": 0, "reused_conns": 0}
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        tc = aiohttp.TraceConfig()
+        tc.on_request_start.append(self._on_request_start)
+        tc.on_request_exception.append(self._on_request_exception)
+        tc.on_connection_queued_start.append(self._on_queued_start)
+        tc.on_connection_queued_end.append(self._on_queued_end)
+        tc.on_connection_create_start.append(self._on_create_start)
+        tc.on_connection_create_end.append(self._on_create_end)
+        tc.on_connection_reuseconn.append(self._on_reuse)
+        return tc
+
+    async def _on_request_start(self, _session, _ctx: SimpleNamespace, _params) -> None:
+        self.stats["requests"] += 1
+
+    async def _on_request_exception(self, _session, _ctx: SimpleNamespace, _params) -> None:
+        self.stats["errors"] += 1
+
+    async def _on_queued_start(self, _session, ctx: SimpleNamespace, _params) -> None:
+        self.stats["queued"] += 1
+        ctx.queued_at = time.monotonic()
+
+    async def _on_queued_end(self, _session, ctx: SimpleNamespace, _params) -> None:
+        t0 = getattr(ctx, "queued_at", None)
+        if t0 is not None:
+            self.queue_wait.observe(time.monotonic() - t0)
+
+    async def _on_create_start(self, _session, ctx: SimpleNamespace, _params) -> None:
+        ctx.connect_at = time.monotonic()
+
+    async def _on_create_end(self, _session, ctx: SimpleNamespace, _params) -> None:
+        self.stats["new_conns"] += 1
+        t0 = getattr(ctx, "connect_at", None)
+        if t0 is not None:
+            self.connect_time.observe(time.monotonic() - t0)
+
+    async def _on_reuse(self, _session, _ctx: SimpleNamespace, _params) -> None:
+        self.stats["reused_conns"] += 1
+
+
+class HttpPools:
+    """
+    Uma ClientSession por upstream, cada uma com connector próprio
+    (limit, limit_per_host, cache de DNS e keep-alive ajustados):
+      - translate: provedor de tradução (gateway);
+      - discord:   webhooks (WebhookSender);
+      - media:     sondas de mídia (send._probe_direct_url).
+    Um HEAD lento no Imgur não ocupa vaga do pool de tradução.
+    Criado no setup_hook (precisa do event loop).
+    """
+
+    NAMES = tuple(_DEFAULTS)
+
+    def __init__(self):
+        self._sessions: dict[str, aiohttp.ClientSession] = {}
+        self._stats: dict[str, PoolStats] = {}
+        self._config: dict[str, tuple] = {}
+        self.prewarm_stats = {"attempted": 0, "ok": 0, "failed": 0}
+        for name in self.NAMES:
+            limit, per_host, dns_ttl, keepalive, total = _parse_pool(name)
+            st = PoolStats()
+            connector = aiohttp.TCPConnector(
+                limit=limit,
+                limit_per_host=per_host,
+                ttl_dns_cache=dns_ttl,
+                use_dns_cache=True,
+                keepalive_timeout=keepalive,
+            )
+            self._sessions[name] = aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": _USER_AGENT},
+                timeout=aiohttp.ClientTimeout(total=total),
+                trace_configs=[st.trace_config()],
+                json_serialize=fastjson.dumps,
+            )
+            self._stats[name] = st
+            self._config[name] = (limit, per_host, dns_ttl, keepalive, total)
+            log.info(
+                "http[%s]: limit=%d per_host=%d dns_ttl=%ds keepalive=%.0fs timeout=%.0fs",
+                name, limit, per_host, dns_ttl, keepalive, total,
+            )
+
+    @property
+    def translate(self) -> aiohttp.ClientSession:
+        return self._sessions["translate"]
+
+    @property
+    def discord(self) -> aiohttp.ClientSession:
+        return self._sessions["discord"]
+
+    @property
+    def media(self) -> aiohttp.ClientSession:
+        return self._sessions["media"]
+
+    async def prewarm(self, name: str, urls: Iterable[str], per_origin: int = 2) -> None:
+        """
+        Abre `per_origin` conexões (TLS incluso) para cada origem de `urls` e as
+        deixa ociosas no pool, para as primeiras mensagens após o boot não pagarem
+        o handshake. Falhas só são contadas.
+        """
+        session = self._sessions[name]
+        origins = []
+        for u in urls:
+            p = urllib.parse.urlsplit(u)
+            if p.scheme and p.netloc:
+                o = f"{p.scheme}://{p.netloc}/"
+                if o not in origins:
+                    origins.append(o)
+
+        async def one(url: str) -> None:
+            self.prewarm_stats["attempted"] += 1
+            try:
+                # o status não importa (404 serve): só queremos a conexão viva no pool
+                async with session.head(url, allow_redirects=False):
+                    pass
+                self.prewarm_stats["ok"] += 1
+            except Exception as e:
+                self.prewarm_stats["failed"] += 1
+                log.debug("http[%s]: prewarm %s falhou: %s", name, url, e)
+
+        # concorrentes: conexões em paralelo = conexões distintas no pool
+        await asyncio.gather(*(one(o) for o in origins for _ in range(max(0, per_origin))))
+        log.info("http[%s]: prewarm %s", name, self.prewarm_stats)
+
+    async def close(self) -> None:
+        for s in self._sessions.values():
+            if not s.closed:
+                await s.close()
+
+    def snapshot(self) -> dict:
+        out: dict = {}
+        for name, s in self._sessions.items():
+            conn = s.connector
+            limit, per_host, dns_ttl, keepalive, total = self._config[name]
+            in_use = len(getattr(conn, "_acquired", ()) or ())
+            idle = sum(len(v) for v in (getattr(conn, "_conns", {}) or {}).values())
+            st = self._stats[name]
+            out[name] = {
+                "limit": limit,
+                "limit_per_host": per_host,
+                "in_use": in_use,
+                "idle": idle,
+                "utilization": round(in_use / limit, 3) if limit else 0.0,
+                **st.stats,
+                "queue_wait": st.queue_wait.snapshot(),
+                "connect_time": st.connect_time.snapshot(),
+            }
+        out["prewarm"] = dict(self.prewarm_stats)
+        return out
@@ -0,0 +1,130 @@
+# evtranslator/langid.py
+from __future__ import annotations
+import re
+import time
+from typing import Optional, Tuple
+
+# Identificação de idioma offline (sem rede), por stopwords + caracteres típicos.
+# Feito para mensagens de chat: rápido e conservador (na dúvida, devolve None).
+
+_STOPWORDS: dict[str, frozenset[str]] = {
+    "pt": frozenset("""
+        a o as os um uma uns umas de do da dos das em no na nos nas por pelo pela para pra pro com sem
+        que e é ou mas se não nao sim já ja ainda também tambem muito muita mais menos isso isto esse essa
+        este esta aquele aquela ele ela eles elas eu tu você voce vocês voces nós nos meu minha seu sua
+        foi era ser estar está esta estou tem têm tenho ter vai vou fazer faz quando onde como porque
+        porquê aqui ali lá la então entao tá ta né ne obrigado obrigada oi olá ola tchau bom boa dia
+        noite tarde agora depois hoje ontem amanhã amanha tudo nada algo alguém ninguém gente pessoal
+    """.split()),
+    "en": frozenset("""
+        the a an of to in on at for from by with without and or but if not no yes is are was were be been
+        being am do does did done have has had will would can could should shall may might must this that
+        these those there here it its i you he she we they me him her us them my your his our their what
+        which who whom when where why how all any some just also very more most so than then too about
+        into out up down over again hi hello hey thanks thank please good morning night today tomorrow
+        yesterday now later everyone everything nothing something someone lol okay ok yeah
+    """.split()),
+    "es": frozenset("""
+        el la los las un una unos unas de del al en por para con sin que y o pero si no sí ya también muy
+        más menos eso esto ese esta este aquel yo tú usted ustedes nosotros ellos ellas mi mis tu tus su
+        sus fue era ser estar está estoy tiene tengo hacer hace cuando donde como porque aquí allí hola
+        gracias buenos buenas días noches hoy mañana ayer todo nada algo alguien nadie pues muy
+    """.split()),
+    "fr": frozenset("""
+        le la les un une des de du au aux en dans par pour avec sans que qui et ou mais si ne pas oui non
+        déjà aussi très plus moins ce cet cette ces je tu il elle nous vous ils elles mon ma mes ton ta tes
+        son sa ses est sont était être avoir ai as a fait faire quand où comment pourquoi ici là bonjour
+        salut merci bonsoir aujourd'hui demain hier tout rien quelque quelqu'un personne c'est
+    """.split()),
+    "de": frozenset("""
+        der die das den dem des ein eine einen einem einer und oder aber wenn nicht kein keine ja nein
+        schon auch sehr mehr weniger dies diese dieser ich du er sie es wir ihr mein meine dein deine sein
+        seine ist sind war waren sein haben habe hat hatte machen macht wann wo wie warum hier dort hallo
+        danke bitte guten morgen abend heute morgen gestern alles nichts etwas jemand niemand mit von zu
+    """.split()),
+    "it": frozenset("""
+        il lo la gli le un uno una di del della dei delle in nel nella per con senza che e o ma se non sì
+        già anche molto più meno questo questa quello quella io tu lui lei noi voi loro mio mia tuo tua suo
+        sua è sono era essere avere ho hai ha fatto fare quando dove come perché qui lì ciao grazie buongiorno
+        buonasera oggi domani ieri tutto niente qualcosa qualcuno nessuno
+    """.split()),
+}
+
+# caracteres que praticamente só aparecem em um idioma (peso extra por ocorrência)
+_CHAR_HINTS: dict[str, str] = {
+    "pt": "ãõç",
+    "es": "ñ¿¡",
+    "de": "ßäöü",
+    "fr": "œæëîïûù",
+    "it": "ìò",
+}
+
+_TOKEN_RE = re.compile(r"[a-zà-öø-ÿœæß']+")
+
+
+def _score(text: str) -> Tuple[dict[str, float], int]:
+    low = (text or "").lower()
+    tokens = _TOKEN_RE.findall(low)
+    scores: dict[str, float] = {lang: 0.0 for lang in _STOPWORDS}
+    for tok in tokens:
+        for lang, words in _STOPWORDS.items():
+            if tok in words:
+                scores[lang] += 1.0
+    for lang, chars in _CHAR_HINTS.items():
+        hits = sum(low.count(c) for c in chars)
+        if hits:
+            scores[lang] += min(hits, 3) * 0.5
+    return scores, len(tokens)
+
+
+def detect_language(text: str, min_tokens: int = 3) -> Tuple[Optional[str], float]:
+    """
+    Retorna (idioma, confiança 0..1). Idioma None se o texto for curto/ambíguo.
+    Confiança = margem sobre o 2º colocado, ponderada pela cobertura de stopwords.
+    """
+    scores, n_tokens = _score(text)
+    if n_tokens < min_tokens:
+        return None, 0.0
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    best_lang, best = ranked[0]
+    second = ranked[1][1] if len(ranked) > 1 else 0.0
+    if best <= 0:
+        return None, 0.0
+    margin = (best - second) / best
+    coverage = min(1.0, (best / n_tokens) / 0.3)  # ~30% de stopwords já é texto "típico"
+    return best_lang, round(margin * coverage, 3)
+
+
+class LanguageDetector:
+    """Wrapper com limiar de confiança e métricas (tempo de detecção e taxa de skip)."""
+
+    def __init__(self, min_conf: float = 0.7, min_tokens: int = 3):
+        self.min_conf = min_conf
+        self.min_tokens = min_tokens
+        self.stats = {"detections": 0, "skips": 0, "total_ms": 0.0}
+
+    def detect(self, text: str) -> Tuple[Optional[str], float]:
+        t0 = time.perf_counter()
+        lang, conf = detect_language(text, self.min_tokens)
+        self.stats["detections"] += 1
+        self.stats["total_ms"] += (time.perf_counter() - t0) * 1000.0
+        if conf < self.min_conf:
+            return None, conf
+        return lang, conf
+
+    def is_language(self, text: str, lang: str) -> bool:
+        """True se o texto JÁ está em `lang` com confiança suficiente (conta como skip)."""
+        detected, _conf = self.detect(text)
+        if detected == lang:
+            self.stats["skips"] += 1
+            return True
+        return False
+
+    def snapshot(self) -> dict:
+        n = self.stats["detections"] or 1
+        return {
+            "detections": self.stats["detections"],
+            "skips": self.stats["skips"],
+            "skip_rate": round(self.stats["skips"] / n, 3),
+            "avg_ms": round(self.stats["total_ms"] / n, 4),
+        }
@@ -0,0 +1,87 @@
+# evtranslator/link_index.py
+from __future__ import annotations
+from typing import Dict, Iterable, Optional, Tuple
+
+from evtranslator.db import get_link_info
+
+# (target_id, src_lang, tgt_lang) — mesmo formato de db.get_link_info
+LinkInfo = Tuple[int, str, str]
+
+
+class LinkIndex:
+    """
+    Espelho em memória da tabela `links`: guild → canal de origem → (destino, src, tgt).
+    Carregado no setup_hook (db.list_all_links) e atualizado por /linkar,
+    /deslinkar, /deslinkar_todos e pela remoção de canais. O relay consulta
+    aqui antes de qualquer I/O: canal sem link custa um lookup em dict.
+    Enquanto `loaded` for False, quem consulta deve cair no banco.
+    """
+
+    def __init__(self) -> None:
+        self._by_guild: Dict[int, Dict[int, LinkInfo]] = {}
+        self.loaded = False
+
+    def carregar(self, rows: Iterable[Tuple[int, int, str, int, str]]) -> None:
+        """rows: [(guild_id, ch_a, lang_a, ch_b, lang_b), ...] (um por sentido)."""
+        idx: Dict[int, Dict[int, LinkInfo]] = {}
+        for gid, ch_a, lang_a, ch_b, lang_b in rows:
+            idx.setdefault(int(gid), {})[int(ch_a)] = (int(ch_b), str(lang_a), str(lang_b))
+        self._by_guild = idx
+        self.loaded = True
+
+    def get(self, guild_id: int, channel_id: int) -> Optional[LinkInfo]:
+        chans = self._by_guild.get(guild_id)
+        return chans.get(channel_id) if chans else None
+
+    def maybe_linked(self, guild_id: int, channel_id: int) -> bool:
+        """False só quando há certeza (índice carregado) de que o canal não é origem de link."""
+        return not self.loaded or self.get(guild_id, channel_id) is not None
+
+    async def resolve(self, db_path: str, guild_id: int, channel_id: int) -> Optional[LinkInfo]:
+        """Memória quando carregado; senão o banco (boot ou falha no carregamento)."""
+        if self.loaded:
+            return self.get(guild_id, channel_id)
+        return await get_link_info(db_path, guild_id, channel_id)
+
+    # ---------------- mutações (espelham o que o db.py faz) ----------------
+
+    def set_pair(self, guild_id: int, ch_pt: int, ch_en: int) -> None:
+        """Como link_pair: remove qualquer link dos dois canais e cria pt⇄en."""
+        self.remove_channel(guild_id, ch_pt)
+        self.remove_channel(guild_id, ch_en)
+        chans = self._by_guild.setdefault(guild_id, {})
+        chans[ch_pt] = (ch_en, "pt", "en")
+        chans[ch_en] = (ch_pt, "en", "pt")
+
+    def remove_pair(self, guild_id: int, ch1: int, ch2: int) -> None:
+        chans = self._by_guild.get(guild_id)
+        if not chans:
+            return
+        for a, b in ((ch1, ch2), (ch2, ch1)):
+            info = chans.get(a)
+            if info is not None and info[0] == b:
+                del chans[a]
+        if not chans:
+            del self._by_guild[guild_id]
+
+    def remove_channel(self, guild_id: int, channel_id: int) -> int:
+        """Como unlink_any_for_channel: tira o canal dos dois lados. Retorna sentidos removidos."""
+        chans = self._by_guild.get(guild_id)
+        if not chans:
+            return 0
+        drop = [a for a, (b, _s, _t) in chans.items() if a == channel_id or b == channel_id]
+        for a in drop:
+            del chans[a]
+        if not chans:
+            del self._by_guild[guild_id]
+        return len(drop)
+
+    def remove_guild(self, guild_id: int) -> None:
+        self._by_guild.pop(guild_id, None)
+
+    def snapshot(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "guilds": len(self._by_guild),
+            "channels": sum(len(c) for c in self._by_guild.values()),
+        }
@@ -0,0 +1,140 @@
+# evtranslator/relay/adaptive.py
+from __future__ import annotations
+import asyncio, logging, time
+from collections import deque
+from dataclasses import dataclass
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class AIMDCfg:
+    min_concurrency: int = 2
+    max_concurrency: int = 24
+    min_rate: float = 2.0
+    max_rate: float = 40.0
+    add_concurrency: float = 1.0  # aumento aditivo por janela saudável
+    add_rate: float = 1.0
+    decrease: float = 0.5         # corte multiplicativo em sobrecarga
+    latency_target: float = 2.0   # segundos; acima disso não aumenta
+    window: int = 20              # sucessos saudáveis por aumento
+    cut_cooldown: float = 2.0     # intervalo mínimo entre cortes (evita cortar em cascata)
+
+
+class AdaptiveController:
+    """
+    Controle AIMD de concorrência e rate do provedor de tradução.
+
+    - Funciona como semáforo (async with) com limite dinâmico: substitui o
+      asyncio.Semaphore(CONCURRENCY) do bot.
+    - Ajusta o `rate` dos TokenBuckets ligados via bind_bucket().
+    - Sobe aditivamente enquanto latência/erros estão saudáveis; corta
+      multiplicativamente em 429/5xx/timeout.
+    """
+
+    def __init__(self, cfg: AIMDCfg, init_concurrency: int, init_rate: float):
+        self.cfg = cfg
+        self.limit = float(min(max(init_concurrency, cfg.min_concurrency), cfg.max_concurrency))
+        self.rate = float(min(max(init_rate, cfg.min_rate), cfg.max_rate))
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._buckets: list = []
+        self._healthy = 0
+        self._last_cut = 0.0
+        self.stats = {"increases": 0, "decreases": 0, "successes": 0, "overloads": 0}
+
+    # ---------- semáforo dinâmico ----------
+
+    async def __aenter__(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return self
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # recebeu a vaga mas desistiu → devolve
+                self.in_flight -= 1
+                self._wake()
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def locked(self) -> bool:
+        """Como asyncio.Semaphore.locked(): True se __aenter__ agora teria que esperar."""
+        return self.in_flight >= int(self.limit) or bool(self._waiters)
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self.in_flight += 1
+            fut.set_result(None)
+
+    # ---------- rate ----------
+
+    def bind_bucket(self, bucket) -> None:
+        """Liga um TokenBucket; o rate dele passa a ser controlado aqui."""
+        self._buckets.append(bucket)
+        bucket.rate = self.rate
+
+    def _apply_rate(self) -> None:
+        for b in self._buckets:
+            b.rate = self.rate
+
+    # ---------- sinais ----------
+
+    def on_success(self, latency: float) -> None:
+        self.stats["successes"] += 1
+        if latency > self.cfg.latency_target:
+            self._healthy = 0
+            return
+        self._healthy += 1
+        if self._healthy < self.cfg.window:
+            return
+        self._healthy = 0
+        old = (self.limit, self.rate)
+        self.limit = min(self.cfg.max_concurrency, self.limit + self.cfg.add_concurrency)
+        self.rate = min(self.cfg.max_rate, self.rate + self.cfg.add_rate)
+        if (self.limit, self.rate) != old:
+            self.stats["increases"] += 1
+            self._apply_rate()
+            self._wake()
+            log.debug("[aimd] +: concurrency=%.0f rate=%.1f/s", self.limit, self.rate)
+
+    def on_overload(self, reason: str) -> None:
+        """Chamado em 429, 5xx ou timeout."""
+        self.stats["overloads"] += 1
+        self._healthy = 0
+        now = time.monotonic()
+        if now - self._last_cut < self.cfg.cut_cooldown:
+            return
+        self._last_cut = now
+        self.limit = max(self.cfg.min_concurrency, self.limit * self.cfg.decrease)
+        self.rate = max(self.cfg.min_rate, self.rate * self.cfg.decrease)
+        self.stats["decreases"] += 1
+        self._apply_rate()
+        log.info("[aimd] corte (%s): concurrency=%.0f rate=%.1f/s", reason, self.limit, self.rate)
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "rate": round(self.rate, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            **self.stats,
+        }
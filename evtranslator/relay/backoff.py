@@ -1,8 +1,10 @@
 # evtranslator/relay/backoff.py
 from __future__ import annotations
-import random, time
+import logging, random, time
 from dataclasses import dataclass
 
+log = logging.getLogger(__name__)
+
 @dataclass
 class BackoffCfg:
     attempts: int = 3
@@ -21,19 +23,112 @@ class ExponentialBackoff:
         self.try_n += 1
         return d + j
 
+class RetryBudget:
+    """
+    Orçamento de retry do processo: cada requisição nova deposita `ratio`
+    tokens e cada retry gasta 1. Com ratio=0.1, retries ficam em no máximo
+    ~10% do volume (mais uma reserva `min_reserve` para tráfego baixo).
+    Em pane do provedor isso corta a amplificação de carga.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_reserve: float = 10.0, max_tokens: float = 50.0):
+        self.ratio = max(0.0, ratio)
+        self.max_tokens = max(min_reserve, max_tokens)
+        self.tokens = float(min_reserve)
+        # deadline_exceeded: mensagens abandonadas porque o deadline não seria cumprido
+        self.stats = {"requests": 0, "retries": 0, "denied": 0, "deadline_exceeded": 0}
+
+    def on_request(self) -> None:
+        self.stats["requests"] += 1
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_retry(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            self.stats["retries"] += 1
+            return True
+        self.stats["denied"] += 1
+        return False
+
+    def snapshot(self) -> dict:
+        return {"tokens": round(self.tokens, 2), **self.stats}
+
+
 class CircuitBreaker:
-    def __init__(self, fail_threshold: int = 6, cooldown_sec: float = 30.0):
+    """
+    Máquina de estados closed → open → half_open → closed.
+      - closed: tudo passa; `fail_threshold` falhas seguidas abrem o circuito.
+      - open: tudo é recusado por `cooldown_sec`.
+      - half_open: só `half_open_probes` requisições de teste passam;
+        sucesso fecha, falha reabre (sem manada logo após o cooldown).
+    Cada allow_request() que devolve True deve terminar em on_success(),
+    on_failure() ou release() (resultado neutro/cancelado).
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, fail_threshold: int = 6, cooldown_sec: float = 30.0, half_open_probes: int = 1):
         self.fail_threshold = fail_threshold
         self.cooldown_sec = cooldown_sec
+        self.half_open_probes = max(1, half_open_probes)
+        self.state = self.CLOSED
         self.fail_count = 0
         self.open_until = 0.0
+        self._probes = 0
+        self.stats = {"opened": 0, "half_opened": 0, "closed": 0, "rejected": 0}
+
     @property
     def is_open(self) -> bool:
-        return time.monotonic() < self.open_until
+        """True enquanto estiver recusando tudo (aberto e ainda no cooldown)."""
+        return self.state == self.OPEN and time.monotonic() < self.open_until
+
+    def _transition(self, new_state: str) -> None:
+        old, self.state = self.state, new_state
+        key = {self.OPEN: "opened", self.HALF_OPEN: "half_opened", self.CLOSED: "closed"}[new_state]
+        self.stats[key] += 1
+        level = logging.WARNING if new_state == self.OPEN else logging.INFO
+        log.log(level, "[cb] %s → %s", old, new_state)
+
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() < self.open_until:
+                self.stats["rejected"] += 1
+                return False
+            self._transition(self.HALF_OPEN)
+            self._probes = 0
+        if self._probes < self.half_open_probes:
+            self._probes += 1
+            return True
+        self.stats["rejected"] += 1
+        return False
+
+    def _open(self) -> None:
+        self.open_until = time.monotonic() + self.cooldown_sec
+        self.fail_count = 0
+        self._probes = 0
+        self._transition(self.OPEN)
+
     def on_success(self):
         self.fail_count = 0
+        if self.state == self.HALF_OPEN:
+            self._probes = 0
+            self._transition(self.CLOSED)
+
     def on_failure(self):
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+        if self.state == self.OPEN:
+            return
         self.fail_count += 1
         if self.fail_count >= self.fail_threshold:
-            self.open_until = time.monotonic() + self.cooldown_sec
-            self.fail_count = 0
+            self._open()
+
+    def release(self):
+        """Libera a vaga de probe sem mudar o estado (erro não relacionado ao provedor, cancelamento)."""
+        if self.state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "fail_count": self.fail_count, **self.stats}
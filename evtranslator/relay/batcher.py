@@ -0,0 +1,181 @@
+# evtranslator/relay/batcher.py
+from __future__ import annotations
+import asyncio, contextlib, logging, aiohttp
+from typing import Awaitable, Callable, Optional
+
+from evtranslator.relay.scheduler import Priority
+from evtranslator.translate import (
+    google_web_translate,
+    google_web_translate_batch,
+    batch_overhead,
+)
+
+log = logging.getLogger(__name__)
+
+
+class _Batch:
+    __slots__ = ("session", "items", "chars", "timer", "priority")
+
+    def __init__(self, session: aiohttp.ClientSession):
+        self.session = session
+        self.items: list[tuple[str, asyncio.Future]] = []
+        self.chars = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.priority = Priority.BULK  # classe mais urgente entre os itens
+
+
+class TranslateBatcher:
+    """
+    Junta traduções concorrentes do mesmo par (src, tgt) que chegam dentro de
+    uma janela curta e manda tudo numa requisição só ao provedor.
+
+    O rate limit e o semáforo são aplicados POR REQUISIÇÃO HTTP (não por
+    mensagem): um lote de 10 mensagens gasta 1 token do bucket.
+    Com `slot` (ex.: PriorityScheduler.slot), cada requisição entra na fila do
+    scheduler e do rate limiter com a classe mais urgente do lote: um LIVE que
+    cai num lote de BULK puxa o lote inteiro para a frente.
+    Lotes são separados por guild (chave src, tgt, guild_id), então a fila
+    justa (DRR) e o EV_GUILD_MAX_INFLIGHT do scheduler valem por requisição.
+    Se os delimitadores voltarem corrompidos, cai para requisições individuais.
+    Cada requisição é uma tentativa só: retry/deadline ficam no translate_with_controls.
+    """
+
+    def __init__(
+        self,
+        window_ms: int,
+        max_items: int = 16,
+        max_chars: int = 4000,
+        sem: Optional[asyncio.Semaphore] = None,
+        rate_acquire: Optional[Callable[[Priority], Awaitable[None]]] = None,
+        slot=None,
+        translate_one=None,
+        translate_many=None,
+    ):
+        self.window = max(0, window_ms) / 1000.0
+        self.max_items = max(1, max_items)
+        self.max_chars = max_chars
+        self.sem = sem
+        self.rate_acquire = rate_acquire
+        self.slot = slot  # slot(priority, guild_id) → context manager; substitui o `sem`
+        # provedores (padrão: endpoint fixo; o gateway pode passar o EndpointPool)
+        self.translate_one = translate_one or google_web_translate
+        self.translate_many = translate_many or google_web_translate_batch
+        self._pending: dict[tuple[str, str, int], _Batch] = {}  # (src, tgt, guild_id) -> lote
+        self._tasks: set[asyncio.Task] = set()
+        self.stats = {"requests": 0, "batches": 0, "batched_items": 0, "fallbacks": 0}
+
+    async def translate(
+        self, session: aiohttp.ClientSession, text: str, src: str, dest: str,
+        priority: Priority = Priority.LIVE, guild_id: Optional[int] = None,
+    ) -> str:
+        """Mesma assinatura de google_web_translate (pode ser usado no lugar dele), mais a classe."""
+        priority = Priority(priority)
+        guild = int(guild_id or 0)
+        # texto grande demais para dividir espaço com outros → vai sozinho
+        if len(text) + batch_overhead(2) > self.max_chars:
+            return await self._single(session, text, src, dest, priority, guild)
+
+        key = (src, dest, guild)
+        batch = self._pending.get(key)
+        if batch is not None and (
+            batch.session is not session
+            or batch.chars + len(text) + batch_overhead(len(batch.items) + 1) > self.max_chars
+        ):
+            self._flush(key)
+            batch = None
+
+        if batch is None:
+            batch = _Batch(session)
+            self._pending[key] = batch
+            batch.timer = asyncio.get_running_loop().call_later(self.window, self._flush, key, batch)
+
+        fut = asyncio.get_running_loop().create_future()
+        batch.items.append((text, fut))
+        batch.chars += len(text)
+        batch.priority = min(batch.priority, priority)
+
+        if len(batch.items) >= self.max_items:
+            self._flush(key)
+        return await fut
+
+    def _flush(self, key: tuple[str, str, int], batch: Optional[_Batch] = None) -> None:
+        current = self._pending.get(key)
+        if current is None or (batch is not None and current is not batch):
+            return  # já foi despachado
+        del self._pending[key]
+        if current.timer is not None:
+            current.timer.cancel()
+        task = asyncio.create_task(self._run(current, *key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _acquire(self, priority: Priority):
+        if self.rate_acquire is not None:
+            await self.rate_acquire(priority)
+
+    def _gate(self, priority: Priority, guild_id: int):
+        """Porta de concorrência da requisição: slot do scheduler, semáforo ou nada."""
+        if self.slot is not None:
+            return self.slot(priority, guild_id)
+        if self.sem is not None:
+            return self.sem
+        return contextlib.nullcontext()
+
+    async def _single(
+        self, session: aiohttp.ClientSession, text: str, src: str, dest: str, priority: Priority, guild_id: int,
+    ) -> str:
+        await self._acquire(priority)
+        self.stats["requests"] += 1
+        async with self._gate(priority, guild_id):
+            return await self.translate_one(session, text, src, dest, attempts=1)
+
+    async def _run(self, batch: _Batch, src: str, dest: str, guild_id: int) -> None:
+        # quem já desistiu (timeout/cancelamento) não entra no lote
+        items = [(t, f) for (t, f) in batch.items if not f.done()]
+        if not items:
+            return
+
+        if len(items) == 1:
+            text, fut = items[0]
+            await self._resolve_single(batch.session, text, fut, src, dest, batch.priority, guild_id)
+            return
+
+        try:
+            await self._acquire(batch.priority)
+            self.stats["requests"] += 1
+            async with self._gate(batch.priority, guild_id):
+                results = await self.translate_many(batch.session, [t for t, _ in items], src, dest, attempts=1)
+        except Exception as e:
+            for _t, fut in items:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        if results is None:
+            # delimitadores corrompidos → uma requisição por item
+            self.stats["fallbacks"] += 1
+            log.info("batch: delimitadores corrompidos (%d itens %s→%s); fallback individual", len(items), src, dest)
+            await asyncio.gather(*(
+                self._resolve_single(batch.session, t, f, src, dest, batch.priority, guild_id) for t, f in items
+            ))
+            return
+
+        self.stats["batches"] += 1
+        self.stats["batched_items"] += len(items)
+        for (_t, fut), res in zip(items, results):
+            if not fut.done():
+                fut.set_result(res)
+
+    async def _resolve_single(
+        self, session, text: str, fut: asyncio.Future, src: str, dest: str, priority: Priority, guild_id: int,
+    ) -> None:
+        if fut.done():
+            return
+        try:
+            res = await self._single(session, text, src, dest, priority, guild_id)
+        except Exception as e:
+            if not fut.done():
+                fut.set_exception(e)
+        else:
+            if not fut.done():
+                fut.set_result(res)
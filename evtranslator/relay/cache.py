@@ -0,0 +1,103 @@
+# evtranslator/relay/cache.py
+from __future__ import annotations
+import asyncio, hashlib, logging, time
+from collections import OrderedDict
+from typing import Optional
+
+from evtranslator.db import get_cached_translation, put_cached_translation, purge_xlate_cache
+
+log = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza espaços (preserva quebras de linha, que mudam a saída)."""
+    lines = (text or "").strip().splitlines()
+    return "\n".join(" ".join(line.split()) for line in lines)
+
+
+class TranslationCache:
+    """
+    Cache de traduções em duas camadas:
+      - LRU em memória (limitado por quantidade de itens)
+      - SQLite (tabela xlate_cache), com TTL e teto de linhas; sobrevive a restart
+    Chave = (src_lang, tgt_lang, versão do glossário, texto normalizado).
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_items: int = 5000,
+        ttl_sec: int = 7 * 24 * 3600,
+        max_rows: int = 200_000,
+        persist: bool = True,
+    ):
+        self.db_path = db_path
+        self.max_items = max(1, max_items)
+        self.ttl_sec = ttl_sec
+        self.max_rows = max_rows
+        self.persist = persist
+        self._mem: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._writes: set[asyncio.Task] = set()
+        self.stats = {"mem_hits": 0, "db_hits": 0, "misses": 0, "puts": 0}
+
+    @staticmethod
+    def make_key(src_lang: str, tgt_lang: str, text: str, gloss_ver: str = "") -> str:
+        raw = f"{src_lang}|{tgt_lang}|{gloss_ver}|{normalize_text(text)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        hit = self._mem.get(key)
+        if hit is not None:
+            value, created = hit
+            if now - created < self.ttl_sec:
+                self._mem.move_to_end(key)
+                self.stats["mem_hits"] += 1
+                return value
+            self._mem.pop(key, None)
+
+        if self.persist:
+            try:
+                value = await get_cached_translation(self.db_path, key, int(now - self.ttl_sec), int(now))
+            except Exception as e:
+                log.warning("[cache] leitura SQLite falhou: %s", e)
+                value = None
+            if value is not None:
+                # promove para a memória (idade conta a partir de agora; o TTL do SQLite é o teto real)
+                self._remember(key, value, now)
+                self.stats["db_hits"] += 1
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value: str) -> None:
+        """Grava na memória na hora; a escrita no SQLite roda em background."""
+        if not value:
+            return
+        now = time.time()
+        self._remember(key, value, now)
+        self.stats["puts"] += 1
+        if self.persist:
+            task = asyncio.create_task(self._persist(key, value, int(now)))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    def _remember(self, key: str, value: str, ts: float) -> None:
+        self._mem[key] = (value, ts)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    async def _persist(self, key: str, value: str, ts: int) -> None:
+        try:
+            await put_cached_translation(self.db_path, key, value, ts)
+        except Exception as e:
+            log.warning("[cache] escrita SQLite falhou: %s", e)
+
+    async def purge(self) -> int:
+        """Aplica TTL e teto de linhas na camada SQLite. Retorna quantas linhas removeu."""
+        if not self.persist:
+            return 0
+        cutoff = int(time.time() - self.ttl_sec)
+        return await purge_xlate_cache(self.db_path, cutoff, self.max_rows)
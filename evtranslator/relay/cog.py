@@ -9,16 +9,21 @@ import discord
 from discord.ext import commands
 
 from evtranslator.config import (
-    DB_PATH, MIN_MSG_LEN, USER_COOLDOWN_SEC, CHANNEL_COOLDOWN_SEC,
+    DB_PATH, MIN_MSG_LEN, MAX_MSG_LEN, USER_COOLDOWN_SEC, CHANNEL_COOLDOWN_SEC,
 )
-from evtranslator.db import get_link_info
 from evtranslator.webhook import WebhookSender
 
-from evtranslator.relay.filters import tupperbox_guard, basic_checks, short_text_ok, clamp_text, Dedupe
-from evtranslator.relay.ratelimit import TokenBucket
-from evtranslator.relay.backoff import BackoffCfg, CircuitBreaker
-
-from evtranslator.relay.translate_wrap import translate_with_controls
+from evtranslator.relay.filters import basic_checks, short_text_ok, clamp_text, Dedupe
+
+from evtranslator.relay.segment import split_for_discord
+from evtranslator.relay.scheduler import Priority
+from evtranslator.relay.deferred import DeferredQueue
+from evtranslator.relay.pipeline import Pipeline, Stage, DROP_OLDEST, REJECT_NEWEST, BLOCK
+from evtranslator.relay.sequencer import ReorderBuffer, LATE_POLICIES, LATE_SEND
+from evtranslator.relay.proxy import ProxyDetector, DEFAULT_PROXY_BOT_IDS
+from evtranslator.relay.members import BotMemberIndex
+from evtranslator.relay.markup import protect_markup, restore_markup, natural_text, billable_len
+from evtranslator.relay.delta import SegmentPlan
 from evtranslator.relay.send import send_translation
 from evtranslator.relay.attachments import extract_urls
 from evtranslator.config import TRANSLATED_FLAG
@@ -30,7 +35,8 @@ from evtranslator.db import (
     touch_translation_edit,
     purge_xlate_older_than,
     delete_translation_map,
-    get_webhook_token_by_id,
+    save_translation_segments,
+    get_translation_segments,
 )
 
 from evtranslator.relay.quota import (
@@ -39,6 +45,7 @@ from evtranslator.relay.quota import (
     precheck_chars,
     commit_chars,
     maybe_warn_90pct,
+    QuotaLedger,
 )
 
 log = logging.getLogger(__name__)
@@ -56,31 +63,12 @@ class RelayCog(commands.Cog):
         self.user_cd_event = float(os.getenv("EV_USER_COOLDOWN_SEC", "1.5"))
         self.chan_cd_event = float(os.getenv("EV_CHANNEL_COOLDOWN_SEC", "2.0"))
 
-        rate = float(os.getenv("EV_PROVIDER_RATE_CAP", "12"))
-        burst = float(os.getenv("EV_PROVIDER_BURST", "24"))
-        self.rate_limiter = TokenBucket(rate, burst)
-        self._own_wh_cache: set[int] = set()  # IDs de webhooks “nossos” (persistidos no DB)
-
-
-        self.translate_timeout = float(os.getenv("EV_TRANSLATE_TIMEOUT", "8"))
-        self.jitter_ms = int(os.getenv("EV_JITTER_MS", "150"))
-
-        self.backoff_cfg = BackoffCfg(
-            attempts=int(os.getenv("EV_RETRY_ATTEMPTS", "3")),
-            base=float(os.getenv("EV_RETRY_BASE", "0.3")),
-            factor=float(os.getenv("EV_RETRY_FACTOR", "2.0")),
-            max_delay=float(os.getenv("EV_RETRY_MAX", "2.0")),
-            jitter_ms=int(os.getenv("EV_RETRY_JITTER_MS", "150")),
-        )
-        self.cb = CircuitBreaker(
-            fail_threshold=int(os.getenv("EV_CB_THRESHOLD", "6")),
-            cooldown_sec=float(os.getenv("EV_CB_COOLDOWN", "30")),
-        )
         self.dedupe = Dedupe(float(os.getenv("EV_DEDUPE_WINDOW_SEC", "3.0")))
 
-        self._rita_cache: dict[int, bool] = {}
         self._rita_warned: set[int] = set()
-        self._rita_mutex = asyncio.Lock()
+        # bots de cada guild, mantidos por eventos de membro (sem lock global)
+        self.bot_members = BotMemberIndex()
+        setattr(self.bot, "bot_members", self.bot_members)
 
         self._guild_snap_ts: dict[int, float] = {}
         self._guild_snap_interval = 600.0  # 10 min
@@ -89,8 +77,57 @@ class RelayCog(commands.Cog):
         self._xlate_cleanup_interval = int(os.getenv("EV_EDIT_CLEAN_SEC", "600"))
         self._xlate_cleanup_started = False
         self.map_retention_sec = 30 * 24 * 3600  # 30 dias, sem ENV
+        # edição por segmentos: guarda as frases traduzidas e re-traduz só as que mudaram
+        self.edit_delta = os.getenv("EV_EDIT_DELTA", "true").lower() == "true"
+        self.edit_delta_min_chars = int(os.getenv("EV_EDIT_DELTA_MIN_CHARS", "200"))
+        self.edit_delta_max_segments = int(os.getenv("EV_EDIT_DELTA_MAX_SEGMENTS", "40"))
+        # mensagem nova vai inteira ao provedor (contexto entre frases); os segmentos
+        # nascem na 1ª edição. Ligado, a mensagem nova já sai por segmentos e guarda.
+        self.edit_delta_live = os.getenv("EV_EDIT_DELTA_LIVE", "false").lower() == "true"
         self.reply_service = ReplyService(bot)
 
+        # fila de outage: mensagens que chegam com o CB aberto são reenviadas depois
+        self.deferred = DeferredQueue(
+            max_items=int(os.getenv("EV_DEFERRED_MAX", "500")),
+            ttl_sec=float(os.getenv("EV_DEFERRED_TTL_SEC", "120")),
+        )
+        self._deferred_parallel = int(os.getenv("EV_DEFERRED_PARALLEL", "4"))
+        self._drain_task: asyncio.Task | None = None
+
+        # ordem de entrega por canal: numera na chegada, traduz em paralelo, envia em ordem
+        self.reorder: ReorderBuffer | None = None
+        if os.getenv("EV_REORDER", "true").lower() == "true":
+            late_policy = os.getenv("EV_REORDER_LATE", LATE_SEND).lower()
+            if late_policy not in LATE_POLICIES:
+                log.warning("EV_REORDER_LATE=%r inválido, usando %s", late_policy, LATE_SEND)
+                late_policy = LATE_SEND
+            self.reorder = ReorderBuffer(
+                max_wait_sec=float(os.getenv("EV_REORDER_WAIT_SEC", "4")),
+                late_policy=late_policy,
+                parallel=int(os.getenv("EV_REORDER_PARALLEL", "8")),
+            )
+        self.reorder_late_mark = os.getenv("EV_REORDER_LATE_MARK", "⏱️")
+        setattr(self.bot, "reorder", self.reorder)
+
+        # cota de mensagem nova: reserva na pré-checagem, cobra depois do envio
+        self.quota = QuotaLedger()
+        setattr(self.bot, "quota_ledger", self.quota)
+
+        # proxy (Tupperbox/PluralKit): pendentes resolvidas por delete / re-post, sem fetch
+        proxy_ids = [int(x.strip()) for x in os.getenv("EV_PROXY_BOT_IDS", "").split(",") if x.strip().isdigit()]
+        self.proxy = ProxyDetector(
+            self.bot.own_webhooks,
+            wait_sec=float(os.getenv("EV_PROXY_WAIT_SEC", "0.7")),
+            track_max=int(os.getenv("EV_PROXY_TRACK_MAX", "2000")),
+            proxy_bot_ids=proxy_ids or DEFAULT_PROXY_BOT_IDS,
+        )
+        setattr(self.bot, "proxy", self.proxy)
+
+        # pipeline do on_message: filas limitadas por etapa + workers fixos + descarte explícito
+        self.pipeline_enabled = os.getenv("EV_PIPELINE", "true").lower() == "true"
+        self.pipeline = self._build_pipeline()
+        setattr(self.bot, "pipeline", self.pipeline)
+
         # Rita block
         self.rita_block = os.getenv("EV_BLOCK_RITA", "true").lower() == "true"
         self.known_rita_ids: set[int] = {
@@ -98,9 +135,38 @@ class RelayCog(commands.Cog):
         }
 
         # Webhook manager (session injetada no on_ready)
-        self.webhook_sender = WebhookSender(bot_user_id=None, default_avatar_bytes=None)
+        self.webhook_sender = WebhookSender(bot_user_id=None, default_avatar_bytes=None,
+                                            own_webhooks=self.bot.own_webhooks)
         setattr(self.bot, "webhooks", self.webhook_sender)
 
+    def _build_pipeline(self) -> Pipeline:
+        workers = [4, 32, 16, 8]  # ingest | filter (guard de proxy espera até 0.7s) | translate | deliver
+        raw = os.getenv("EV_PIPELINE_WORKERS", "")
+        for i, part in enumerate(raw.split("|")[: len(workers)] if raw else []):
+            if part.strip().isdigit():
+                workers[i] = int(part)
+        maxsize = int(os.getenv("EV_PIPELINE_QUEUE", "200"))
+        policy = os.getenv("EV_PIPELINE_SHED", DROP_OLDEST).lower()
+        if policy not in (DROP_OLDEST, REJECT_NEWEST):
+            log.warning("EV_PIPELINE_SHED=%r inválido, usando %s", policy, DROP_OLDEST)
+            policy = DROP_OLDEST
+        # descarte só antes do provedor/cota; o que chega no deliver já custou a tradução
+        handlers = [
+            ("ingest", self._stage_ingest, policy),
+            ("filter", self._stage_filter, policy),
+            ("translate", self._stage_translate, policy),
+            ("deliver", self._stage_deliver, BLOCK),
+        ]
+        return Pipeline(
+            [Stage(name, fn, workers=w, maxsize=maxsize, policy=pol)
+             for (name, fn, pol), w in zip(handlers, workers)],
+            on_drop=self._on_pipeline_drop,
+            on_end=self._on_pipeline_end,
+        )
+
+    async def cog_unload(self):
+        await self.pipeline.stop()
+
     @commands.Cog.listener()
     async def on_ready(self):
         if self.webhook_sender.bot_user_id is None and self.bot.user:
@@ -110,24 +176,40 @@ class RelayCog(commands.Cog):
                 self.webhook_sender.default_avatar_bytes = await self.bot.user.display_avatar.read()
             except Exception:
                 pass
+        # chunk inicial: guilds com cache de membros completo entram no índice sem I/O
+        ready = sum(1 for g in self.bot.guilds if self.bot_members.load_from_cache(g))
+        log.info("[members] índice de bots: %s/%s guilds a partir do cache", ready, len(self.bot.guilds))
         if not self._xlate_cleanup_started:
             self._xlate_cleanup_started = True
             asyncio.create_task(self._xlate_cleanup_loop())
 
-        # injeta a http_session do bot no WebhookSender (necessário p/ Webhook.partial)
-        self.webhook_sender.http_session = getattr(self.bot, "http_session", None)
+        # injeta a sessão do pool "discord" no WebhookSender (necessário p/ Webhook.partial)
+        pools = getattr(self.bot, "http_pools", None)
+        self.webhook_sender.http_session = pools.discord if pools else getattr(self.bot, "http_session", None)
         log.info("webhook: http_session injetada = %s", self.webhook_sender.http_session is not None)
         log.info("DB_PATH runtime=%s (cwd=%s)", DB_PATH, os.getcwd())
 
     @commands.Cog.listener()
     async def on_guild_remove(self, guild: discord.Guild):
         self._rita_warned.discard(guild.id)
-        self._rita_cache.pop(guild.id, None)
+        self.bot_members.forget(guild.id)
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild: discord.Guild):
         self._rita_warned.discard(guild.id)
-        self._rita_cache.pop(guild.id, None)
+        self.bot_members.forget(guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        self.bot_members.on_join(member)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        self.bot_members.on_remove(payload.guild_id, payload.user.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        self.bot_members.on_update(after)
 
     @commands.Cog.listener()
     async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
@@ -141,12 +223,13 @@ class RelayCog(commands.Cog):
     # EDIT: helper reutilizado
     # =======================
     async def _handle_message_edit(self, after: discord.Message):
+        t_arrival = time.monotonic()  # âncora do deadline da tradução
         # ignora bots/webhooks/DMs
         if after.guild is None or after.author.bot or after.webhook_id is not None:
             return
 
-        # precisa ter link (lado origem)
-        link = await get_link_info(DB_PATH, after.guild.id, after.channel.id)
+        # precisa ter link (lado origem) — índice em memória
+        link = await self.bot.links.resolve(DB_PATH, after.guild.id, after.channel.id)
         if not link:
             return
         target_id, src_lang, tgt_lang = link
@@ -171,33 +254,59 @@ class RelayCog(commands.Cog):
         text_no_urls, urls_in_text = extract_urls(text)
         text_no_urls = clamp_text(text_no_urls)
 
-        # 🔒 MARCA termos de origem com placeholders
-        marked, tags = self.bot.gloss.proteger(text_no_urls, src_lang, tgt_lang)
+        # 🔒 MARCA markup do Discord (menções, código, emoji...) e termos de origem com placeholders
+        md_marked, md_spans = protect_markup(text_no_urls)
+        natural = natural_text(md_marked)
+        n_chars = billable_len(md_marked)  # só linguagem natural vai ao provedor/cota
+        marked, tags = self.bot.gloss.proteger(md_marked, src_lang, tgt_lang)
+
+        # quota + tradução (texto já no idioma de destino não vai ao provedor nem é cobrado)
+        should_translate = n_chars >= MIN_MSG_LEN
+        if should_translate and self.bot.gateway.already_in(natural, tgt_lang):
+            should_translate = False
 
-        # quota + tradução
-        if len(marked) >= MIN_MSG_LEN:
-            ok, used, cap = await precheck_chars(after.guild.id, len(marked))
+        # segmentos da tradução anterior: só frases alteradas vão ao provedor/cota
+        plan = None
+        if should_translate and self.edit_delta:
+            try:
+                stored = await get_translation_segments(DB_PATH, after.guild.id, after.id)
+            except Exception as e:
+                log.warning("edit: leitura de segmentos falhou: %s", e)
+                stored = {}
+            plan = self._segment_plan(marked, src_lang, tgt_lang, stored)
+            if plan is not None:
+                n_chars = plan.changed_chars()
+                log.info("edit: delta src_msg=%s segmentos=%d reaproveitados=%d chars=%d",
+                         after.id, len(plan), plan.reused, n_chars)
+
+        if should_translate:
+            ok, used, cap = await precheck_chars(after.guild.id, n_chars)
+            self.bot.gateway.note_char_limit(after.guild.id, cap)
             if not ok:
-                log.info("edit: quota negada p/ guild=%s chars=%s used=%s cap=%s", after.guild.id, len(marked), used, cap)
+                log.info("edit: quota negada p/ guild=%s chars=%s used=%s cap=%s", after.guild.id, n_chars, used, cap)
                 return
 
-            translated_core = await translate_with_controls(
-                self.bot.http_session, marked, src_lang, tgt_lang,
-                getattr(self.bot, "sem", asyncio.Semaphore(1)),
-                self.translate_timeout, self.jitter_ms,
-                self.backoff_cfg, self.cb, self.rate_limiter.acquire,
-            )
+            xlate_kw = dict(started_at=t_arrival, priority=Priority.EDIT, guild_id=after.guild.id)
+            if plan is not None:
+                translated_core = await plan.run(self.bot.gateway, src_lang, tgt_lang, **xlate_kw)
+            else:
+                translated_core = await self.bot.gateway.translate(marked, src_lang, tgt_lang, **xlate_kw)
             if translated_core is None:
                 log.info("edit: tradução falhou (None) p/ src_msg=%s", after.id)
                 return
         else:
             translated_core = marked
 
-        # 🔓 RESTAURA placeholders para o termo final
+        # 🔓 RESTAURA placeholders para o termo final e o markup original
         translated_core = self.bot.gloss.restaurar(translated_core, tags)
+        translated_core = restore_markup(translated_core, md_spans)
 
         translated = (translated_core + ("\n" + "\n".join(urls_in_text) if urls_in_text else "")).strip()
 
+        # a edição só altera UMA mensagem: se a tradução passou do limite, mantém o 1º bloco
+        if len(translated) > MAX_MSG_LEN:
+            translated = split_for_discord(translated, MAX_MSG_LEN - 4)[0] + " (…)"
+
 
         # preferir o canal salvo no vínculo
         saved_target = after.guild.get_channel(tgt_ch_id)
@@ -216,9 +325,10 @@ class RelayCog(commands.Cog):
                         msg = await tgt_ch.fetch_message(tgt_msg_id)
                         await msg.edit(content=translated, allowed_mentions=discord.AllowedMentions.none())
                         log.info("edit: sucesso via channel.send p/ tgt_msg_id=%s", tgt_msg_id)
-                        if len(text_no_urls) >= MIN_MSG_LEN:
-                            committed = await commit_chars(after.guild.id, len(text_no_urls))
+                        if should_translate:
+                            committed = await commit_chars(after.guild.id, n_chars)
                         await touch_translation_edit(DB_PATH, after.guild.id, after.id, now)
+                        await self._save_segments(after.guild.id, after.id, plan)
                     except Exception as e:
                         log.warning("edit: erro ao editar fallback msg=%s: %s", tgt_msg_id, e)
                 return
@@ -237,10 +347,11 @@ class RelayCog(commands.Cog):
             await wh.edit_message(int(tgt_msg_id), content=translated, allowed_mentions=discord.AllowedMentions.none())
             log.info("edit: sucesso p/ tgt_msg_id=%s", tgt_msg_id)
 
-            if len(text_no_urls) >= MIN_MSG_LEN:
-                committed = await commit_chars(after.guild.id, len(text_no_urls))
-                log.info("edit: commit_chars=%s guild=%s chars=%s", committed, after.guild.id, len(text_no_urls))
+            if should_translate:
+                committed = await commit_chars(after.guild.id, n_chars)
+                log.info("edit: commit_chars=%s guild=%s chars=%s", committed, after.guild.id, n_chars)
             await touch_translation_edit(DB_PATH, after.guild.id, after.id, now)
+            await self._save_segments(after.guild.id, after.id, plan)
 
         except discord.NotFound:
             # Mensagem original não pode mais ser editada → não repostar; remover vínculo
@@ -265,6 +376,9 @@ class RelayCog(commands.Cog):
                  payload.guild_id, payload.channel_id, payload.message_id, list(payload.data.keys()))
         if payload.guild_id is None or payload.channel_id is None or payload.message_id is None:
             return
+        # canal sem link: nem busca a mensagem na API
+        if not self.bot.links.maybe_linked(payload.guild_id, payload.channel_id):
+            return
 
         guild = self.bot.get_guild(payload.guild_id)
         if guild is None:
@@ -285,77 +399,52 @@ class RelayCog(commands.Cog):
         await self._handle_message_edit(msg)
 
     # ====== Rita detection helpers ======
-    async def _guild_has_rita(self, guild: discord.Guild) -> bool:
-        cached = self._rita_cache.get(guild.id)
-        if cached is not None:
-            return cached
-        try:
-            def _is_rita(m: discord.Member) -> bool:
-                if not m.bot:
-                    return False
-                if self.known_rita_ids and m.id in self.known_rita_ids:
-                    return True
-                name = (m.name or "").strip().lower()
-                return (name == "rita") or name.startswith("rita ")
-
-            for m in guild.members:
-                if _is_rita(m):
-                    self._rita_cache[guild.id] = True
-                    return True
-
-            if not getattr(guild, "chunked", False):
-                try:
-                    await guild.chunk()
-                except Exception:
-                    pass
-                for m in guild.members:
-                    if _is_rita(m):
-                        self._rita_cache[guild.id] = True
-                        return True
+    def _is_rita(self, member_id: int, name: str) -> bool:
+        if self.known_rita_ids and member_id in self.known_rita_ids:
+            return True
+        return (name == "rita") or name.startswith("rita ")
 
-            try:
-                async for m in guild.fetch_members(limit=None):
-                    if _is_rita(m):
-                        self._rita_cache[guild.id] = True
-                        return True
-            except Exception:
-                pass
+    async def _guild_has_rita(self, guild: discord.Guild) -> bool:
+        # índice de bots por guild: só a guild ainda não varrida espera (lock dela)
+        return await self.bot_members.has_bot(guild, self._is_rita)
 
-            self._rita_cache[guild.id] = False
-            return False
-        except Exception:
-            self._rita_cache[guild.id] = False
-            return False
 
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        self.proxy.on_delete(payload.message_id)
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
+        # canal que não é origem de link: sai com um lookup em dict, antes de qualquer I/O
+        if message.guild is None or not self.bot.links.maybe_linked(message.guild.id, message.channel.id):
+            return
+        # registra já na chegada: delete / re-post do proxy podem vir antes da etapa filter
+        self.proxy.track(message)
+        # produtor fino: só carimba a chegada e enfileira (ingest → filter → translate → deliver)
+        seq = self.reorder.next_seq(message.channel.id) if self.reorder is not None else None
+        item = (message, seq, time.monotonic())  # âncora do deadline da tradução
+        if not self.pipeline_enabled:
+            await self.pipeline.run_inline(item)
+            return
+        self.pipeline.submit(item)
+
+    # =======================
+    # Etapas do pipeline (on_message)
+    # =======================
+    async def _stage_ingest(self, item: tuple) -> tuple | None:
+        """Eco dos nossos webhooks, snapshot da guild e bloqueio da Rita."""
+        message, seq, t_arrival = item
         # Ignore mensagens que vieram de WEBHOOKS NOSSOS (evita eco).
         # - Mensagens do Tupperbox também são webhooks, mas NÃO estão na tabela webhook_tokens,
         #   então continuam sendo traduzidas normalmente.
-        if message.webhook_id is not None:
-            wid = int(message.webhook_id)
-
-            # cache rápido: já marcamos esse webhook como “nosso”
-            if wid in self._own_wh_cache:
-                return
-
-            # consulta no banco: se temos token salvo, é um webhook “nosso”
-            info = None
-            try:
-                info = await get_webhook_token_by_id(DB_PATH, wid)
-            except Exception:
-                info = None
-
-            if info is not None:
-                # é nosso webhook → não traduzir (evita eco)
-                self._own_wh_cache.add(wid)
-                return
+        # Índice em memória (webhook_tokens) + cache negativo para webhooks de terceiros.
+        if message.webhook_id is not None and await self.bot.own_webhooks.is_own(DB_PATH, message.webhook_id):
+            return None
 
         # fallback extra: se por algum motivo o conteúdo tiver nossa flag invisível, ignore
         from evtranslator.config import TRANSLATED_FLAG
         if TRANSLATED_FLAG in (message.content or ""):
-            return
+            return None
         # snapshot throttle
         snapshot = None
         if message.guild is not None:
@@ -373,35 +462,39 @@ class RelayCog(commands.Cog):
         # Rita block
         if message.guild and self.rita_block:
             gid = message.guild.id
-            async with self._rita_mutex:
-                if await self._guild_has_rita(message.guild):
-                    if gid not in self._rita_warned:
-                        self._rita_warned.add(gid)
-                        try:
-                            await message.channel.send(
-                                "⚠️ Este servidor já possui um bot de tradução comercial. O EVbabel será removido."
-                            )
-                        except Exception:
-                            pass
+            if await self._guild_has_rita(message.guild):
+                if gid not in self._rita_warned:
+                    self._rita_warned.add(gid)
                     try:
-                        await message.guild.leave()
-                    finally:
-                        return
+                        await message.channel.send(
+                            "⚠️ Este servidor já possui um bot de tradução comercial. O EVbabel será removido."
+                        )
+                    except Exception:
+                        pass
+                try:
+                    await message.guild.leave()
+                finally:
+                    return None
 
+        return message, seq, t_arrival, snapshot
+
+    async def _stage_filter(self, item: tuple) -> tuple | None:
+        """Filtros, vínculo, cooldowns e cota habilitada → job de tradução."""
+        message, seq, t_arrival, snapshot = item
         # filtros
-        if not basic_checks(message):
-            return
-        if not await tupperbox_guard(message):
-            return
+        if not basic_checks(message, self.bot.own_webhooks):
+            return None
+        if not await self.proxy.guard(message):
+            return None
 
-        link = await get_link_info(DB_PATH, message.guild.id, message.channel.id)
+        link = await self.bot.links.resolve(DB_PATH, message.guild.id, message.channel.id)
         if not link:
-            return
+            return None
 
         target_id, src_lang, tgt_lang = link
         target_ch = message.guild.get_channel(target_id)
         if not isinstance(target_ch, discord.TextChannel) or target_id == message.channel.id:
-            return
+            return None
 
         text = (message.content or "").strip()
         has_atts = bool(message.attachments)
@@ -429,7 +522,7 @@ class RelayCog(commands.Cog):
                 "skip short_text_ok: len_no_urls=%s, has_atts=%s, has_url=%s, hosts=%s, preview=%r",
                 len(text_no_urls or ""), has_atts, has_url, sorted(url_hosts), (text[:100] if text else "")
             )
-            return
+            return None
 
 
         text_no_urls = clamp_text(text_no_urls)
@@ -438,16 +531,18 @@ class RelayCog(commands.Cog):
         now = time.time()
         user_cd = self.user_cd_event if self.event_mode else USER_COOLDOWN_SEC
         if now - self.user_cooldowns.get(message.author.id, 0.0) < user_cd:
-            return
+            return None
         self.user_cooldowns[message.author.id] = now
 
-        chan_cd = self.chan_cd_event if self.event_mode else CHANNEL_COOLDOWN_SEC
-        if now - self.channel_cooldowns.get(message.channel.id, 0.0) < chan_cd:
-            return
-        self.channel_cooldowns[message.channel.id] = now
+        # cooldown de canal só sem o reorder: com ele, rajadas saem em ordem em vez de serem descartadas
+        if self.reorder is None:
+            chan_cd = self.chan_cd_event if self.event_mode else CHANNEL_COOLDOWN_SEC
+            if now - self.channel_cooldowns.get(message.channel.id, 0.0) < chan_cd:
+                return None
+            self.channel_cooldowns[message.channel.id] = now
 
         if self.event_mode and not self.dedupe.check_and_set(message.channel.id, message.author.id, text):
-            return
+            return None
 
         # fallback snapshot
         if snapshot is None and message.guild is not None:
@@ -457,34 +552,118 @@ class RelayCog(commands.Cog):
                 snapshot = {}
 
         if not await check_enabled_and_notice(message, snapshot or {}, self.disabled_notice_ts):
+            return None
+
+        # traduz apenas o que é linguagem natural (sem URL nem markup do Discord)
+        natural = natural_text(protect_markup(text_no_urls)[0])
+        should_translate = len(natural) >= MIN_MSG_LEN
+
+        # já está no idioma de destino (canal bilíngue)? espelha sem gastar provedor/cota
+        if should_translate and self.bot.gateway.already_in(natural, tgt_lang):
+            should_translate = False
+
+        job = (target_ch, src_lang, tgt_lang, text_no_urls, urls_in_text, should_translate)
+        return message, seq, t_arrival, job
+
+    async def _stage_translate(self, item: tuple) -> tuple | None:
+        message, seq, t_arrival, job = item
+        if self.deferred.has_pending(message.channel.id):
+            # canal com backlog do outage: entra na fila para não passar na frente
+            self._park(message, job)
+            return None
+        prepared = await self._prepare_translation(message, job, t_arrival)
+        if isinstance(prepared, str):
+            return None
+        return message, seq, prepared
+
+    async def _stage_deliver(self, item: tuple) -> None:
+        message, seq, prepared = item
+        if self.reorder is None or seq is None:
+            await self._deliver(message, prepared)
             return
+        # só entrega ao buffer: o flusher do canal envia na ordem de chegada
+        self.reorder.put(
+            message.channel.id, seq, lambda late: self._deliver(message, prepared, late),
+            on_drop=lambda: self.quota.cancel(message.guild.id, prepared[3]),
+        )
 
-        # traduz apenas o que não é URL
-        should_translate = len(text_no_urls) >= MIN_MSG_LEN
-
-        # 🔒 MARCA
-        marked, tags = self.bot.gloss.proteger(text_no_urls, src_lang, tgt_lang)
-
+    def _release_seq(self, item: tuple) -> None:
+        message, seq = item[0], item[1]
+        if self.reorder is not None and seq is not None:
+            self.reorder.release(message.channel.id, seq)
+
+    def _on_pipeline_drop(self, item: tuple, stage: str, reason: str) -> None:
+        self._release_seq(item)
+        message = item[0]
+        log.info("pipeline: msg=%s descartada na etapa %s (%s)", getattr(message, "id", "?"), stage, reason)
+
+    def _on_pipeline_end(self, item: tuple, stage: str) -> None:
+        # filtrada, pulada ou estacionada: libera o número para não travar o canal
+        self._release_seq(item)
+
+    async def _translate_and_deliver(self, message: discord.Message, job: tuple, t_arrival: float,
+                                     deferred: bool = False) -> str:
+        """
+        Traduz (se preciso), cobra cota, envia e grava o vínculo.
+        Retorna "sent", "skipped", "parked" (estacionada na fila de outage) ou,
+        no reenvio (deferred=True), "unavailable" se o provedor ainda estiver fora.
+        """
+        prepared = await self._prepare_translation(message, job, t_arrival, deferred)
+        if isinstance(prepared, str):
+            return prepared
+        return "sent" if await self._deliver(message, prepared) else "skipped"
+
+    async def _prepare_translation(self, message: discord.Message, job: tuple, t_arrival: float,
+                                   deferred: bool = False) -> tuple | str:
+        """
+        Metade "translate" do envio: tradução + reserva de cota (QuotaLedger).
+        Retorna (target_ch, texto_final, plan, chars_reservados) ou o desfecho
+        ("skipped"/"parked"/"unavailable"). A reserva vira consumo no _deliver,
+        depois do envio: mensagem pulada pelo reorder ou que falha no envio só
+        devolve a reserva.
+        """
+        target_ch, src_lang, tgt_lang, text_no_urls, urls_in_text, should_translate = job
+
+        # 🔒 MARCA markup do Discord e termos do glossário
+        md_marked, md_spans = protect_markup(text_no_urls)
+        n_chars = billable_len(md_marked)  # cobra só a linguagem natural
+        marked, tags = self.bot.gloss.proteger(md_marked, src_lang, tgt_lang)
+
+        plan = None
         if should_translate:
-            n_chars = len(marked)
-            ok, used, cap = await precheck_chars(message.guild.id, n_chars)
+            ok, used, cap = await self.quota.reserve(message.guild.id, n_chars)
+            self.bot.gateway.note_char_limit(message.guild.id, cap)
             if not ok:
                 ...
-                return
+                return "skipped"
 
-            translated_core = await translate_with_controls(
-                self.bot.http_session, marked, src_lang, tgt_lang,
-                getattr(self.bot, "sem", asyncio.Semaphore(1)),
-                self.translate_timeout, self.jitter_ms,
-                self.backoff_cfg, self.cb, self.rate_limiter.acquire,
-            )
+            # texto inteiro; por segmentos só com EV_EDIT_DELTA_LIVE (senão a 1ª edição cria os segmentos)
+            if self.edit_delta_live:
+                plan = self._segment_plan(marked, src_lang, tgt_lang)
+            xlate_kw = dict(started_at=t_arrival, priority=Priority.LIVE, guild_id=message.guild.id)
+            try:
+                if plan is not None:
+                    translated_core = await plan.run(self.bot.gateway, src_lang, tgt_lang, **xlate_kw)
+                else:
+                    translated_core = await self.bot.gateway.translate(marked, src_lang, tgt_lang, **xlate_kw)
+            except BaseException:
+                self.quota.cancel(message.guild.id, n_chars)
+                raise
             if translated_core is None:
-                return
+                self.quota.cancel(message.guild.id, n_chars)
+                if self.bot.gateway.breaker_tripped():
+                    # provedor fora (CB aberto): estaciona em vez de perder a mensagem
+                    if deferred:
+                        return "unavailable"
+                    self._park(message, job)
+                    return "parked"
+                return "skipped"
         else:
             translated_core = marked
 
         # 🔓 RESTAURA
         translated_core = self.bot.gloss.restaurar(translated_core, tags)
+        translated_core = restore_markup(translated_core, md_spans)
 
         # junta URLs como já fazia
         if urls_in_text:
@@ -510,29 +689,42 @@ class RelayCog(commands.Cog):
                 translated = "\n".join(urls_in_text)
         else:
             translated = translated_core
-            
 
-        if should_translate:
-            committed = await commit_chars(message.guild.id, len(text_no_urls))
-            if not committed:
-                try:
-                    await message.channel.send(
-                        "⚠️ Não foi possível registrar o consumo de cota agora. "
-                        "Tente novamente em instantes."
-                    )
-                except Exception:
-                    pass
-                return
-
-        await maybe_warn_90pct(message.guild, self.warned_guilds)
-       
-        
-        reference, effective_ch = await self.reply_service.resolve_reference(message, target_ch)
+        return target_ch, translated, plan, (n_chars if should_translate else 0)
+
+    async def _deliver(self, message: discord.Message, prepared: tuple, late: bool = False) -> bool:
+        """
+        Metade "deliver": aviso de 90%, reply, envio, cota (após envio ok) e vínculo no banco.
+        `late`: saiu fora de ordem (o reorder já tinha pulado) → leva o marcador.
+        True se a tradução foi postada. Cobrança pendente da guild (commit anterior
+        falhou) que continua falhando bloqueia o envio, como o commit antigo.
+        """
+        target_ch, translated, plan, n_chars = prepared
+        if n_chars and not await self.quota.settle(message.guild.id):
+            self.quota.cancel(message.guild.id, n_chars)
+            log.warning("cota pendente não registrada (guild=%s); msg=%s não enviada", message.guild.id, message.id)
+            try:
+                await message.channel.send(
+                    "⚠️ Não foi possível registrar o consumo de cota agora. "
+                    "Tente novamente em instantes."
+                )
+            except Exception:
+                pass
+            return False
+        if late and self.reorder_late_mark:
+            translated = f"{self.reorder_late_mark} {translated}"
+        ids = None
+        try:
+            await maybe_warn_90pct(message.guild, self.warned_guilds)
+            reference, effective_ch = await self.reply_service.resolve_reference(message, target_ch)
 
-        ids = await send_translation(
-            self.bot, message, effective_ch, translated, message.webhook_id is not None,
-            reference=reference,
-        )
+            ids = await send_translation(
+                self.bot, message, effective_ch, translated, message.webhook_id is not None,
+                reference=reference,
+            )
+        finally:
+            if not ids:
+                self.quota.cancel(message.guild.id, n_chars)  # não postou: devolve a reserva
 
 
         log.info(
@@ -540,25 +732,95 @@ class RelayCog(commands.Cog):
             ids, message.guild.id, target_ch.id, message.id
         )
 
-        # 3. Grava vínculo no banco
-        if ids:
-            tgt_msg_id, webhook_id = ids
+        # 3. Cobra (só o que foi de fato enviado) e grava vínculo no banco
+        if not ids:
+            return False
+        # commit que falha fica pendente no ledger (conta no cap e bloqueia o próximo envio)
+        await self.quota.commit(message.guild.id, n_chars)
+        tgt_msg_id, webhook_id = ids
+        try:
+            await record_translation(
+                DB_PATH,
+                message.guild.id,
+                message.id,
+                message.channel.id,
+                int(tgt_msg_id),
+                target_ch.id,
+                int(webhook_id),
+                int(time.time()),
+            )
+        except Exception as e:
+            log.warning("record_translation falhou: %s", e)
+        else:
+            await self._save_segments(message.guild.id, message.id, plan)
+        return True
+
+    # =======================
+    # Segmentos (edição delta)
+    # =======================
+    def _segment_plan(self, marked: str, src_lang: str, tgt_lang: str,
+                      stored: dict[str, str] | None = None) -> SegmentPlan | None:
+        """Plano por segmentos, ou None se não compensa (curto demais/segmentos demais)."""
+        if not self.edit_delta or (not stored and len(marked) < self.edit_delta_min_chars):
+            return None
+        plan = SegmentPlan(marked, src_lang, tgt_lang, getattr(self.bot.gloss, "versao", ""), stored)
+        if len(plan) > self.edit_delta_max_segments or (not stored and len(plan) < 2):
+            return None
+        return plan
+
+    async def _save_segments(self, guild_id: int, src_msg_id: int, plan: SegmentPlan | None) -> None:
+        if plan is None:
+            return
+        try:
+            await save_translation_segments(DB_PATH, guild_id, src_msg_id, plan.rows())
+        except Exception as e:
+            log.warning("save_translation_segments falhou: %s", e)
+
+    # =======================
+    # Fila de outage (CB aberto)
+    # =======================
+    def _park(self, message: discord.Message, job: tuple) -> None:
+        if not self.deferred.push(message.channel.id, (message, job)):
+            log.warning("deferred: fila cheia (%d); mensagem %s descartada", len(self.deferred), message.id)
+            return
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain_deferred())
+
+    async def _drain_deferred(self):
+        """Reenvia o backlog na ordem de chegada (sequencial por canal) quando o CB fecha."""
+        while len(self.deferred):
+            if self.bot.gateway.cb.is_open:
+                await asyncio.sleep(1.0)
+                continue
+            chans = self.deferred.channels()[: self._deferred_parallel]
+            results = await asyncio.gather(*(self._drain_channel(ch) for ch in chans))
+            if not all(results):
+                await asyncio.sleep(1.0)  # CB reabriu no meio do caminho
+        log.info("deferred: fila drenada (%s)", self.deferred.snapshot())
+
+    async def _drain_channel(self, channel_id: int) -> bool:
+        while True:
+            entry = self.deferred.pop(channel_id)
+            if entry is None:
+                return True
+            message, job = entry[1]
             try:
-                await record_translation(
-                    DB_PATH,
-                    message.guild.id,
-                    message.id,
-                    message.channel.id,
-                    int(tgt_msg_id),
-                    target_ch.id,
-                    int(webhook_id),
-                    int(time.time()),
-                )
+                outcome = await self._translate_and_deliver(message, job, time.monotonic(), deferred=True)
             except Exception as e:
-                log.warning("record_translation falhou: %s", e)
-
+                log.warning("deferred: reenvio falhou (msg=%s): %s", message.id, e)
+                outcome = "failed"
+            finally:
+                self.deferred.done(channel_id)
+            if outcome == "unavailable":
+                self.deferred.push_front(channel_id, entry)
+                return False
+            if outcome == "sent":
+                self.deferred.stats["replayed"] += 1
+            elif outcome == "failed":
+                self.deferred.stats["replay_failed"] += 1
+            else:  # filtrada/sem cota/tradução falhou: saiu da fila sem enviar
+                self.deferred.stats["replay_skipped"] += 1
 
- 
     async def _xlate_cleanup_loop(self):
         while not self.bot.is_closed():
             try:
@@ -572,5 +834,12 @@ class RelayCog(commands.Cog):
                     )
             except Exception as e:
                 log.warning("[xlate] cleanup error: %s", e)
+            if self.bot.gateway.cache is not None:
+                try:
+                    purged = await self.bot.gateway.cache.purge()
+                    if purged:
+                        log.info("[cache] purge: %d tradução(ões) removida(s) do SQLite", purged)
+                except Exception as e:
+                    log.warning("[cache] cleanup error: %s", e)
             await asyncio.sleep(self._xlate_cleanup_interval)
 
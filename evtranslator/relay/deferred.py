@@ -0,0 +1,74 @@
+# evtranslator/relay/deferred.py
+from __future__ import annotations
+import time
+from collections import OrderedDict, deque
+from typing import Any, Optional
+
+
+class DeferredQueue:
+    """
+    Fila limitada de mensagens estacionadas enquanto o provedor está fora
+    (circuit breaker aberto). FIFO por canal de origem, com TTL.
+
+    - push() recusa quando cheia (conta em `dropped`);
+    - pop() pula entradas vencidas (conta em `expired`);
+    - um canal com entradas na fila OU em reenvio é "pendente": mensagens novas
+      desse canal entram atrás do backlog para preservar a ordem de entrega.
+    """
+
+    def __init__(self, max_items: int = 500, ttl_sec: float = 120.0):
+        self.max_items = max_items
+        self.ttl_sec = ttl_sec
+        self._chans: OrderedDict[int, deque[tuple[float, Any]]] = OrderedDict()
+        self._busy: set[int] = set()
+        self._size = 0
+        self.stats = {
+            "parked": 0, "replayed": 0, "replay_skipped": 0, "replay_failed": 0, "expired": 0, "dropped": 0,
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    def has_pending(self, channel_id: int) -> bool:
+        return channel_id in self._chans or channel_id in self._busy
+
+    def channels(self) -> list[int]:
+        """Canais com fila, na ordem em que estacionaram pela primeira vez."""
+        return list(self._chans.keys())
+
+    def push(self, channel_id: int, item: Any) -> bool:
+        if self._size >= self.max_items:
+            self.stats["dropped"] += 1
+            return False
+        self._chans.setdefault(channel_id, deque()).append((time.monotonic(), item))
+        self._size += 1
+        self.stats["parked"] += 1
+        return True
+
+    def push_front(self, channel_id: int, entry: tuple[float, Any]) -> None:
+        """Devolve à frente uma entrada que saiu por pop() mas não pôde ser enviada."""
+        self._chans.setdefault(channel_id, deque()).appendleft(entry)
+        self._chans.move_to_end(channel_id, last=False)
+        self._size += 1
+
+    def pop(self, channel_id: int) -> Optional[tuple[float, Any]]:
+        """Próxima entrada válida do canal (marca o canal como ocupado até done())."""
+        q = self._chans.get(channel_id)
+        now = time.monotonic()
+        while q:
+            ts, item = q.popleft()
+            self._size -= 1
+            if not q:
+                del self._chans[channel_id]
+            if now - ts > self.ttl_sec:
+                self.stats["expired"] += 1
+                continue
+            self._busy.add(channel_id)
+            return ts, item
+        return None
+
+    def done(self, channel_id: int) -> None:
+        self._busy.discard(channel_id)
+
+    def snapshot(self) -> dict:
+        return {"size": self._size, "channels": len(self._chans), **self.stats}
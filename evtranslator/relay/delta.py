@@ -0,0 +1,66 @@
+# evtranslator/relay/delta.py
+from __future__ import annotations
+import hashlib
+from typing import Optional
+
+from evtranslator.relay.segment import split_units
+from evtranslator.relay.markup import billable_len
+
+
+def segment_hash(src_lang: str, tgt_lang: str, gloss_ver: str, body: str) -> str:
+    raw = f"{src_lang}|{tgt_lang}|{gloss_ver}|{body.strip()}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+class SegmentPlan:
+    """
+    Tradução por segmentos (frases/linhas) de um texto já marcado.
+    Segmentos cujo hash já está em `stored` (tradução anterior da mesma
+    mensagem) são reaproveitados; só os demais vão ao provedor e à cota.
+    """
+
+    def __init__(self, marked: str, src_lang: str, tgt_lang: str, gloss_ver: str,
+                 stored: Optional[dict[str, str]] = None):
+        self.units = split_units(marked)
+        self.hashes = [segment_hash(src_lang, tgt_lang, gloss_ver, b) for b, _sep in self.units]
+        self.out: list[Optional[str]] = [None] * len(self.units)
+        self.todo: list[int] = []
+        stored = stored or {}
+        for i, (body, _sep) in enumerate(self.units):
+            if not body.strip():
+                self.out[i] = body
+            elif self.hashes[i] in stored:
+                self.out[i] = stored[self.hashes[i]]
+            else:
+                self.todo.append(i)
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    @property
+    def reused(self) -> int:
+        return sum(1 for b, _s in self.units if b.strip()) - len(self.todo)
+
+    def changed_chars(self) -> int:
+        """Caracteres de linguagem natural que precisam ir ao provedor (base da cota)."""
+        return sum(billable_len(self.units[i][0]) for i in self.todo)
+
+    async def run(self, gateway, src_lang: str, tgt_lang: str, **kw) -> Optional[str]:
+        """Traduz os segmentos pendentes (num lote só) e remonta o texto. None em falha."""
+        if self.todo:
+            parts = await gateway.translate_units(
+                [self.units[i][0] for i in self.todo], src_lang, tgt_lang, **kw
+            )
+            if parts is None:
+                return None
+            for i, part in zip(self.todo, parts):
+                self.out[i] = part
+        return "".join((t or "") + sep for t, (_b, sep) in zip(self.out, self.units))
+
+    def rows(self) -> list[tuple[int, str, str]]:
+        """Linhas para xlate_segments: (idx, src_hash, tradução) — só segmentos com texto."""
+        return [
+            (i, self.hashes[i], self.out[i] or "")
+            for i, (body, _sep) in enumerate(self.units)
+            if body.strip() and self.out[i] is not None
+        ]
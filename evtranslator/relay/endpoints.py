@@ -0,0 +1,141 @@
+# evtranslator/relay/endpoints.py
+from __future__ import annotations
+import logging, time, aiohttp
+from typing import Optional
+
+from evtranslator.relay.ratelimit import TokenBucket
+from evtranslator.translate import (
+    TranslateHTTPError,
+    TranslateParseError,
+    google_web_translate,
+    google_web_translate_batch,
+)
+
+log = logging.getLogger(__name__)
+
+# status que indicam que a CHAVE (host/client) está sendo estrangulada → estaciona a variante
+_PARK_STATUSES = (429, 403)
+
+
+class EndpointVariant:
+    """Uma variante equivalente do endpoint (base URL + client), com bucket e saúde próprios."""
+
+    def __init__(self, base_url: str, client: str = "gtx", rate: float = 10.0, burst: float = 20.0):
+        self.base_url = base_url
+        self.client = client
+        self.name = f"{base_url}#{client}"
+        self.bucket = TokenBucket(rate, burst)
+        self.health = 1.0          # EWMA de sucesso (0..1)
+        self.parked_until = 0.0    # monotonic; > agora = em cooldown
+        self.strikes = 0           # 429 seguidos (cooldown cresce)
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "parked": 0}
+
+    def snapshot(self) -> dict:
+        left = self.parked_until - time.monotonic()
+        return {
+            "health": round(self.health, 3),
+            "parked_sec": round(left, 1) if left > 0 else 0,
+            "rate": self.bucket.snapshot(),
+            **self.stats,
+        }
+
+
+def parse_endpoints(spec: str, default_rate: float, default_burst: float) -> list[EndpointVariant]:
+    """
+    Formato: "url|client|rate|burst" separados por vírgula; client/rate/burst são opcionais.
+    Ex.: "https://translate.googleapis.com/translate_a/single|gtx|8,
+          https://translate.google.com/translate_a/single|gtx|8"
+    """
+    out: list[EndpointVariant] = []
+    for raw in (spec or "").split(","):
+        raw = raw.strip()
+        if not raw:
+            continue
+        parts = [p.strip() for p in raw.split("|")]
+        try:
+            out.append(EndpointVariant(
+                parts[0],
+                client=parts[1] if len(parts) > 1 and parts[1] else "gtx",
+                rate=float(parts[2]) if len(parts) > 2 and parts[2] else default_rate,
+                burst=float(parts[3]) if len(parts) > 3 and parts[3] else default_burst,
+            ))
+        except ValueError:
+            log.warning("endpoints: entrada inválida ignorada: %r", raw)
+    return out
+
+
+class EndpointPool:
+    """
+    Pool de variantes do endpoint de tradução.
+      - escolhe a variante mais saudável que tenha token livre agora;
+        se nenhuma tiver, espera na fila da mais saudável;
+      - 429/403 estacionam a variante (cooldown exponencial por strikes);
+      - se todas estiverem estacionadas, falha na hora com status 429
+        (o circuit breaker/AIMD do gateway tratam como sobrecarga).
+    `translate`/`translate_batch` têm a mesma assinatura das funções de translate.py.
+    """
+
+    def __init__(self, variants: list[EndpointVariant], cooldown_sec: float = 30.0, max_cooldown_sec: float = 300.0):
+        if not variants:
+            raise ValueError("EndpointPool precisa de pelo menos uma variante")
+        self.variants = variants
+        self.cooldown_sec = cooldown_sec
+        self.max_cooldown_sec = max_cooldown_sec
+        self.stats = {"all_parked": 0, "waited": 0}
+
+    async def _pick(self) -> EndpointVariant:
+        now = time.monotonic()
+        live = [v for v in self.variants if v.parked_until <= now]
+        if not live:
+            self.stats["all_parked"] += 1
+            raise TranslateHTTPError("endpoints: todas as variantes em cooldown", status=429)
+        live.sort(key=lambda v: v.health, reverse=True)
+        for v in live:
+            if v.bucket.try_acquire():
+                return v
+        self.stats["waited"] += 1
+        best = live[0]
+        await best.bucket.acquire()
+        return best
+
+    def _on_ok(self, v: EndpointVariant) -> None:
+        v.stats["ok"] += 1
+        v.strikes = 0
+        v.health = v.health * 0.8 + 0.2
+
+    def _on_error(self, v: EndpointVariant, status: Optional[int]) -> None:
+        v.stats["errors"] += 1
+        v.health *= 0.8
+        if status in _PARK_STATUSES:
+            v.strikes += 1
+            cooldown = min(self.max_cooldown_sec, self.cooldown_sec * (2 ** (v.strikes - 1)))
+            v.parked_until = time.monotonic() + cooldown
+            v.stats["parked"] += 1
+            log.warning("endpoints: %s estacionada por %.0fs (status=%s)", v.name, cooldown, status)
+
+    async def _call(self, fn, session, payload, src: str, dest: str, attempts: Optional[int]):
+        v = await self._pick()
+        v.stats["requests"] += 1
+        try:
+            result = await fn(session, payload, src, dest, attempts=attempts, base_url=v.base_url, client=v.client)
+        except TranslateHTTPError as e:
+            self._on_error(v, e.status)
+            raise
+        except (aiohttp.ClientError, TranslateParseError):
+            self._on_error(v, None)
+            raise
+        self._on_ok(v)
+        return result
+
+    async def translate(
+        self, session: aiohttp.ClientSession, text: str, src: str, dest: str, attempts: Optional[int] = None
+    ) -> str:
+        return await self._call(google_web_translate, session, text, src, dest, attempts)
+
+    async def translate_batch(
+        self, session: aiohttp.ClientSession, texts: list[str], src: str, dest: str, attempts: Optional[int] = None
+    ) -> Optional[list[str]]:
+        return await self._call(google_web_translate_batch, session, texts, src, dest, attempts)
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "variants": {v.name: v.snapshot() for v in self.variants}}
@@ -1,7 +1,8 @@
 # evtranslator/relay/filters.py
 from __future__ import annotations
-import asyncio, time, discord
-from evtranslator.config import MIN_MSG_LEN, MAX_MSG_LEN, TRANSLATED_FLAG
+import time, discord
+from evtranslator.config import MIN_MSG_LEN, MAX_INPUT_LEN, TRANSLATED_FLAG
+from evtranslator.webhook_index import OwnWebhookIndex
 
 class Dedupe:
     def __init__(self, window_sec: float):
@@ -17,32 +18,12 @@ class Dedupe:
         self.last[key] = (norm, ts)
         return True
 
-async def tupperbox_guard(message: discord.Message) -> bool:
-    """Retorna False se a msg foi proxied (apagada e re-postada por webhook)."""
-    if message.webhook_id is not None:  # já é proxy
-        return True
-    if not message.author.bot:
-        await asyncio.sleep(0.7)
-        try:
-            await message.channel.fetch_message(message.id)
-        except discord.NotFound:
-            return False
-    return True
-
-def basic_checks(message: discord.Message) -> bool:
+def basic_checks(message: discord.Message, own_webhooks: OwnWebhookIndex) -> bool:
     if not message.guild:
         return False
 
-    # Ignora mensagens GERADAS pelo nosso próprio webhook
-    own_ids = set()
-    try:
-        bot_client = message.guild._state._get_client()  # discord.Client/Bot
-        wh_mgr = getattr(bot_client, "webhooks", None)
-        own_ids = getattr(wh_mgr, "own_webhook_ids", set()) or set()
-    except Exception:
-        own_ids = set()
-
-    if message.webhook_id and int(message.webhook_id) in own_ids:
+    # Ignora mensagens GERADAS pelo nosso próprio webhook (índice em memória)
+    if message.webhook_id and own_webhooks.is_known_own(message.webhook_id):
         return False
 
     # Evita reprocessar qualquer saída nossa marcada com FLAG (cinto e suspensório)
@@ -65,6 +46,6 @@ def short_text_ok(text: str, has_atts: bool, has_url: bool) -> bool:
     return has_atts or has_url
 
 def clamp_text(text: str) -> str:
-    if text and len(text) > MAX_MSG_LEN:
-        return text[:MAX_MSG_LEN] + " (…)"; 
+    if text and len(text) > MAX_INPUT_LEN:
+        return text[:MAX_INPUT_LEN] + " (…)"; 
     return text
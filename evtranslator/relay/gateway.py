@@ -0,0 +1,264 @@
+# evtranslator/relay/gateway.py
+from __future__ import annotations
+import os, logging, asyncio, functools, time, aiohttp
+from typing import Optional
+
+from evtranslator.relay.ratelimit import TokenBucket
+from evtranslator.relay.backoff import BackoffCfg, CircuitBreaker, RetryBudget
+from evtranslator.relay.translate_wrap import translate_with_controls
+from evtranslator.relay.batcher import TranslateBatcher
+from evtranslator.relay.cache import TranslationCache
+from evtranslator.relay.singleflight import SingleFlight
+from evtranslator.relay.hedge import Hedger
+from evtranslator.relay.endpoints import EndpointPool, parse_endpoints
+from evtranslator.relay.scheduler import PriorityScheduler, Priority
+from evtranslator.config import CONCURRENCY
+from evtranslator.translate import _GT_BASE, pack_batch, unpack_batch
+from evtranslator.langid import LanguageDetector
+
+log = logging.getLogger(__name__)
+
+
+class TranslationGateway:
+    """
+    Caminho ÚNICO (por processo) até o provedor de tradução.
+    Dono do rate limiter, semáforo, circuit breaker, sessão HTTP, cache,
+    single-flight e micro-lotes. RelayCog, ReplyService e Clonar passam por aqui,
+    então o teto de rate configurado vale para o processo inteiro.
+
+    Criado no EVTranslatorBot.__init__; a sessão HTTP é injetada no setup_hook.
+    """
+
+    def __init__(self, bot, db_path: str):
+        self.bot = bot
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        # semáforo do bot (fixo ou AIMD)
+        self.sem = getattr(bot, "sem", None) or asyncio.Semaphore(1)
+        self.adaptive = getattr(bot, "adaptive", None)
+
+        # classes de prioridade (live > reply > edit > bulk) com envelhecimento;
+        # dentro de cada classe, fila justa por guild (DRR) com peso pelo char_limit
+        aging = float(os.getenv("EV_PRIORITY_AGING_SEC", "2.0"))
+        self._guild_limits: dict[int, int] = {}
+        self._fair_weights = os.getenv("EV_FAIR_WEIGHTS", "true").lower() == "true"
+        self._fair_ref_chars = float(os.getenv("EV_FAIR_REF_CHARS", "100000"))
+        self.scheduler = PriorityScheduler(
+            self._capacity, inner=self.sem, aging_sec=aging,
+            weight=self._guild_weight,
+            guild_max_inflight=int(os.getenv("EV_GUILD_MAX_INFLIGHT", "4")),
+        )
+
+        rate = float(os.getenv("EV_PROVIDER_RATE_CAP", "12"))
+        burst = float(os.getenv("EV_PROVIDER_BURST", "24"))
+        self.rate_limiter = TokenBucket(rate, burst, aging_sec=aging)
+        if self.adaptive is not None:
+            self.adaptive.bind_bucket(self.rate_limiter)
+
+        self.translate_timeout = float(os.getenv("EV_TRANSLATE_TIMEOUT", "8"))
+        self.jitter_ms = int(os.getenv("EV_JITTER_MS", "150"))
+        self.chunk_chars = int(os.getenv("EV_CHUNK_CHARS", "1200"))  # 0 = sem fatiar
+
+        self.backoff_cfg = BackoffCfg(
+            attempts=int(os.getenv("EV_RETRY_ATTEMPTS", "3")),
+            base=float(os.getenv("EV_RETRY_BASE", "0.3")),
+            factor=float(os.getenv("EV_RETRY_FACTOR", "2.0")),
+            max_delay=float(os.getenv("EV_RETRY_MAX", "2.0")),
+            jitter_ms=int(os.getenv("EV_RETRY_JITTER_MS", "150")),
+        )
+        # deadline por mensagem (conta desde a chegada) e orçamento global de retries
+        self.deadline_sec = float(os.getenv("EV_MSG_DEADLINE_SEC", "12"))
+        self.retry_budget = RetryBudget(ratio=float(os.getenv("EV_RETRY_BUDGET_RATIO", "0.1")))
+        self.cb = CircuitBreaker(
+            fail_threshold=int(os.getenv("EV_CB_THRESHOLD", "6")),
+            cooldown_sec=float(os.getenv("EV_CB_COOLDOWN", "30")),
+            half_open_probes=int(os.getenv("EV_CB_HALF_OPEN_PROBES", "2")),
+        )
+
+        # pool de variantes do endpoint (vazio = endpoint fixo de translate.py)
+        self.endpoints: Optional[EndpointPool] = None
+        variants = parse_endpoints(
+            os.getenv("EV_TRANSLATE_ENDPOINTS", ""),
+            default_rate=float(os.getenv("EV_ENDPOINT_RATE", "8")),
+            default_burst=float(os.getenv("EV_ENDPOINT_BURST", "16")),
+        )
+        if variants:
+            self.endpoints = EndpointPool(variants, cooldown_sec=float(os.getenv("EV_ENDPOINT_COOLDOWN", "30")))
+
+        # micro-lotes: junta mensagens do mesmo par (src,tgt) numa requisição (0 = desligado);
+        # cada requisição do lote passa pelo scheduler/rate limiter com a classe mais urgente
+        self.batcher: Optional[TranslateBatcher] = None
+        batch_window_ms = int(os.getenv("EV_BATCH_WINDOW_MS", "0"))
+        if batch_window_ms > 0:
+            self.batcher = TranslateBatcher(
+                batch_window_ms,
+                max_items=int(os.getenv("EV_BATCH_MAX_ITEMS", "16")),
+                rate_acquire=self.rate_limiter.acquire,
+                slot=self.scheduler.slot,
+                translate_one=self.endpoints.translate if self.endpoints else None,
+                translate_many=self.endpoints.translate_batch if self.endpoints else None,
+            )
+
+        # cache de traduções (LRU em memória + SQLite)
+        self.cache: Optional[TranslationCache] = None
+        if os.getenv("EV_CACHE", "true").lower() == "true":
+            self.cache = TranslationCache(
+                db_path,
+                max_items=int(os.getenv("EV_CACHE_MAX_ITEMS", "5000")),
+                ttl_sec=int(os.getenv("EV_CACHE_TTL_SEC", str(7 * 24 * 3600))),
+                max_rows=int(os.getenv("EV_CACHE_MAX_ROWS", "200000")),
+            )
+
+        # hedge: 2ª requisição quando a 1ª passa do p90 (só com folga no bucket)
+        self.hedger: Optional[Hedger] = None
+        if os.getenv("EV_HEDGE", "false").lower() == "true":
+            self.hedger = Hedger(
+                self.rate_limiter.try_acquire,
+                quantile=float(os.getenv("EV_HEDGE_QUANTILE", "0.9")),
+                max_ratio=float(os.getenv("EV_HEDGE_MAX_RATIO", "0.1")),
+            )
+
+        # coalescência de traduções idênticas em andamento (quote, Tupperbox, spam)
+        self.singleflight = SingleFlight()
+
+        # detecção local de idioma: pula mensagens que já estão no idioma de destino
+        self.langid: Optional[LanguageDetector] = None
+        if os.getenv("EV_LANGID", "true").lower() == "true":
+            self.langid = LanguageDetector(min_conf=float(os.getenv("EV_LANGID_MIN_CONF", "0.7")))
+
+    def _capacity(self) -> int:
+        if self.adaptive is not None:
+            return int(self.adaptive.limit)
+        return CONCURRENCY
+
+    def note_char_limit(self, guild_id: int, char_limit: int) -> None:
+        """Guarda o char_limit (snapshot do Supabase) para pesar a fila justa."""
+        self._guild_limits[int(guild_id)] = int(char_limit or 0)
+
+    def _guild_weight(self, guild_id: int) -> float:
+        if not self._fair_weights:
+            return 1.0
+        limit = self._guild_limits.get(guild_id, 0)
+        if limit <= 0:
+            return 1.0  # desconhecido ou ilimitado
+        return min(4.0, max(0.25, limit / self._fair_ref_chars))
+
+    def breaker_tripped(self) -> bool:
+        """True se o circuit breaker não está fechado (provedor fora ou em teste)."""
+        return self.cb.state != CircuitBreaker.CLOSED
+
+    def already_in(self, text: str, lang: str) -> bool:
+        """True se o texto já está no idioma `lang` (detecção local, sem rede)."""
+        return self.langid is not None and self.langid.is_language(text, lang)
+
+    async def translate(
+        self, text: str, src_lang: str, tgt_lang: str, started_at: Optional[float] = None,
+        priority: Priority = Priority.LIVE, guild_id: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        Traduz passando por cache → single-flight → CB → rate → semáforo → provedor.
+        `started_at` (time.monotonic() na chegada da mensagem) ancora o deadline;
+        sem ele, o deadline conta a partir de agora.
+        `priority` define a classe na fila do rate limiter e do scheduler;
+        `guild_id` define a fila justa (DRR) dentro da classe.
+        """
+        if self.session is None:
+            log.warning("gateway: http_session ainda não injetada")
+            return None
+        gloss = getattr(self.bot, "gloss", None)
+        translate_fn = None
+        if self.batcher is not None:
+            translate_fn = functools.partial(self.batcher.translate, priority=priority, guild_id=guild_id)
+        return await translate_with_controls(
+            self.session, text, src_lang, tgt_lang,
+            self.scheduler.slot(priority, guild_id),
+            self.translate_timeout, self.jitter_ms,
+            self.backoff_cfg, self.cb, self.rate_limiter.acquire,
+            translate_fn=translate_fn,
+            cache=self.cache, cache_ver=getattr(gloss, "versao", ""),
+            singleflight=self.singleflight, chunk_chars=self.chunk_chars,
+            adaptive=self.adaptive,
+            deadline=self._deadline(started_at), retry_budget=self.retry_budget,
+            hedger=self.hedger,
+            provider_fn=self.endpoints.translate if self.endpoints else None,
+            priority=priority,
+        )
+
+    async def translate_units(self, texts: list[str], src_lang: str, tgt_lang: str, **kw) -> Optional[list[str]]:
+        """
+        Traduz vários trechos (ex.: frases de uma mensagem) numa requisição só,
+        com os marcadores do lote; se o provedor estragar os marcadores, traduz
+        cada trecho separado. Mesmos kwargs de translate(). None em falha.
+        """
+        if not texts:
+            return []
+        if len(texts) == 1:
+            one = await self.translate(texts[0], src_lang, tgt_lang, **kw)
+            return None if one is None else [one]
+        packed = await self.translate(pack_batch(texts), src_lang, tgt_lang, **kw)
+        if packed is None:
+            return None
+        parts = unpack_batch(packed, len(texts))
+        if parts is not None:
+            return parts
+        log.info("gateway: marcadores corrompidos em %d trechos; traduzindo um a um", len(texts))
+        singles = await asyncio.gather(*(self.translate(t, src_lang, tgt_lang, **kw) for t in texts))
+        return None if any(x is None for x in singles) else list(singles)
+
+    def _deadline(self, started_at: Optional[float]) -> Optional[float]:
+        if self.deadline_sec <= 0:
+            return None
+        return (started_at if started_at is not None else time.monotonic()) + self.deadline_sec
+
+    def provider_urls(self) -> list[str]:
+        """URLs do provedor em uso (variantes do pool ou o endpoint padrão), p/ prewarm."""
+        if self.endpoints is not None:
+            return [v.base_url for v in self.endpoints.variants]
+        return [_GT_BASE]
+
+    def snapshot(self) -> dict:
+        """Métricas agregadas para diagnóstico."""
+        out: dict = {
+            "singleflight": dict(self.singleflight.stats),
+            "rate_limiter": self.rate_limiter.snapshot(),
+            "scheduler": self.scheduler.snapshot(),
+            "circuit_breaker": self.cb.snapshot(),
+            "retry_budget": self.retry_budget.snapshot(),
+        }
+        if self.cache is not None:
+            out["cache"] = dict(self.cache.stats)
+        if self.batcher is not None:
+            out["batch"] = dict(self.batcher.stats)
+        if self.langid is not None:
+            out["langid"] = self.langid.snapshot()
+        if self.endpoints is not None:
+            out["endpoints"] = self.endpoints.snapshot()
+        if self.hedger is not None:
+            out["hedge"] = self.hedger.snapshot()
+        if self.adaptive is not None:
+            out["adaptive"] = self.adaptive.snapshot()
+        pools = getattr(self.bot, "http_pools", None)
+        if pools is not None:
+            out["http"] = pools.snapshot()
+        pipeline = getattr(self.bot, "pipeline", None)
+        if pipeline is not None:
+            out["pipeline"] = pipeline.snapshot()
+        own_webhooks = getattr(self.bot, "own_webhooks", None)
+        if own_webhooks is not None:
+            out["own_webhooks"] = own_webhooks.snapshot()
+        links = getattr(self.bot, "links", None)
+        if links is not None:
+            out["links"] = links.snapshot()
+        bot_members = getattr(self.bot, "bot_members", None)
+        if bot_members is not None:
+            out["bot_members"] = bot_members.snapshot()
+        proxy = getattr(self.bot, "proxy", None)
+        if proxy is not None:
+            out["proxy"] = proxy.snapshot()
+        reorder = getattr(self.bot, "reorder", None)
+        if reorder is not None:
+            out["reorder"] = reorder.snapshot()
+        quota_ledger = getattr(self.bot, "quota_ledger", None)
+        if quota_ledger is not None:
+            out["quota"] = quota_ledger.snapshot()
+        return out
@@ -0,0 +1,139 @@
+# evtranslator/relay/hedge.py
+from __future__ import annotations
+import asyncio, time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Janela deslizante das últimas N latências (segundos) com percentis."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=max(10, window))
+        self._sorted: Optional[list[float]] = None
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._sorted = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        idx = min(len(self._sorted) - 1, int(q * len(self._sorted)))
+        return self._sorted[idx]
+
+
+class Hedger:
+    """
+    Requisições "hedged": se a 1ª não respondeu até o p90 observado, dispara
+    uma 2ª idêntica; a primeira resposta ganha e a outra é cancelada.
+
+    Só faz hedge se:
+      - já há amostras suficientes para estimar o percentil;
+      - hedges ficam abaixo de `max_ratio` do total de requisições;
+      - há vaga livre agora no slot de concorrência (`slot.try_enter()`),
+        então o hedge ocupa a própria vaga e não passa do CONCURRENCY/AIMD;
+      - o bucket do provedor tem token sobrando agora (`try_token()`),
+        ou seja, o hedge nunca espera na fila nem fura o rate cap.
+    Perdedores cancelados também entram na latência (tempo até o cancelamento),
+    senão o p90 fica viciado para baixo.
+    """
+
+    def __init__(
+        self,
+        try_token: Callable[[], bool],
+        quantile: float = 0.9,
+        max_ratio: float = 0.1,
+        min_delay: float = 0.2,
+        min_samples: int = 20,
+    ):
+        self.try_token = try_token
+        self.quantile = quantile
+        self.max_ratio = max_ratio
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.latency = LatencyTracker()
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "denied_ratio": 0, "denied_slot": 0, "denied_rate": 0}
+
+    def threshold(self) -> Optional[float]:
+        if len(self.latency) < self.min_samples:
+            return None
+        p = self.latency.percentile(self.quantile)
+        return max(self.min_delay, p) if p is not None else None
+
+    async def _allow(self, slot) -> bool:
+        """Se True, a vaga do hedge em `slot` já foi tomada (devolver com release())."""
+        if self.stats["hedged"] + 1 > self.max_ratio * self.stats["requests"]:
+            self.stats["denied_ratio"] += 1
+            return False
+        try_enter = getattr(slot, "try_enter", None)
+        if try_enter is None or not await try_enter():
+            self.stats["denied_slot"] += 1
+            return False
+        if not self.try_token():
+            self.stats["denied_rate"] += 1
+            slot.release()
+            return False
+        return True
+
+    async def _timed(self, factory: Callable[[], Awaitable[T]]) -> T:
+        t0 = time.monotonic()
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            self.latency.observe(time.monotonic() - t0)  # limite inferior da latência real
+            raise
+        self.latency.observe(time.monotonic() - t0)
+        return result
+
+    async def run(self, factory: Callable[[], Awaitable[T]], slot=None) -> T:
+        """
+        Executa factory() com hedge. Cancelar run() cancela as duas requisições.
+        `slot` é a porta de concorrência da original (ex.: PriorityScheduler.slot);
+        o hedge só sai se conseguir uma vaga própria nela sem esperar.
+        """
+        self.stats["requests"] += 1
+        primary = asyncio.ensure_future(self._timed(factory))
+        hedge: Optional[asyncio.Future] = None
+        try:
+            delay = self.threshold()
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done and await self._allow(slot):
+                    self.stats["hedged"] += 1
+                    hedge = asyncio.ensure_future(self._timed(factory))
+                    # done-callback: devolve a vaga mesmo se o hedge for cancelado antes de rodar
+                    hedge.add_done_callback(lambda _t: slot.release())
+            if hedge is None:
+                return await primary
+
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if not t.cancelled() and t.exception() is None:
+                        if t is hedge:
+                            self.stats["hedge_wins"] += 1
+                        return t.result()
+            # as duas falharam: propaga o erro da original
+            return primary.result()
+        finally:
+            for t in (primary, hedge):
+                if t is not None and not t.done():
+                    t.cancel()
+
+    def snapshot(self) -> dict:
+        n = self.stats["requests"] or 1
+        pct = {
+            f"p{int(q * 100)}": round(v, 3)
+            for q in (0.5, 0.9, 0.99)
+            if (v := self.latency.percentile(q)) is not None
+        }
+        return {**self.stats, "hedge_rate": round(self.stats["hedged"] / n, 3), "latency": pct}
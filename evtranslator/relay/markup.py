@@ -0,0 +1,74 @@
+# evtranslator/relay/markup.py
+from __future__ import annotations
+import re
+
+# Trechos de markup do Discord que não são linguagem natural: não vão ao
+# provedor (que costuma estragá-los) nem contam na cota. Mesmo esquema do
+# Glossario.proteger: placeholder no lugar, restaura depois da tradução.
+_MARKUP_RE = re.compile(
+    r"```[\s\S]*?```"                       # bloco de código
+    r"|`[^`\n]+`"                           # código inline
+    r"|<a?:\w{2,32}:\d{15,25}>"             # emoji custom <:nome:id> / <a:nome:id>
+    r"|<t:-?\d+(?::[tTdDfFR])?>"            # timestamp <t:1700000000:R>
+    r"|<(?:@[!&]?|#)\d{15,25}>"             # menção de usuário/cargo/canal
+    r"|</[\w -]{1,32}:\d{15,25}>"           # menção de slash command
+    r"|@(?:everyone|here)\b"
+    r"|\|\|"                                # marcador de spoiler
+)
+
+_PH = "__EVM{}__"
+# o provedor às vezes mexe em caixa/espaços do placeholder
+_PH_RE = re.compile(r"__\s*EVM\s*(\d+)\s*__", re.IGNORECASE)
+
+
+def protect_markup(text: str) -> tuple[str, list[str]]:
+    """
+    Substitui markup por placeholders (__EVM0__, __EVM1__...).
+    Retorna (texto_marcado, spans) — spans[i] é o trecho original do placeholder i.
+    """
+    if not text:
+        return text, []
+    spans: list[str] = []
+    spoiler_open = False
+
+    def repl(m: re.Match) -> str:
+        nonlocal spoiler_open
+        spans.append(m.group(0))
+        ph = _PH.format(len(spans) - 1)
+        if m.group(0) == "||":
+            # separa o placeholder do texto do spoiler, senão o provedor não traduz a palavra colada
+            spoiler_open = not spoiler_open
+            return ph + " " if spoiler_open else " " + ph
+        return ph
+
+    return _MARKUP_RE.sub(repl, text), spans
+
+
+def restore_markup(text: str, spans: list[str]) -> str:
+    """Devolve os trechos originais; placeholders perdidos pelo provedor vão ao fim."""
+    if not spans:
+        return text
+    used: set[int] = set()
+
+    def repl(m: re.Match) -> str:
+        i = int(m.group(1))
+        if i >= len(spans):
+            return m.group(0)
+        used.add(i)
+        return spans[i]
+
+    out = _PH_RE.sub(repl, text or "")
+    missing = [spans[i] for i in range(len(spans)) if i not in used]
+    if missing:
+        out = (out.rstrip() + " " + " ".join(missing)).strip()
+    return out
+
+
+def natural_text(marked: str) -> str:
+    """Só a parte em linguagem natural (sem placeholders de markup, espaços colapsados)."""
+    return " ".join(_PH_RE.sub(" ", marked or "").split())
+
+
+def billable_len(marked: str) -> int:
+    """Caracteres cobrados na cota: só a parte em linguagem natural."""
+    return len(natural_text(marked))
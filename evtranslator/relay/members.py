@@ -0,0 +1,114 @@
+# evtranslator/relay/members.py
+from __future__ import annotations
+import asyncio, logging, time
+from typing import Callable
+
+import discord
+
+from evtranslator.relay.ratelimit import WaitHistogram
+
+log = logging.getLogger(__name__)
+
+# predicado(member_id, nome em minúsculas) → True se é o bot procurado
+BotMatch = Callable[[int, str], bool]
+
+
+class BotMemberIndex:
+    """
+    Bots de cada guild em memória: guild → {member_id: nome em minúsculas}.
+
+    - on_member_join / on_member_remove / on_member_update mantêm em dia;
+    - o chunk inicial (on_ready) carrega do cache de membros, sem I/O;
+    - guild ainda não indexada é varrida uma vez (cache → chunk → fetch_members)
+      sob um lock só dela: as outras guilds continuam consultando sem esperar;
+    - consulta de guild pronta é síncrona e olha só os bots (poucos por guild).
+    """
+
+    def __init__(self) -> None:
+        self._bots: dict[int, dict[int, str]] = {}
+        self._ready: set[int] = set()
+        self._locks: dict[int, asyncio.Lock] = {}
+        self.scan = WaitHistogram()  # duração das varreduras iniciais
+        self.stats = {"scans": 0, "scan_fetches": 0, "scan_errors": 0, "joins": 0, "removes": 0, "updates": 0}
+
+    # ---------------- eventos ----------------
+
+    def on_join(self, member: discord.Member) -> None:
+        if member.bot:
+            self.stats["joins"] += 1
+            self._bots.setdefault(member.guild.id, {})[member.id] = (member.name or "").strip().lower()
+
+    def on_remove(self, guild_id: int, member_id: int) -> None:
+        bots = self._bots.get(guild_id)
+        if bots is not None and bots.pop(member_id, None) is not None:
+            self.stats["removes"] += 1
+
+    def on_update(self, member: discord.Member) -> None:
+        if member.bot:
+            self.stats["updates"] += 1
+            self._bots.setdefault(member.guild.id, {})[member.id] = (member.name or "").strip().lower()
+
+    def forget(self, guild_id: int) -> None:
+        """Saiu da guild: a próxima entrada refaz a varredura."""
+        self._bots.pop(guild_id, None)
+        self._ready.discard(guild_id)
+        self._locks.pop(guild_id, None)
+
+    def load_from_cache(self, guild: discord.Guild) -> bool:
+        """Indexa a partir de guild.members se o cache está completo (chunked). Sem I/O."""
+        if not getattr(guild, "chunked", False):
+            return False
+        self._bots[guild.id] = {m.id: (m.name or "").strip().lower() for m in guild.members if m.bot}
+        self._ready.add(guild.id)
+        return True
+
+    # ---------------- consulta ----------------
+
+    def find(self, guild_id: int, match: BotMatch) -> bool | None:
+        """True/False para guild indexada; None se ainda falta a varredura inicial."""
+        if guild_id not in self._ready:
+            return None
+        return any(match(mid, name) for mid, name in self._bots.get(guild_id, {}).items())
+
+    async def has_bot(self, guild: discord.Guild, match: BotMatch) -> bool:
+        found = self.find(guild.id, match)
+        if found is not None:
+            return found
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            if guild.id not in self._ready:  # outra mensagem da mesma guild pode ter varrido
+                await self._scan(guild)
+        return bool(self.find(guild.id, match))
+
+    async def _scan(self, guild: discord.Guild) -> None:
+        t0 = time.monotonic()
+        self.stats["scans"] += 1
+        try:
+            if not self.load_from_cache(guild):
+                try:
+                    await guild.chunk()
+                except Exception:
+                    pass
+                if not self.load_from_cache(guild):
+                    self.stats["scan_fetches"] += 1
+                    bots = self._bots.setdefault(guild.id, {})
+                    async for m in guild.fetch_members(limit=None):
+                        if m.bot:
+                            bots[m.id] = (m.name or "").strip().lower()
+                    self._ready.add(guild.id)
+        except Exception as e:
+            # marca como pronta com o que deu para ver (como o antigo cache False); eventos completam
+            self.stats["scan_errors"] += 1
+            log.warning("[members] varredura da guild %s falhou: %s", guild.id, e)
+            self._bots.setdefault(guild.id, {})
+            self._ready.add(guild.id)
+        finally:
+            self.scan.observe(time.monotonic() - t0)
+
+    def snapshot(self) -> dict:
+        return {
+            "guilds": len(self._ready),
+            "bots": sum(len(b) for b in self._bots.values()),
+            **self.stats,
+            "scan": self.scan.snapshot(),
+        }
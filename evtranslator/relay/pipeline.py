@@ -0,0 +1,188 @@
+# evtranslator/relay/pipeline.py
+from __future__ import annotations
+import asyncio, logging, time
+from typing import Any, Awaitable, Callable, Optional
+
+from evtranslator.relay.ratelimit import WaitHistogram
+
+log = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"      # fila cheia: descarta o item mais antigo e aceita o novo
+REJECT_NEWEST = "reject_newest"  # fila cheia: recusa o item novo
+BLOCK = "block"                  # fila cheia: a etapa anterior espera vaga (nunca descarta)
+POLICIES = (DROP_OLDEST, REJECT_NEWEST, BLOCK)
+
+# handler(item) → item da próxima etapa, ou None para encerrar ali
+Handler = Callable[[Any], Awaitable[Any]]
+
+
+class Stage:
+    """Uma etapa: fila limitada + N workers rodando o mesmo handler."""
+
+    def __init__(self, name: str, handler: Handler, workers: int = 1, maxsize: int = 100,
+                 policy: str = DROP_OLDEST):
+        if policy not in POLICIES:
+            raise ValueError(f"policy inválida: {policy!r} (use {', '.join(POLICIES)})")
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.queue: asyncio.Queue[tuple[float, Any]] = asyncio.Queue(self.maxsize)
+        self.busy = 0
+        self.max_depth = 0
+        self.wait = WaitHistogram()      # tempo na fila
+        self.service = WaitHistogram()   # tempo no handler
+        self.stats = {"enqueued": 0, "processed": 0, "dropped_oldest": 0, "rejected": 0, "errors": 0}
+
+    def snapshot(self) -> dict:
+        return {
+            "depth": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "maxsize": self.maxsize,
+            "workers": self.workers,
+            "busy": self.busy,
+            "policy": self.policy,
+            **self.stats,
+            "wait": self.wait.snapshot(),
+            "service": self.service.snapshot(),
+        }
+
+
+class Pipeline:
+    """
+    Etapas encadeadas com filas limitadas (ex.: ingest → filter → translate → deliver).
+
+    - submit() é síncrono e nunca bloqueia: o produtor (on_message) só enfileira;
+    - cada etapa tem seus workers; a saída de uma é oferecida à fila da próxima;
+    - fila cheia aplica a política da etapa (drop_oldest / reject_newest) e o
+      item descartado vai para `on_drop(item, stage, reason)`; etapa `block`
+      nunca descarta: os workers da etapa anterior esperam vaga (backpressure),
+      para etapas depois de trabalho já pago (provedor/cota);
+    - item encerrado por um handler antes da última etapa (retornou None) vai
+      para `on_end(item, stage)`;
+    - memória e concorrência ficam limitadas a sum(maxsize) + sum(workers).
+    """
+
+    def __init__(self, stages: list[Stage],
+                 on_drop: Optional[Callable[[Any, str, str], None]] = None,
+                 on_end: Optional[Callable[[Any, str], None]] = None):
+        if not stages:
+            raise ValueError("Pipeline precisa de pelo menos uma etapa")
+        if stages[0].policy == BLOCK:
+            raise ValueError("a 1ª etapa não pode ser 'block': submit() nunca espera")
+        self.stages = stages
+        self.on_drop = on_drop
+        self.on_end = on_end
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        for i, st in enumerate(self.stages):
+            nxt = self.stages[i + 1] if i + 1 < len(self.stages) else None
+            for n in range(st.workers):
+                self._tasks.append(asyncio.create_task(self._worker(st, nxt), name=f"pipeline:{st.name}:{n}"))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def submit(self, item: Any) -> bool:
+        """Enfileira na 1ª etapa. False = recusado (reject_newest com fila cheia)."""
+        if not self._tasks:
+            self.start()
+        return self._offer(self.stages[0], item)
+
+    def _drop(self, item: Any, stage: Stage, reason: str) -> None:
+        if self.on_drop is not None:
+            try:
+                self.on_drop(item, stage.name, reason)
+            except Exception as e:
+                log.warning("pipeline: on_drop falhou (%s): %s", stage.name, e)
+
+    def _end(self, item: Any, stage: Stage) -> None:
+        if self.on_end is not None:
+            try:
+                self.on_end(item, stage.name)
+            except Exception as e:
+                log.warning("pipeline: on_end falhou (%s): %s", stage.name, e)
+
+    def _offer(self, st: Stage, item: Any) -> bool:
+        if st.queue.full():
+            if st.policy == REJECT_NEWEST:
+                st.stats["rejected"] += 1
+                self._drop(item, st, "rejected")
+                return False
+            _ts, old = st.queue.get_nowait()
+            st.stats["dropped_oldest"] += 1
+            self._drop(old, st, "dropped_oldest")
+        st.queue.put_nowait((time.monotonic(), item))
+        st.stats["enqueued"] += 1
+        st.max_depth = max(st.max_depth, st.queue.qsize())
+        return True
+
+    async def _put(self, st: Stage, item: Any) -> None:
+        """Enfileira esperando vaga (política block)."""
+        try:
+            await st.queue.put((time.monotonic(), item))
+        except asyncio.CancelledError:
+            self._drop(item, st, "cancelled")
+            raise
+        st.stats["enqueued"] += 1
+        st.max_depth = max(st.max_depth, st.queue.qsize())
+
+    async def _worker(self, st: Stage, nxt: Optional[Stage]) -> None:
+        while True:
+            ts, item = await st.queue.get()
+            t0 = time.monotonic()
+            st.wait.observe(t0 - ts)
+            st.busy += 1
+            failed = False
+            try:
+                out = await st.handler(item)
+            except asyncio.CancelledError:
+                self._drop(item, st, "cancelled")
+                raise
+            except Exception:
+                st.stats["errors"] += 1
+                log.exception("pipeline: erro na etapa %s", st.name)
+                self._drop(item, st, "error")
+                failed = True
+            finally:
+                st.busy -= 1
+                st.service.observe(time.monotonic() - t0)
+            if failed:
+                continue
+            st.stats["processed"] += 1
+            if nxt is None:
+                continue
+            if out is None:
+                self._end(item, st)
+            elif nxt.policy == BLOCK:
+                await self._put(nxt, out)
+            else:
+                self._offer(nxt, out)
+
+    async def run_inline(self, item: Any) -> None:
+        """Sem workers/filas: passa o item pelas etapas na hora (modo EV_PIPELINE=false)."""
+        for i, st in enumerate(self.stages):
+            try:
+                out = await st.handler(item)
+            except BaseException:
+                self._drop(item, st, "error")
+                raise
+            if out is None:
+                if i + 1 < len(self.stages):
+                    self._end(item, st)
+                return
+            item = out
+
+    def snapshot(self) -> dict:
+        return {st.name: st.snapshot() for st in self.stages}
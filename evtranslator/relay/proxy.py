@@ -0,0 +1,210 @@
+# evtranslator/relay/proxy.py
+from __future__ import annotations
+import asyncio, logging, time
+from collections import OrderedDict
+from typing import Iterable
+
+import discord
+
+from evtranslator.relay.ratelimit import WaitHistogram
+from evtranslator.webhook_index import OwnWebhookIndex
+
+log = logging.getLogger(__name__)
+
+# Tupperbox, PluralKit
+DEFAULT_PROXY_BOT_IDS = (431544605209788416, 466378653216014359)
+
+
+# tamanho máximo da tag de proxy ("k:", "[...]", "-k") que sobra entre original e re-post
+_TAG_MAX = 32
+
+
+def _norm(text: str) -> str:
+    return " ".join((text or "").split()).casefold()
+
+
+def _tag_ok(tag: str) -> bool:
+    """Vazio (autoproxy) ou curto e com símbolo: "k:", "[]", "-k". Palavra solta não é tag."""
+    tag = tag.strip()
+    if not tag:
+        return True
+    return len(tag) <= _TAG_MAX and any(not c.isalnum() and not c.isspace() for c in tag)
+
+
+def _proxy_tag_match(orig: str, proxied: str) -> bool:
+    """`orig` == tag + proxied, proxied + tag ou abre + proxied + fecha (tag de proxy tirada)."""
+    if not proxied:
+        return _tag_ok(orig)  # re-post só com anexo: o texto original era só a tag
+    if orig.startswith(proxied):
+        return _tag_ok(orig[len(proxied):])
+    if orig.endswith(proxied):
+        return _tag_ok(orig[: len(orig) - len(proxied)])
+    i = orig.find(proxied)
+    if i <= 0:
+        return False
+    pre, suf = orig[:i], orig[i + len(proxied):]
+    return _tag_ok(pre) and _tag_ok(suf)
+
+
+class _Pending:
+    __slots__ = ("guild_id", "channel_id", "norm", "has_atts", "t0", "fut", "bypassed")
+
+    def __init__(self, message: discord.Message, fut: asyncio.Future):
+        self.guild_id = message.guild.id
+        self.channel_id = message.channel.id
+        self.norm = _norm(message.content)
+        self.has_atts = bool(message.attachments)
+        self.t0 = time.monotonic()
+        self.fut = fut  # resultado True = foi proxied (apagada / re-postada por webhook)
+        self.bypassed = False  # já liberada sem espera (guild sem proxy); só serve para aprender
+
+
+class ProxyDetector:
+    """
+    Detecta mensagens "proxied" (Tupperbox/PluralKit) por eventos, sem sleep + fetch.
+
+    - track(message) roda no on_message: mensagem humana entra num mapa curto de
+      pendentes; mensagem de webhook alheio procura, entre as pendentes ainda em
+      espera no mesmo canal, a que é igual ao re-post mais uma tag de proxy
+      (prefixo/sufixo/colchetes curtos com símbolo). Só resolve se houver uma
+      única candidata; na dúvida fica para o delete;
+    - on_delete(message_id) (on_raw_message_delete) resolve a pendente apagada;
+    - guard(message) espera o que vier primeiro: evento ou `wait_sec`; no timeout
+      a pendente é encerrada (já traduzida, não casa mais com re-post);
+    - guilds onde nenhum proxy apareceu (bot de proxy conhecido no cache de membros
+      ou um re-post já casado) não esperam nada. A mensagem segue registrada, então
+      o primeiro re-post casado ensina a guild.
+    """
+
+    def __init__(self, own_webhooks: OwnWebhookIndex, wait_sec: float = 0.7, track_max: int = 2000,
+                 proxy_bot_ids: Iterable[int] = DEFAULT_PROXY_BOT_IDS):
+        self.own_webhooks = own_webhooks
+        self.wait_sec = wait_sec
+        self.track_sec = max(5.0, wait_sec * 4)
+        self.track_max = max(1, track_max)
+        self.proxy_bot_ids = tuple(proxy_bot_ids)
+        self._pending: OrderedDict[int, _Pending] = OrderedDict()  # message_id -> pendente
+        self._proxy_guilds: set[int] = set()
+        self.latency = WaitHistogram()  # tempo que o guard segurou a mensagem
+        self.stats = {
+            "bypassed": 0, "waited": 0, "proxied_webhook": 0, "proxied_delete": 0,
+            "timeouts": 0, "ambiguous": 0, "rest_saved": 0, "learned_guilds": 0,
+        }
+
+    # ---------------- eventos ----------------
+
+    def track(self, message: discord.Message) -> None:
+        if message.guild is None:
+            return
+        if message.webhook_id is not None:
+            if not self.own_webhooks.is_known_own(message.webhook_id):
+                self._on_proxy_post(message)
+            return
+        if message.author.bot or message.id in self._pending:
+            return
+        self._prune()
+        self._pending[message.id] = _Pending(message, asyncio.get_running_loop().create_future())
+
+    def on_delete(self, message_id: int) -> None:
+        p = self._pending.get(message_id)
+        if p is not None and not p.fut.done():
+            p.fut.set_result(True)
+            self.stats["proxied_delete"] += 1
+
+    def _on_proxy_post(self, message: discord.Message) -> None:
+        norm = _norm(message.content)
+        has_atts = bool(message.attachments)
+        if not norm and not has_atts:
+            return
+        now = time.monotonic()
+        waiting: list[_Pending] = []
+        learned: list[_Pending] = []
+        for p in reversed(self._pending.values()):
+            if now - p.t0 > self.track_sec:
+                break
+            if p.channel_id != message.channel.id:
+                continue
+            if not norm and not p.has_atts:
+                continue
+            if not _proxy_tag_match(p.norm, norm):
+                continue
+            if not p.fut.done():
+                waiting.append(p)
+            elif p.bypassed:
+                learned.append(p)
+        if len(waiting) == 1:
+            p = waiting[0]
+            p.fut.set_result(True)
+            self.stats["proxied_webhook"] += 1
+            self._learn(p.guild_id)
+        elif len(waiting) > 1:
+            self.stats["ambiguous"] += 1  # fica para o on_raw_message_delete
+        elif len(learned) == 1:
+            self._learn(learned[0].guild_id)  # já traduzida; só ativa o guard na guild
+
+    def _learn(self, guild_id: int) -> None:
+        if guild_id not in self._proxy_guilds:
+            self._proxy_guilds.add(guild_id)
+            self.stats["learned_guilds"] += 1
+            log.info("[proxy] guild=%s usa proxy (re-post casado); guard ativo", guild_id)
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.track_sec
+        while self._pending:
+            _mid, p = next(iter(self._pending.items()))
+            if p.t0 >= cutoff and len(self._pending) < self.track_max:
+                break
+            self._pending.popitem(last=False)
+
+    # ---------------- guard ----------------
+
+    def is_proxy_guild(self, guild: discord.Guild) -> bool:
+        if guild.id in self._proxy_guilds:
+            return True
+        if any(guild.get_member(bid) is not None for bid in self.proxy_bot_ids):
+            self._proxy_guilds.add(guild.id)
+            return True
+        return False
+
+    async def guard(self, message: discord.Message) -> bool:
+        """False se a msg foi proxied (apagada e re-postada por webhook)."""
+        if message.webhook_id is not None or message.author.bot:
+            return True
+        self.stats["rest_saved"] += 1  # o guard antigo fazia um fetch_message por mensagem humana
+        p = self._pending.get(message.id)
+        if p is None:  # não passou pelo track (ex.: podado); registra agora
+            self.track(message)
+            p = self._pending.get(message.id)
+        if p is None:
+            return True
+        if p.fut.done():
+            return not p.fut.result()
+        if not self.is_proxy_guild(message.guild):
+            self.stats["bypassed"] += 1
+            self.latency.observe(0.0)
+            p.bypassed = True
+            p.fut.set_result(False)  # encerrada: re-post depois só ensina a guild
+            return True
+        self.stats["waited"] += 1
+        t0 = time.monotonic()
+        left = p.t0 + self.wait_sec - t0
+        proxied = False
+        if left > 0:
+            try:
+                proxied = await asyncio.wait_for(asyncio.shield(p.fut), timeout=left)
+            except asyncio.TimeoutError:
+                pass
+        if not proxied:
+            self.stats["timeouts"] += 1
+            if not p.fut.done():
+                p.fut.set_result(False)  # vai ser traduzida: re-post atrasado não casa mais
+        self.latency.observe(time.monotonic() - t0)
+        return not proxied
+
+    def snapshot(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "proxy_guilds": len(self._proxy_guilds),
+            **self.stats,
+            "latency": self.latency.snapshot(),
+        }
@@ -114,3 +114,88 @@ async def maybe_warn_90pct(guild: discord.Guild, warned_guilds: set[int]):
             warned_guilds.remove(guild.id)
     except Exception as e:
         logging.exception("Falha ao verificar 90%% cota (guild=%s): %s", guild.id, e)
+
+
+class QuotaLedger:
+    """
+    Reserva local de cota entre a pré-checagem e o commit pós-envio.
+
+    - reserve(guild, n) roda no lugar do precheck_chars: soma o que a guild já
+      tem reservado (traduzindo/enviando) e pendente, então mensagens
+      simultâneas não passam juntas do cap;
+    - cancel(guild, n) devolve a reserva de mensagem que não foi enviada
+      (tradução falhou, pulada pelo reorder, envio falhou);
+    - settle(guild) antes do envio: se ficou cobrança pendente, tenta de novo;
+      falhou → não envia (como o commit antigo antes do envio);
+    - commit(guild, n) depois do envio ok; se o Supabase falhar, os chars ficam
+      em `unbilled` (contam no cap e são cobrados no próximo settle/commit).
+    """
+
+    def __init__(self) -> None:
+        self._reserved: dict[int, int] = {}
+        self._unbilled: dict[int, int] = {}
+        self.stats = {"reserved": 0, "denied": 0, "cancelled": 0, "committed": 0, "commit_failed": 0, "settled": 0}
+
+    def held(self, guild_id: int) -> int:
+        return self._reserved.get(guild_id, 0) + self._unbilled.get(guild_id, 0)
+
+    async def reserve(self, guild_id: int, n_chars: int) -> tuple[bool, int, int]:
+        """Pré-checa n_chars + o que já está preso na guild; ok → reserva. Retorna (ok, used, cap)."""
+        if n_chars <= 0:
+            return True, 0, 0
+        # reserva antes do await: quem pré-checa em paralelo já vê esta mensagem
+        self._reserved[guild_id] = self._reserved.get(guild_id, 0) + n_chars
+        ok, used, cap = await precheck_chars(guild_id, self.held(guild_id))
+        if not ok:
+            self._take(guild_id, n_chars)
+            self.stats["denied"] += 1
+            return False, used, cap
+        self.stats["reserved"] += 1
+        return True, used, cap
+
+    def cancel(self, guild_id: int, n_chars: int) -> None:
+        if n_chars <= 0:
+            return
+        self._take(guild_id, n_chars)
+        self.stats["cancelled"] += 1
+
+    def _take(self, guild_id: int, n_chars: int) -> None:
+        left = self._reserved.get(guild_id, 0) - n_chars
+        if left > 0:
+            self._reserved[guild_id] = left
+        else:
+            self._reserved.pop(guild_id, None)
+
+    async def settle(self, guild_id: int) -> bool:
+        """Cobra a pendência da guild (se houver). False = Supabase ainda recusando."""
+        pending = self._unbilled.pop(guild_id, 0)
+        if pending <= 0:
+            return True
+        if await commit_chars(guild_id, pending):
+            self.stats["settled"] += 1
+            return True
+        self._unbilled[guild_id] = self._unbilled.get(guild_id, 0) + pending
+        return False
+
+    async def commit(self, guild_id: int, n_chars: int) -> bool:
+        """Envio ok: troca a reserva por consumo no Supabase (junto com a pendência)."""
+        if n_chars <= 0:
+            return True
+        self._take(guild_id, n_chars)
+        total = n_chars + self._unbilled.pop(guild_id, 0)
+        if await commit_chars(guild_id, total):
+            self.stats["committed"] += 1
+            return True
+        self._unbilled[guild_id] = self._unbilled.get(guild_id, 0) + total
+        self.stats["commit_failed"] += 1
+        logging.warning("quota: commit falhou (guild=%s chars=%s); fica pendente e bloqueia novos envios",
+                    guild_id, total)
+        return False
+
+    def snapshot(self) -> dict:
+        return {
+            "reserved_chars": sum(self._reserved.values()),
+            "unbilled_chars": sum(self._unbilled.values()),
+            "unbilled_guilds": len(self._unbilled),
+            **self.stats,
+        }
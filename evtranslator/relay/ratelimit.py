@@ -1,20 +1,131 @@
 # evtranslator/relay/ratelimit.py
 from __future__ import annotations
-import asyncio, time
+import asyncio, heapq, itertools, time
+from bisect import bisect_left
+from typing import Optional
+
+
+class WaitHistogram:
+    """Histograma simples (cumulativo por faixa) de tempo de espera, em segundos."""
+
+    BOUNDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)  # última faixa = +inf
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.BOUNDS, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def snapshot(self) -> dict:
+        labels = [f"<={b}" for b in self.BOUNDS] + ["+inf"]
+        return {
+            "count": self.total,
+            "avg": round(self.sum / self.total, 4) if self.total else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
 
 class TokenBucket:
-    def __init__(self, rate_per_sec: float, capacity: float):
-        self.rate = float(rate_per_sec)
+    """
+    Token bucket com fila justa:
+      - waiters atendidos em ordem FIFO (ou por prioridade: menor valor primeiro;
+        com `aging_sec`, a prioridade vira um atraso de priority*aging_sec na
+        chave de chegada, então classes baixas envelhecem e não morrem de fome);
+      - UM timer acorda exatamente o próximo da fila quando sai um token
+        (sem polling, sem manada disputando o mesmo token);
+      - cancelamento não vaza token (se já tinha sido concedido, volta pro balde).
+    `await bucket.acquire()` continua servindo como o antigo `rate_acquire`.
+    """
+
+    def __init__(self, rate_per_sec: float, capacity: float, aging_sec: Optional[float] = None):
+        self.aging_sec = aging_sec
+        self._rate = float(rate_per_sec)
         self.capacity = float(capacity)
         self.tokens = float(capacity)
         self.last = time.perf_counter()
-    async def acquire(self):
-        while True:
-            now = time.perf_counter()
-            elapsed = now - self.last
-            self.last = now
-            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
-            if self.tokens >= 1.0:
-                self.tokens -= 1.0
-                return
-            await asyncio.sleep(max(0.0, (1.0 - self.tokens) / self.rate))
+        self._waiters: list[tuple[float, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.wait_hist = WaitHistogram()
+
+    # ---------- rate (pode ser ajustado em runtime, ex.: AIMD) ----------
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @rate.setter
+    def rate(self, value: float) -> None:
+        self._refill()
+        self._rate = float(value)
+        if self._waiters:
+            self._dispatch()
+
+    # ---------- núcleo ----------
+
+    def _refill(self) -> None:
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.last = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self._rate)
+
+    def try_acquire(self) -> bool:
+        """Pega um token sem esperar (só se ninguém estiver na fila)."""
+        self._refill()
+        if not self._waiters and self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    async def acquire(self, priority: int = 0):
+        if self.try_acquire():
+            self.wait_hist.observe(0.0)
+            return
+
+        t0 = time.perf_counter()
+        key = priority if self.aging_sec is None else t0 + priority * self.aging_sec
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (key, next(self._seq), fut))
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # token já concedido, mas o chamador desistiu → devolve
+                self.tokens = min(self.capacity, self.tokens + 1.0)
+            # se ainda estava na fila, o future cancelado é descartado no próximo _dispatch
+            self._dispatch()
+            raise
+        self.wait_hist.observe(time.perf_counter() - t0)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._refill()
+        while self._waiters:
+            _prio, _seq, fut = self._waiters[0]
+            if fut.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.tokens < 1.0:
+                break
+            heapq.heappop(self._waiters)
+            self.tokens -= 1.0
+            fut.set_result(None)
+        if self._waiters:
+            delay = (1.0 - self.tokens) / self._rate if self._rate > 0 else 1.0
+            self._timer = asyncio.get_running_loop().call_later(max(0.0, delay), self._dispatch)
+
+    def snapshot(self) -> dict:
+        self._refill()
+        return {
+            "rate": round(self._rate, 2),
+            "tokens": round(self.tokens, 2),
+            "waiting": sum(1 for _p, _s, f in self._waiters if not f.done()),
+            "wait": self.wait_hist.snapshot(),
+        }
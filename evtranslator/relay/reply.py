@@ -1,19 +1,16 @@
 # evtranslator/relay/reply.py
 from __future__ import annotations
-import os
-import asyncio
 from typing import Optional
 import discord
 
 from evtranslator.config import DB_PATH, MIN_MSG_LEN
-from evtranslator.db import get_translation_by_src, record_translation, get_link_info
+from evtranslator.db import get_translation_by_src, record_translation
 
-from evtranslator.relay.translate_wrap import translate_with_controls
 from evtranslator.relay.attachments import extract_urls
 from evtranslator.relay.filters import clamp_text
-from evtranslator.relay.ratelimit import TokenBucket
-from evtranslator.relay.backoff import BackoffCfg, CircuitBreaker
 from evtranslator.relay.quota import precheck_chars, commit_chars
+from evtranslator.relay.scheduler import Priority
+from evtranslator.relay.markup import protect_markup, restore_markup, billable_len
 
 from . import send
 
@@ -24,24 +21,6 @@ class ReplyService:
     def __init__(self, bot):
         self.bot = bot
 
-        # configs locais (espelham as do Cog) — lidas do env
-        self.translate_timeout = float(os.getenv("EV_TRANSLATE_TIMEOUT", "8"))
-        self.jitter_ms = int(os.getenv("EV_JITTER_MS", "150"))
-        self.backoff_cfg = BackoffCfg(
-            attempts=int(os.getenv("EV_RETRY_ATTEMPTS", "3")),
-            base=float(os.getenv("EV_RETRY_BASE", "0.3")),
-            factor=float(os.getenv("EV_RETRY_FACTOR", "2.0")),
-            max_delay=float(os.getenv("EV_RETRY_MAX", "2.0")),
-            jitter_ms=int(os.getenv("EV_RETRY_JITTER_MS", "150")),
-        )
-        self.cb = CircuitBreaker(
-            fail_threshold=int(os.getenv("EV_CB_THRESHOLD", "6")),
-            cooldown_sec=float(os.getenv("EV_CB_COOLDOWN", "30")),
-        )
-        rate = float(os.getenv("EV_PROVIDER_RATE_CAP", "12"))
-        burst = float(os.getenv("EV_PROVIDER_BURST", "24"))
-        self.rate_limiter = TokenBucket(rate, burst)
-
     async def resolve_reference(
         self,
         src_msg: discord.Message,
@@ -57,7 +36,7 @@ class ReplyService:
             return None, target_ch
 
         # 0) Obter idiomas pela ligação (mesmo canal/origem)
-        link = await get_link_info(DB_PATH, src_msg.guild.id, src_msg.channel.id)
+        link = await self.bot.links.resolve(DB_PATH, src_msg.guild.id, src_msg.channel.id)
         if not link:
             return None, target_ch
         _target_id, src_lang, tgt_lang = link  # target_id não precisa aqui; usamos target_ch recebido
@@ -87,24 +66,25 @@ class ReplyService:
         text_no_urls, urls_in_text = extract_urls(text)
         text_no_urls = clamp_text(text_no_urls)
 
+        # markup do Discord (menções, código, emoji...) não vai ao provedor nem à cota
+        md_marked, md_spans = protect_markup(text_no_urls)
+        n_chars = billable_len(md_marked)
+
         # 3.1) Checar cota quando houver texto a traduzir
-        should_translate = len(text_no_urls) >= MIN_MSG_LEN
+        should_translate = n_chars >= MIN_MSG_LEN
         if should_translate:
-            ok, used, cap = await precheck_chars(src_msg.guild.id, len(text_no_urls))
+            ok, used, cap = await precheck_chars(src_msg.guild.id, n_chars)
+            self.bot.gateway.note_char_limit(src_msg.guild.id, cap)
             if not ok:
                 # Sem cota → não cria pré-tradução da referência; segue sem reply encadeado
                 return None, target_ch
 
-            translated_core = await translate_with_controls(
-                self.bot.http_session,
-                text_no_urls,
-                src_lang, tgt_lang,
-                getattr(self.bot, "sem", asyncio.Semaphore(1)),
-                self.translate_timeout, self.jitter_ms,
-                self.backoff_cfg, self.cb, self.rate_limiter.acquire,
+            translated_core = await self.bot.gateway.translate(
+                md_marked, src_lang, tgt_lang, priority=Priority.REPLY, guild_id=src_msg.guild.id
             )
             if translated_core is None:
                 return None, target_ch
+            translated_core = restore_markup(translated_core, md_spans)
         else:
             translated_core = text_no_urls  # curto ou vazio
 
@@ -118,7 +98,7 @@ class ReplyService:
 
         # 3.3) Commit de cota (se traduziu)
         if should_translate:
-            committed = await commit_chars(src_msg.guild.id, len(text_no_urls))
+            committed = await commit_chars(src_msg.guild.id, n_chars)
             if not committed:
                 return None, target_ch
 
@@ -0,0 +1,312 @@
+# evtranslator/relay/scheduler.py
+from __future__ import annotations
+import asyncio, time
+from collections import deque
+from enum import IntEnum
+from typing import Callable, Optional
+
+from evtranslator.relay.ratelimit import WaitHistogram
+
+
+class Priority(IntEnum):
+    """Classes de trabalho de tradução (menor = mais urgente)."""
+    LIVE = 0    # mensagem nova no on_message
+    REPLY = 1   # pré-tradução da mensagem referenciada (ReplyService)
+    EDIT = 2    # re-tradução de edição
+    BULK = 3    # /clonar e afins
+
+
+class _Waiter:
+    __slots__ = ("fut", "guild", "arrival", "priority")
+
+    def __init__(self, fut: asyncio.Future, guild: int, arrival: float, priority: Priority):
+        self.fut = fut
+        self.guild = guild
+        self.arrival = arrival
+        self.priority = priority
+
+
+class _ClassQueue:
+    """Filas por guild de UMA classe, atendidas por deficit round-robin (DRR)."""
+
+    def __init__(self):
+        self.queues: dict[int, deque[_Waiter]] = {}
+        self.ring: deque[int] = deque()       # guilds com fila, na ordem do round-robin
+        self.deficit: dict[int, float] = {}
+
+    def push(self, w: _Waiter) -> None:
+        q = self.queues.get(w.guild)
+        if q is None:
+            q = self.queues[w.guild] = deque()
+            self.ring.append(w.guild)
+            self.deficit[w.guild] = 0.0
+        q.append(w)
+
+    def _drop(self, guild: int) -> None:
+        self.ring.remove(guild)
+        del self.queues[guild]
+        del self.deficit[guild]
+
+    def _head(self, guild: int) -> Optional[_Waiter]:
+        q = self.queues[guild]
+        while q and q[0].fut.done():  # cancelados ficam para trás
+            q.popleft()
+        return q[0] if q else None
+
+    def oldest(self) -> Optional[float]:
+        best = None
+        for g in list(self.ring):
+            w = self._head(g)
+            if w is None:
+                self._drop(g)
+            elif best is None or w.arrival < best:
+                best = w.arrival
+        return best
+
+    def next(self, eligible: Callable[[int], bool], weight: Callable[[int], float]) -> Optional[_Waiter]:
+        """
+        Próximo waiter pelo DRR. Cada guild ganha `weight(g)` de crédito por
+        rodada e cada requisição custa 1; guilds no teto de in-flight são puladas.
+        """
+        skipped = 0
+        while self.ring:
+            g = self.ring[0]
+            if self._head(g) is None:
+                self._drop(g)
+                continue
+            if not eligible(g):
+                skipped += 1
+                if skipped >= len(self.ring):
+                    return None
+                self.ring.rotate(-1)
+                continue
+            if self.deficit[g] >= 1.0:
+                self.deficit[g] -= 1.0
+                w = self.queues[g].popleft()
+                if not self.queues[g]:
+                    self._drop(g)  # fila vazia perde o crédito (DRR clássico)
+                return w
+            self.deficit[g] += max(0.1, weight(g))
+            skipped = 0
+            self.ring.rotate(-1)
+        return None
+
+
+class PriorityScheduler:
+    """
+    Porta de concorrência com classes de prioridade na frente do provedor.
+
+    Entre classes: chave = chegada do waiter mais antigo + classe * aging_sec.
+    Ou seja, LIVE passa na frente, mas um BULK que já esperou 3*aging_sec
+    empata com um LIVE recém-chegado → as classes baixas não morrem de fome.
+
+    Dentro de cada classe: deficit round-robin por guild_id, com peso opcional
+    (`weight(guild_id)`) e teto de in-flight por guild. O teto só vale com
+    disputa (outra guild esperando vaga): sozinha, uma guild usa a capacidade
+    toda. Uma guild barulhenta só atrasa a si mesma.
+
+    `capacity()` define quantos podem estar dentro ao mesmo tempo (segue o
+    limite do AIMD quando ligado). Dentro da vaga, o semáforo `inner` do bot
+    ainda é respeitado. Com micro-lotes ligados, cada requisição do batcher
+    também entra por aqui (uma vaga por lote).
+    """
+
+    def __init__(
+        self,
+        capacity: Callable[[], int],
+        inner=None,
+        aging_sec: float = 2.0,
+        weight: Optional[Callable[[int], float]] = None,
+        guild_max_inflight: int = 0,
+        max_tracked_guilds: int = 1000,
+    ):
+        self.capacity = capacity
+        self.inner = inner
+        self.aging_sec = aging_sec
+        self.weight = weight or (lambda _g: 1.0)
+        self.guild_max_inflight = guild_max_inflight
+        self.max_tracked_guilds = max_tracked_guilds
+        self.in_flight = 0
+        self._queued = 0
+        self._classes = {p: _ClassQueue() for p in Priority}
+        self._guild_inflight: dict[int, int] = {}
+        self._guild_queued: dict[int, int] = {}  # waiters na fila por guild (disputa)
+        self.guild_stats: dict[int, dict] = {}
+        self.stats = {
+            p.name.lower(): {"queued": 0, "admitted": 0, "max_queued": 0, "wait": WaitHistogram()}
+            for p in Priority
+        }
+
+    def slot(self, priority: Priority = Priority.LIVE, guild_id: Optional[int] = None) -> "_Slot":
+        """Context manager reutilizável: `async with scheduler.slot(Priority.EDIT, guild_id): ...`."""
+        return _Slot(self, Priority(priority), int(guild_id or 0))
+
+    def _eligible(self, guild: int) -> bool:
+        if self.guild_max_inflight <= 0 or self._guild_inflight.get(guild, 0) < self.guild_max_inflight:
+            return True
+        # no teto: só segura se outra guild estiver esperando vaga
+        return not any(g != guild for g in self._guild_queued)
+
+    def _unqueue(self, guild: int) -> None:
+        n = self._guild_queued.get(guild, 0) - 1
+        if n > 0:
+            self._guild_queued[guild] = n
+        else:
+            self._guild_queued.pop(guild, None)
+
+    def _admit(self, guild: int, priority: Priority, waited: float) -> None:
+        self.in_flight += 1
+        self._guild_inflight[guild] = self._guild_inflight.get(guild, 0) + 1
+        st = self.stats[priority.name.lower()]
+        st["admitted"] += 1
+        st["wait"].observe(waited)
+        gs = self.guild_stats.get(guild)
+        if gs is None:
+            if len(self.guild_stats) >= self.max_tracked_guilds:
+                self.guild_stats.pop(next(iter(self.guild_stats)))
+            gs = self.guild_stats[guild] = {"admitted": 0, "wait_sum": 0.0, "wait_max": 0.0}
+        gs["admitted"] += 1
+        gs["wait_sum"] += waited
+        gs["wait_max"] = max(gs["wait_max"], waited)
+
+    async def _acquire(self, priority: Priority, guild: int) -> None:
+        t0 = time.monotonic()
+        if self._try_admit(priority, guild):
+            return
+        st = self.stats[priority.name.lower()]
+        fut = asyncio.get_running_loop().create_future()
+        self._classes[priority].push(_Waiter(fut, guild, t0, priority))
+        self._queued += 1
+        self._guild_queued[guild] = self._guild_queued.get(guild, 0) + 1
+        st["queued"] += 1
+        st["max_queued"] = max(st["max_queued"], st["queued"])
+        self._wake()  # pode haver vaga livre atrás de entradas canceladas
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # recebeu a vaga mas desistiu → devolve
+                self._release(guild)
+            else:
+                # continua na fila; descartado quando chegar na frente
+                self._queued -= 1
+                self._unqueue(guild)
+                st["queued"] -= 1
+            raise
+
+    def _try_admit(self, priority: Priority, guild: int) -> bool:
+        """Vaga na hora ou nada (sem entrar na fila)."""
+        if self._queued == 0 and self.in_flight < self.capacity() and self._eligible(guild):
+            self._admit(guild, priority, 0.0)
+            return True
+        return False
+
+    def _release(self, guild: int) -> None:
+        self.in_flight -= 1
+        n = self._guild_inflight.get(guild, 0) - 1
+        if n > 0:
+            self._guild_inflight[guild] = n
+        else:
+            self._guild_inflight.pop(guild, None)
+        self._wake()
+
+    def _pick(self) -> Optional[_Waiter]:
+        ranked = []
+        for prio, cq in self._classes.items():
+            oldest = cq.oldest()
+            if oldest is not None:
+                ranked.append((oldest + int(prio) * self.aging_sec, int(prio), cq))
+        for _key, _prio, cq in sorted(ranked, key=lambda r: (r[0], r[1])):
+            w = cq.next(self._eligible, self.weight)
+            if w is not None:
+                return w
+        return None
+
+    def _wake(self) -> None:
+        cap = self.capacity()
+        while self._queued > 0 and self.in_flight < cap:
+            w = self._pick()
+            if w is None:
+                break
+            self._queued -= 1
+            self._unqueue(w.guild)
+            self.stats[w.priority.name.lower()]["queued"] -= 1
+            self._admit(w.guild, w.priority, time.monotonic() - w.arrival)
+            w.fut.set_result(None)
+
+    def snapshot(self, top_guilds: int = 10) -> dict:
+        self._wake()  # capacidade pode ter subido (AIMD)
+        slowest = sorted(self.guild_stats.items(), key=lambda kv: kv[1]["wait_sum"], reverse=True)[:top_guilds]
+        return {
+            "capacity": self.capacity(),
+            "in_flight": self.in_flight,
+            "classes": {
+                name: {**{k: v for k, v in st.items() if k != "wait"}, "wait": st["wait"].snapshot()}
+                for name, st in self.stats.items()
+            },
+            "guilds": {
+                str(g): {
+                    "in_flight": self._guild_inflight.get(g, 0),
+                    "admitted": gs["admitted"],
+                    "avg_wait": round(gs["wait_sum"] / gs["admitted"], 4) if gs["admitted"] else 0.0,
+                    "max_wait": round(gs["wait_max"], 4),
+                }
+                for g, gs in slowest
+            },
+        }
+
+
+class _Slot:
+    """Sem estado por uso: o mesmo slot pode ser usado por vários blocos em paralelo."""
+    __slots__ = ("_sched", "_priority", "_guild")
+
+    def __init__(self, sched: PriorityScheduler, priority: Priority, guild: int):
+        self._sched = sched
+        self._priority = priority
+        self._guild = guild
+
+    async def __aenter__(self):
+        await self._sched._acquire(self._priority, self._guild)
+        inner = self._sched.inner
+        if inner is not None:
+            try:
+                await inner.__aenter__()
+            except BaseException:
+                self._sched._release(self._guild)
+                raise
+        return self
+
+    async def try_enter(self) -> bool:
+        """
+        Entra só se houver vaga livre agora (scheduler e `inner`), sem esperar.
+        True → a vaga é sua e deve ser devolvida com release().
+        """
+        if not self._sched._try_admit(self._priority, self._guild):
+            return False
+        inner = self._sched.inner
+        if inner is not None:
+            locked = getattr(inner, "locked", None)
+            if locked is None or not hasattr(inner, "release") or locked():
+                self._sched._release(self._guild)
+                return False
+            try:
+                await inner.__aenter__()  # livre: entra sem suspender
+            except BaseException:
+                self._sched._release(self._guild)
+                raise
+        return True
+
+    def release(self) -> None:
+        """Devolve a vaga tomada por try_enter() (síncrono: serve em done-callback)."""
+        try:
+            if self._sched.inner is not None:
+                self._sched.inner.release()
+        finally:
+            self._sched._release(self._guild)
+
+    async def __aexit__(self, *exc):
+        try:
+            if self._sched.inner is not None:
+                await self._sched.inner.__aexit__(*exc)
+        finally:
+            self._sched._release(self._guild)
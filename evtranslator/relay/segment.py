@@ -0,0 +1,90 @@
+# evtranslator/relay/segment.py
+from __future__ import annotations
+import re
+
+# Fronteiras: parágrafo (linha em branco), quebra de linha, ou fim de frase seguido de espaço.
+# (lookbehinds separados porque o Python exige largura fixa em cada um)
+_BOUNDARY_RE = re.compile(
+    r'(\n[ \t]*\n\s*|\n|(?:(?<=[.!?…])|(?<=[.!?…]["\'»”)\]]))[ \t]+)'
+)
+
+
+def split_units(text: str) -> list[tuple[str, str]]:
+    """
+    Quebra o texto em unidades (frase/linha/parágrafo).
+    Retorna [(corpo, separador_seguinte)]; "".join(c + s) reconstrói o original.
+    """
+    if not text:
+        return []
+    pieces = _BOUNDARY_RE.split(text)
+    units: list[tuple[str, str]] = []
+    for i in range(0, len(pieces), 2):
+        body = pieces[i]
+        sep = pieces[i + 1] if i + 1 < len(pieces) else ""
+        if not body and units:
+            # separadores consecutivos → gruda no anterior
+            prev_body, prev_sep = units[-1]
+            units[-1] = (prev_body, prev_sep + sep)
+            continue
+        units.append((body, sep))
+    return units
+
+
+def _hard_split(body: str, max_chars: int) -> list[tuple[str, str]]:
+    """Unidade maior que o limite: corta no último espaço antes do limite (ou seco)."""
+    out: list[tuple[str, str]] = []
+    rest = body
+    while len(rest) > max_chars:
+        cut = rest.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            out.append((rest[:max_chars], ""))
+            rest = rest[max_chars:]
+        else:
+            out.append((rest[:cut], " "))
+            rest = rest[cut + 1:]
+    out.append((rest, ""))
+    return out
+
+
+def chunk_text(text: str, max_chars: int) -> list[tuple[str, str]]:
+    """
+    Agrupa unidades em blocos de até max_chars, sem quebrar frases quando possível.
+    Retorna [(bloco, separador_seguinte)] na ordem original.
+    """
+    if not text:
+        return []
+    if len(text) <= max_chars:
+        return [(text, "")]
+
+    chunks: list[tuple[str, str]] = []
+    cur, cur_sep = "", ""
+    for body, sep in split_units(text):
+        parts = _hard_split(body, max_chars) if len(body) > max_chars else [(body, "")]
+        for j, (part, part_sep) in enumerate(parts):
+            if j == len(parts) - 1:
+                part_sep = sep
+            if cur and len(cur) + len(cur_sep) + len(part) > max_chars:
+                chunks.append((cur, cur_sep))
+                cur, cur_sep = "", ""
+            if cur:
+                cur = cur + cur_sep + part
+            else:
+                cur = part
+            cur_sep = part_sep
+    if cur:
+        chunks.append((cur, cur_sep))
+    return chunks
+
+
+def join_chunks(translated: list[str], chunks: list[tuple[str, str]]) -> str:
+    """Remonta as traduções na ordem, reaproveitando os separadores originais."""
+    return "".join(t + sep for t, (_c, sep) in zip(translated, chunks))
+
+
+def split_for_discord(text: str, limit: int) -> list[str]:
+    """Quebra um texto em mensagens de até `limit` chars, preferindo fronteiras de frase/linha."""
+    if not text:
+        return []
+    if len(text) <= limit:
+        return [text]
+    return [c.strip() for c, _sep in chunk_text(text, limit) if c.strip()]
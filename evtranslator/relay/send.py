@@ -11,6 +11,7 @@ from evtranslator.relay.attachments import (
     rewrite_proxied_image_urls_in_text,
     rewrite_links,
 )
+from evtranslator.relay.segment import split_for_discord
 
 # ==========================
 # Sanitização de invisíveis
@@ -290,7 +291,8 @@ async def send_translation(
     # Monta blocos
     msgs: list[str] = []
     if base_text:
-        msgs.append(base_text)
+        # texto traduzido pode crescer além do limite → quebra em frases
+        msgs.extend(split_for_discord(base_text, MAX_MSG_LEN))
     if media_urls:
         msgs.extend(_split_by_limit(media_urls))
     if other_urls:
@@ -306,7 +308,11 @@ async def send_translation(
 
         # só tentamos resolver “direto” para domínios suportados
         if any(dom == d or dom.endswith("." + d) for d in _DIRECT_EMBED_DOMAINS):
-            session = getattr(bot, "http_session", None) or getattr(bot.webhooks, "http_session", None)
+            # pool "media" separado: sonda lenta no Imgur não segura conexão da tradução/webhooks
+            pools = getattr(bot, "http_pools", None)
+            session = pools.media if pools else (
+                getattr(bot, "http_session", None) or getattr(bot.webhooks, "http_session", None)
+            )
             direct = None
             if session is not None and dom.endswith("imgur.com"):
                 direct = await _resolve_imgur_direct(session, url)
@@ -0,0 +1,163 @@
+# evtranslator/relay/sequencer.py
+from __future__ import annotations
+import asyncio, logging, time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from evtranslator.relay.ratelimit import WaitHistogram
+
+log = logging.getLogger(__name__)
+
+LATE_SEND = "late"   # item que chega depois de ter sido pulado: envia mesmo assim, com marcador
+LATE_SKIP = "skip"   # item que chega depois de ter sido pulado: descarta
+LATE_POLICIES = (LATE_SEND, LATE_SKIP)
+
+# send(late) → envia a mensagem (True = postada); late=True quando sai fora de ordem
+SendFn = Callable[[bool], Awaitable[bool]]
+
+
+class _ChanState:
+    __slots__ = ("issued", "next", "ready", "released", "late", "event", "task")
+
+    def __init__(self):
+        self.issued = 0                                   # próximo número a distribuir
+        self.next = 0                                     # próximo número a enviar
+        self.ready: dict[int, tuple[float, SendFn]] = {}  # prontos esperando a vez
+        self.released: set[int] = set()                  # números que não vão enviar nada
+        self.late: deque[SendFn] = deque()
+        self.event = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class ReorderBuffer:
+    """
+    Entrega em ordem por canal com tradução concorrente.
+
+    - next_seq(key) numera a mensagem na chegada;
+    - put(key, seq, send) entrega o envio pronto; um flusher por canal envia
+      estritamente na ordem dos números;
+    - release(key, seq) avisa que aquele número não vai enviar nada
+      (filtrado, descartado, estacionado), para não travar os seguintes;
+    - se o primeiro da fila não chega em `max_wait_sec` (contados desde que o
+      próximo pronto entrou no buffer), ele é pulado; se aparecer depois, a
+      política `late` decide: envia com marcador ("late") ou descarta ("skip").
+    Item pulado/descartado ou cujo envio falha não chama (ou não conclui)
+    o envio, então quem cobra a cota só depois de enviar não cobra por ele;
+    `on_drop` do put() avisa o descarte (ex.: devolver a reserva de cota).
+    Só conta como "sent"/"late_sent" o envio que devolveu True; False vira
+    "unsent" e exceção vira "errors".
+    `parallel` limita envios simultâneos somando todos os canais. O estado de
+    cada canal é pequeno e fica (a numeração não pode recomeçar com item em voo).
+    """
+
+    def __init__(self, max_wait_sec: float = 4.0, late_policy: str = LATE_SEND, parallel: int = 8):
+        if late_policy not in LATE_POLICIES:
+            raise ValueError(f"late_policy inválida: {late_policy!r} (use {', '.join(LATE_POLICIES)})")
+        self.max_wait_sec = max_wait_sec
+        self.late_policy = late_policy
+        self._sem = asyncio.Semaphore(max(1, parallel))
+        self._chans: dict[int, _ChanState] = {}
+        self.max_buffered = 0
+        self.wait = WaitHistogram()  # tempo pronto esperando a vez
+        self.stats = {"sent": 0, "released": 0, "skipped": 0, "late_sent": 0, "late_dropped": 0, "unsent": 0, "errors": 0}
+
+    def next_seq(self, key: int) -> int:
+        st = self._chans.get(key)
+        if st is None:
+            st = self._chans[key] = _ChanState()
+        seq = st.issued
+        st.issued += 1
+        return seq
+
+    def release(self, key: int, seq: int) -> None:
+        st = self._chans.get(key)
+        if st is None or seq < st.next:
+            return  # já pulado/enviado
+        self.stats["released"] += 1
+        st.released.add(seq)
+        self._kick(key, st)
+
+    def put(self, key: int, seq: int, send: SendFn, on_drop: Optional[Callable[[], None]] = None) -> None:
+        st = self._chans.get(key)
+        if st is None:  # número não saiu de next_seq(): envia sem ordenar
+            st = self._chans[key] = _ChanState()
+            st.next, st.issued = seq, seq + 1
+        if seq < st.next:
+            # chegou depois de ter sido pulado
+            if self.late_policy == LATE_SKIP:
+                self.stats["late_dropped"] += 1
+                if on_drop is not None:
+                    on_drop()
+                return
+            st.late.append(send)
+        else:
+            st.ready[seq] = (time.monotonic(), send)
+            self.max_buffered = max(self.max_buffered, len(st.ready))
+        self._kick(key, st)
+
+    def _kick(self, key: int, st: _ChanState) -> None:
+        if st.task is None:
+            if st.ready or st.late or st.released:
+                st.task = asyncio.create_task(self._flush(key, st))
+        else:
+            st.event.set()
+
+    async def _send(self, send: SendFn, late: bool) -> None:
+        async with self._sem:
+            try:
+                sent = await send(late)
+            except Exception as e:
+                self.stats["errors"] += 1
+                log.warning("reorder: envio falhou: %s", e)
+                return
+        if sent:
+            self.stats["late_sent" if late else "sent"] += 1
+        else:
+            self.stats["unsent"] += 1
+
+    async def _flush(self, key: int, st: _ChanState) -> None:
+        try:
+            while True:
+                while st.late:
+                    await self._send(st.late.popleft(), True)
+                while st.next in st.released:
+                    st.released.discard(st.next)
+                    st.next += 1
+                item = st.ready.pop(st.next, None)
+                if item is not None:
+                    ts, send = item
+                    st.next += 1
+                    self.wait.observe(time.monotonic() - ts)
+                    await self._send(send, False)
+                    continue
+                if not st.ready:
+                    if st.late:
+                        continue
+                    return
+                # o da vez ainda não chegou: espera até max_wait e depois pula
+                oldest = min(ts for ts, _ in st.ready.values())
+                left = oldest + self.max_wait_sec - time.monotonic()
+                if left <= 0:
+                    lowest = min(st.ready)
+                    skipped = [s for s in range(st.next, lowest) if s not in st.released]
+                    st.released.difference_update(range(st.next, lowest))
+                    self.stats["skipped"] += len(skipped)
+                    log.info("reorder: canal=%s pulou seq %s (esperou %.1fs)", key, skipped, self.max_wait_sec)
+                    st.next = lowest
+                    continue
+                st.event.clear()
+                try:
+                    await asyncio.wait_for(st.event.wait(), timeout=left)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            st.task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "channels": len(self._chans),
+            "buffered": sum(len(st.ready) for st in self._chans.values()),
+            "max_buffered": self.max_buffered,
+            **self.stats,
+            "wait": self.wait.snapshot(),
+        }
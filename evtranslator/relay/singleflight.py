@@ -0,0 +1,55 @@
+# evtranslator/relay/singleflight.py
+from __future__ import annotations
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesce chamadas idênticas em andamento: enquanto a primeira (líder) não
+    termina, quem pedir a mesma chave espera o MESMO resultado, sem nova requisição.
+
+    - Exceção do líder é repassada a todos que esperam.
+    - Cancelar um dos que esperam não cancela os demais; se TODOS desistirem,
+      o trabalho em andamento é cancelado.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._waiters: dict[Hashable, int] = {}
+        # deadline_retries: seguidores que repetiram porque o deadline do líder estourou
+        self.stats = {"leaders": 0, "coalesced": 0, "deadline_retries": 0}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(factory())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t, k=key: self._on_done(k, t))
+            self.stats["leaders"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # se fomos o último interessado, não faz sentido seguir gastando o provedor
+            if not task.done() and self._waiters.get(key, 0) <= 1:
+                task.cancel()
+            raise
+        finally:
+            if self._inflight.get(key) is task and key in self._waiters:
+                self._waiters[key] -= 1
+
+    def _on_done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            self._inflight.pop(key, None)
+            self._waiters.pop(key, None)
+        # consome a exceção para não poluir o log quando ninguém mais espera
+        if not task.cancelled():
+            task.exception()
@@ -1,8 +1,17 @@
 # evtranslator/relay/translate_wrap.py
 from __future__ import annotations
-import asyncio, random, logging, aiohttp
-from evtranslator.relay.backoff import BackoffCfg, ExponentialBackoff, CircuitBreaker
-from evtranslator.translate import google_web_translate
+import asyncio, random, logging, time, aiohttp
+from evtranslator.relay.backoff import BackoffCfg, ExponentialBackoff, CircuitBreaker, RetryBudget
+from evtranslator.relay.cache import TranslationCache
+from evtranslator.relay.singleflight import SingleFlight
+from evtranslator.relay.segment import chunk_text, join_chunks
+from evtranslator.relay.adaptive import AdaptiveController
+from evtranslator.relay.hedge import Hedger
+from evtranslator.relay.scheduler import Priority
+from evtranslator.translate import google_web_translate, TranslateHTTPError
+
+# abaixo disso não vale a pena começar uma nova tentativa antes do deadline
+_MIN_ATTEMPT_SEC = 0.3
 
 async def translate_with_controls(
     session: aiohttp.ClientSession,
@@ -13,34 +22,233 @@ async def translate_with_controls(
     backoff: BackoffCfg,
     cb: CircuitBreaker,
     rate_acquire,
+    translate_fn=None,
+    cache: TranslationCache | None = None,
+    cache_ver: str = "",
+    singleflight: SingleFlight | None = None,
+    chunk_chars: int = 0,
+    adaptive: AdaptiveController | None = None,
+    deadline: float | None = None,
+    retry_budget: RetryBudget | None = None,
+    hedger: Hedger | None = None,
+    provider_fn=None,
+    priority: int = Priority.LIVE,
 ) -> str | None:
-    if cb.is_open:
-        logging.warning("CB open: segurando traduções por curto período")
-        return None
-    if jitter_ms > 0:
-        await asyncio.sleep(random.uniform(0, jitter_ms / 1000.0))
-    await rate_acquire()
-
-    bo = ExponentialBackoff(backoff)
-    last_err = None
-    for attempt in range(backoff.attempts):
-        try:
-            async with sem:
-                return await asyncio.wait_for(
-                    google_web_translate(session, text, src_lang, tgt_lang),
-                    timeout=timeout_sec,
+    """
+    Traduz com jitter, rate limit, semáforo, timeout, retry e circuit breaker.
+    Se translate_fn vier (ex.: TranslateBatcher.translate com a classe já
+    amarrada), ele é quem aplica rate limit e slot do scheduler por requisição
+    HTTP; aqui ficam timeout/retry/CB.
+    Hit no cache retorna direto, sem passar por rate limit/semáforo/CB.
+    Com singleflight, pedidos idênticos simultâneos da mesma classe de prioridade
+    compartilham a mesma requisição (LIVE não herda a fila de um líder BULK).
+    Se o líder desistiu pelo deadline DELE e este pedido ainda tem tempo, tenta
+    de novo uma vez (como novo líder, ou junto de quem já tentou).
+    Com chunk_chars > 0, textos longos são quebrados em frases/parágrafos e os
+    blocos são traduzidos em paralelo (cada um passa por cache/semáforo) e remontados.
+    Com adaptive, latência/sobrecarga de cada tentativa alimentam o controle AIMD.
+
+    Política de retry ÚNICA: o provedor faz uma tentativa por chamada e quem
+    repete é este laço (BackoffCfg.attempts). `deadline` (time.monotonic()) vale
+    para a mensagem inteira: jitter, espera no rate limit, fila do semáforo,
+    tentativas e backoff. Se não der mais tempo de tentar, desiste na hora.
+    `retry_budget` limita retries a uma fração do volume do processo.
+    Com hedger (só no caminho sem lote), uma tentativa lenta ganha uma 2ª
+    requisição idêntica e vale a que responder primeiro.
+    `provider_fn` troca o google_web_translate (ex.: EndpointPool.translate).
+    `priority` (classe do Priority) ordena a fila do rate limiter; a ordem no
+    semáforo vem do próprio `sem` (ex.: PriorityScheduler.slot(priority)).
+    """
+    if chunk_chars > 0 and len(text) > chunk_chars:
+        chunks = chunk_text(text, chunk_chars)
+        if len(chunks) > 1:
+            parts = await asyncio.gather(*(
+                translate_with_controls(
+                    session, chunk, src_lang, tgt_lang, sem, timeout_sec, jitter_ms,
+                    backoff, cb, rate_acquire, translate_fn,
+                    cache=cache, cache_ver=cache_ver, singleflight=singleflight,
+                    adaptive=adaptive, deadline=deadline, retry_budget=retry_budget,
+                    hedger=hedger, provider_fn=provider_fn, priority=priority,
                 )
-        except asyncio.TimeoutError as e:
-            last_err = e; cb.on_failure()
-        except Exception as e:
-            last_err = e
-            msg = str(e).lower()
-            if "429" in msg or "too many" in msg or "rate" in msg or msg.startswith("5"):
+                for chunk, _sep in chunks
+            ))
+            if any(p is None for p in parts):
+                return None
+            return join_chunks(list(parts), chunks)
+
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.make_key(src_lang, tgt_lang, text, cache_ver)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    led = False
+
+    async def _run() -> tuple[str | None, bool]:
+        """(tradução, desistiu pelo deadline)."""
+        nonlocal led
+        led = True
+        expired = False
+
+        def _on_expired() -> None:
+            nonlocal expired
+            expired = True
+
+        result = await _translate_uncached(
+            session, text, src_lang, tgt_lang, sem, timeout_sec, jitter_ms,
+            backoff, cb, rate_acquire, translate_fn, adaptive, deadline, retry_budget, hedger,
+            provider_fn, priority, _on_expired,
+        )
+        if result is not None and cache is not None and cache_key is not None:
+            cache.put(cache_key, result)
+        return result, expired
+
+    if singleflight is None:
+        return (await _run())[0]
+    key = (cache_key or (src_lang, tgt_lang, text), int(priority))
+    result, expired = await singleflight.do(key, _run)
+    if result is None and expired and not led:
+        # o deadline que estourou foi o do líder; com tempo sobrando, tenta mais uma vez
+        left = None if deadline is None else deadline - time.monotonic()
+        if left is None or left >= _MIN_ATTEMPT_SEC:
+            singleflight.stats["deadline_retries"] += 1
+            result, _ = await singleflight.do(key, _run)
+    return result
+
+
+async def _translate_uncached(
+    session: aiohttp.ClientSession,
+    text: str, src_lang: str, tgt_lang: str,
+    sem: asyncio.Semaphore,
+    timeout_sec: float,
+    jitter_ms: int,
+    backoff: BackoffCfg,
+    cb: CircuitBreaker,
+    rate_acquire,
+    translate_fn,
+    adaptive: AdaptiveController | None = None,
+    deadline: float | None = None,
+    retry_budget: RetryBudget | None = None,
+    hedger: Hedger | None = None,
+    provider_fn=None,
+    priority: int = Priority.LIVE,
+    on_expired=None,
+) -> str | None:
+    provider = provider_fn or google_web_translate
+
+    def _left() -> float | None:
+        return None if deadline is None else deadline - time.monotonic()
+
+    def _expired(where: str) -> None:
+        if retry_budget is not None:
+            retry_budget.stats["deadline_exceeded"] += 1
+        if on_expired is not None:
+            on_expired()
+        logging.info("Tradução abandonada: deadline da mensagem estourado (%s)", where)
+
+    left = _left()
+    if left is not None and left < _MIN_ATTEMPT_SEC:
+        _expired("início")
+        return None
+    if not cb.allow_request():
+        logging.warning("CB %s: segurando traduções por curto período", cb.state)
+        return None
+    probe_held = True  # cada allow_request() precisa terminar em on_success/on_failure/release
+    try:
+        if jitter_ms > 0:
+            await asyncio.sleep(random.uniform(0, jitter_ms / 1000.0))
+        if translate_fn is None:
+            try:
+                await asyncio.wait_for(rate_acquire(priority), timeout=_left())
+            except asyncio.TimeoutError:
+                _expired("rate limit")
+                return None
+
+        if retry_budget is not None:
+            retry_budget.on_request()
+        bo = ExponentialBackoff(backoff)
+        last_err = None
+        tries = 0
+        for attempt in range(backoff.attempts):
+            if attempt > 0:
+                delay = bo.next_delay()
+                left = _left()
+                if left is not None and left < delay + _MIN_ATTEMPT_SEC:
+                    _expired("backoff")
+                    break
+                if retry_budget is not None and not retry_budget.try_retry():
+                    logging.warning("Retry negado: orçamento de retries do processo esgotado")
+                    break
+                await asyncio.sleep(delay)
+                if not probe_held:
+                    if not cb.allow_request():
+                        logging.warning("CB %s: abortando retry", cb.state)
+                        return None
+                    probe_held = True
+
+            left = _left()
+            attempt_timeout = timeout_sec if left is None else min(timeout_sec, left)
+            tries += 1
+            t0 = time.monotonic()
+            try:
+                if translate_fn is not None:
+                    result = await asyncio.wait_for(
+                        translate_fn(session, text, src_lang, tgt_lang),
+                        timeout=attempt_timeout,
+                    )
+                else:
+                    async with sem:
+                        t0 = time.monotonic()  # latência do provedor, sem a espera na fila
+
+                        def _call():
+                            return provider(session, text, src_lang, tgt_lang, attempts=1)
+
+                        result = await asyncio.wait_for(
+                            hedger.run(_call, slot=sem) if hedger is not None else _call(),
+                            timeout=attempt_timeout,
+                        )
+                probe_held = False; cb.on_success()
+                if adaptive is not None:
+                    adaptive.on_success(time.monotonic() - t0)
+                return result
+            except asyncio.TimeoutError as e:
+                last_err = e
+                probe_held = False
+                if attempt_timeout < timeout_sec:
+                    # cortado pelo deadline da mensagem, não pelo provedor
+                    cb.release()
+                    _expired("tentativa")
+                    break
                 cb.on_failure()
-            else:
-                logging.exception("Erro não recuperável na tradução: %r", e)
-                break
-        if attempt < backoff.attempts - 1:
-            await asyncio.sleep(bo.next_delay())
-    logging.warning("Tradução falhou após %d tentativas. Último erro=%r", backoff.attempts, last_err)
-    return None
+                if adaptive is not None:
+                    adaptive.on_overload("timeout")
+            except Exception as e:
+                last_err = e
+                status = getattr(e, "status", None)
+                if is_overload_error(e):
+                    probe_held = False; cb.on_failure()
+                    if adaptive is not None:
+                        adaptive.on_overload(f"http {status}" if status else "rede")
+                else:
+                    probe_held = False; cb.release()
+                    logging.exception("Erro não recuperável na tradução: %r", e)
+                    break
+        logging.warning("Tradução falhou após %d tentativa(s). Último erro=%r", tries, last_err)
+        return None
+    finally:
+        if probe_held:  # cancelado (ou deadline) no meio do caminho
+            cb.release()
+
+
+def is_overload_error(e: BaseException) -> bool:
+    """
+    Classifica pela status HTTP real (TranslateHTTPError/ClientResponseError):
+    429 e 5xx contam como sobrecarga; status None = falha de rede/timeout.
+    Outros 4xx e corpo inválido (TranslateParseError) não abrem o circuito
+    nem cortam o AIMD: liberam a vaga do breaker com release().
+    """
+    if isinstance(e, (TranslateHTTPError, aiohttp.ClientResponseError)):
+        status = e.status
+        return status is None or status == 429 or 500 <= status < 600
+    return isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError))
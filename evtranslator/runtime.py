@@ -0,0 +1,28 @@
+# evtranslator/runtime.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+# modo de runtime rápido (opt-in): uvloop no event loop + orjson no fastjson.
+# Cada parte cai para a stdlib sozinha se a lib não estiver instalada.
+FAST_RUNTIME = os.getenv("EV_FAST_RUNTIME", "false").lower() == "true"
+
+
+def install_event_loop() -> str:
+    """
+    Com EV_FAST_RUNTIME=true, instala a policy do uvloop (chamar ANTES do asyncio.run).
+    Retorna o nome do loop em uso ("uvloop" ou "asyncio").
+    """
+    if not FAST_RUNTIME:
+        return "asyncio"
+    try:
+        import uvloop
+    except ImportError:
+        log.info("runtime: uvloop não instalado, usando asyncio padrão")
+        return "asyncio"
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
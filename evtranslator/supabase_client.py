@@ -10,6 +10,8 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
+from . import fastjson
+
 # Carrega .env do diretório atual e da raiz do projeto (sem sobrescrever env do SO)
 load_dotenv()  # CWD
 load_dotenv(Path(__file__).resolve().parents[1] / ".env", override=False)  # raiz do projeto
@@ -67,7 +69,8 @@ def _ensure_row_list(obj: Any) -> list:
 def _rpc(name: str, payload: dict, timeout: float = _DEFAULT_TIMEOUT) -> list:
     base, key = _get_env()
     url = f"{base}/rest/v1/rpc/{name}"
-    r = _get_session().post(url, json=payload, headers=_headers(key), timeout=timeout)
+    # corpo já serializado (fastjson); o Content-Type JSON vem de _headers
+    r = _get_session().post(url, data=fastjson.dumps_bytes(payload), headers=_headers(key), timeout=timeout)
 
     # Se vier 204 (No Content), retorna lista vazia
     if r.status_code == 204:
@@ -81,7 +84,7 @@ def _rpc(name: str, payload: dict, timeout: float = _DEFAULT_TIMEOUT) -> list:
         raise RuntimeError(msg) from None
 
     try:
-        data = r.json()
+        data = fastjson.loads(r.content)
     except ValueError:
         raise RuntimeError(f"RPC {name} retornou payload não-JSON: {r.text[:200]}")
 
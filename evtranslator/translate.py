@@ -3,50 +3,158 @@ from __future__ import annotations
 
 import asyncio
 import aiohttp
+import re
 import urllib.parse
 import random
 from typing import Optional
 
 from .config import RETRIES, BACKOFF_BASE, HTTP_TIMEOUT, MAX_MSG_LEN
+from . import fastjson
 
-async def google_web_translate(
-    session: aiohttp.ClientSession, text: str, src: str, dest: str
+_GT_BASE = "https://translate.googleapis.com/translate_a/single"
+_GT_MAX_CHARS = 4800  # limite prático do endpoint (~5000 chars)
+
+# Delimitadores de lote: "⟦0⟧", "⟦1⟧"... em linhas próprias (o Google não traduz).
+_BATCH_MARK = "⟦{}⟧"
+_BATCH_SPLIT_RE = re.compile(r"\s*⟦\s*(\d+)\s*⟧\s*")
+
+
+class TranslateHTTPError(RuntimeError):
+    """Falha do provedor de tradução. `status` é o HTTP status (None = erro de rede/timeout)."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class TranslateParseError(ValueError):
+    """Resposta 2xx com corpo inválido (não é JSON ou formato inesperado). Não é sobrecarga."""
+
+
+def _join_segments(data) -> str:
+    """O endpoint devolve a tradução quebrada em segmentos em data[0]."""
+    parts: list[str] = []
+    for seg in data[0] or []:
+        if seg and seg[0]:
+            parts.append(seg[0])
+    return "".join(parts)
+
+
+async def _fetch_translation(
+    session: aiohttp.ClientSession, text: str, src: str, dest: str, attempts: Optional[int] = None,
+    base_url: Optional[str] = None, client: str = "gtx",
 ) -> str:
     """
-    Usa o endpoint público do Google Translate (não-oficial).
-    Retorna a tradução completa ou levanta RuntimeError em falha.
+    attempts=None usa RETRIES; o gateway passa 1 (a política de retry fica no translate_wrap).
+    base_url/client permitem variantes equivalentes do endpoint (ou um servidor stub local).
     """
+    attempts = RETRIES if attempts is None else max(1, attempts)
+    params = {"client": client or "gtx", "sl": src, "tl": dest, "dt": "t", "q": text}
+    url = f"{base_url or _GT_BASE}?{urllib.parse.urlencode(params)}"
 
-    # ⚠️ corta para não estourar limite do endpoint (~5000 chars)
-    if len(text) > 4800:
-        text = text[:4800]
-
-    base = "https://translate.googleapis.com/translate_a/single"
-    params = {"client": "gtx", "sl": src, "tl": dest, "dt": "t", "q": text}
-    url = f"{base}?{urllib.parse.urlencode(params)}"
-
-    for attempt in range(RETRIES):
+    last_status: Optional[int] = None
+    for attempt in range(attempts):
+        last_status = None  # status da tentativa atual (um 5xx antigo não vale para erro de rede)
         try:
             async with session.get(url, timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT)) as resp:
                 # retry explícito em 429 ou 5xx
                 if resp.status == 429 or 500 <= resp.status < 600:
+                    last_status = resp.status
+                    if attempt == attempts - 1:
+                        break
                     delay = BACKOFF_BASE * (2**attempt) + random.uniform(0, 0.3)
                     await asyncio.sleep(delay)
                     continue
 
-                resp.raise_for_status()
-                data = await resp.json(content_type=None)
-
-                parts: list[str] = []
-                for seg in data[0]:
-                    if seg and seg[0]:
-                        parts.append(seg[0])
-                return "".join(parts)
+                if resp.status >= 400:
+                    # 4xx (exceto 429) não adianta repetir
+                    raise TranslateHTTPError(
+                        f"google_web_translate: HTTP {resp.status}", status=resp.status
+                    )
+                body = await resp.read()
 
-        except Exception as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            # só rede/timeout vira status=None; TranslateHTTPError (4xx) sobe direto
+            if attempt == attempts - 1:
+                break
             delay = BACKOFF_BASE * (2**attempt) + random.uniform(0, 0.2)
             await asyncio.sleep(delay)
             # logging pode ser adicionado aqui se quiser debug detalhado
             continue
 
-    raise RuntimeError("google_web_translate: failed after retries")
+        # 200 com corpo estranho: repetir não ajuda e não é sobrecarga do provedor
+        try:
+            return _join_segments(fastjson.loads(body))
+        except (ValueError, TypeError, LookupError) as e:
+            raise TranslateParseError(f"google_web_translate: resposta inválida ({e!r})") from e
+
+    # o chamador classifica pelo status (429/5xx/rede → circuit breaker)
+    raise TranslateHTTPError(
+        f"google_web_translate: failed after retries (last status={last_status})",
+        status=last_status,
+    )
+
+
+async def google_web_translate(
+    session: aiohttp.ClientSession, text: str, src: str, dest: str, attempts: Optional[int] = None,
+    base_url: Optional[str] = None, client: str = "gtx",
+) -> str:
+    """
+    Usa o endpoint público do Google Translate (não-oficial).
+    Retorna a tradução completa ou levanta TranslateHTTPError em falha.
+    """
+
+    # ⚠️ corta para não estourar limite do endpoint (~5000 chars)
+    if len(text) > _GT_MAX_CHARS:
+        text = text[:_GT_MAX_CHARS]
+
+    return await _fetch_translation(session, text, src, dest, attempts, base_url, client)
+
+
+# ==========================
+# Lote (várias mensagens, 1 requisição)
+# ==========================
+
+def pack_batch(texts: list[str]) -> str:
+    """Junta os textos com um marcador numerado antes de cada item."""
+    return "\n".join(f"{_BATCH_MARK.format(i)}\n{t}" for i, t in enumerate(texts))
+
+
+def batch_overhead(n_items: int) -> int:
+    """Quantos caracteres os marcadores ocupam para n itens (estimativa conservadora)."""
+    return n_items * (len(_BATCH_MARK.format(n_items)) + 2)
+
+
+def unpack_batch(translated: str, n_items: int) -> Optional[list[str]]:
+    """
+    Separa a resposta por marcador. Retorna None se os marcadores vierem
+    faltando, duplicados ou fora de ordem (o chamador faz fallback).
+    """
+    pieces = _BATCH_SPLIT_RE.split(translated or "")
+    # esperado: ["", "0", t0, "1", t1, ...]
+    if len(pieces) != 2 * n_items + 1 or pieces[0].strip():
+        return None
+    out: list[str] = []
+    for i in range(n_items):
+        if pieces[1 + 2 * i] != str(i):
+            return None
+        out.append(pieces[2 + 2 * i].strip())
+    return out
+
+
+async def google_web_translate_batch(
+    session: aiohttp.ClientSession, texts: list[str], src: str, dest: str, attempts: Optional[int] = None,
+    base_url: Optional[str] = None, client: str = "gtx",
+) -> Optional[list[str]]:
+    """
+    Traduz vários textos do mesmo par (src, dest) numa única requisição.
+    Retorna a lista na mesma ordem, ou None se os delimitadores foram
+    corrompidos pelo tradutor. Levanta TranslateHTTPError em falha de rede/HTTP.
+    """
+    if not texts:
+        return []
+    packed = pack_batch(texts)
+    if len(packed) > _GT_MAX_CHARS:
+        return None
+    translated = await _fetch_translation(session, packed, src, dest, attempts, base_url, client)
+    return unpack_batch(translated, len(texts))
@@ -9,12 +9,15 @@ import aiohttp
 import discord
 from discord import AllowedMentions
 
+from evtranslator import fastjson
 from evtranslator.config import DB_PATH
 from evtranslator.db import (
     upsert_webhook_token,
     get_webhook_for_channel,
     get_webhook_token_by_id,
+    delete_webhook_token,
 )
+from evtranslator.webhook_index import OwnWebhookIndex
 
 TARGET_NAME = "EVbabel Relay"  # nome do webhook criado pelo bot
 log = logging.getLogger(__name__)
@@ -26,9 +29,10 @@ class WebhookSender:
     Com persistência de (webhook_id, token) para permitir edição pós-restart.
     """
 
-    def __init__(self, bot_user_id: Optional[int], default_avatar_bytes: Optional[bytes] = None):
+    def __init__(self, bot_user_id: Optional[int], default_avatar_bytes: Optional[bytes] = None,
+                 own_webhooks: Optional[OwnWebhookIndex] = None):
         self.cache: dict[int, discord.Webhook] = {}
-        self.own_webhook_ids: set[int] = set()  # IDs de webhooks geridos por este bot (opcional)
+        self.own_webhooks = own_webhooks  # índice do bot: todo webhook gravado aqui entra nele
         self.bot_user_id = bot_user_id
         self.default_avatar_bytes = default_avatar_bytes  # avatar fixo (bytes) ou None
         # Deve ser preenchida pelo Cog: self.webhook_sender.http_session = self.bot.http_session
@@ -67,6 +71,9 @@ class WebhookSender:
                 full = await wh.fetch()
                 if not await self._is_ours(full):
                     return None
+            except discord.NotFound:
+                await self._drop(int(webhook_id))
+                return None
             except Exception:
                 # se não deu pra fetch, segue com o parcial (melhor do que nada),
                 # pois a linha vem do nosso DB e em geral foi criada por nós.
@@ -100,6 +107,9 @@ class WebhookSender:
                         full = await wh.fetch()
                         if not await self._is_ours(full):
                             wh = None
+                    except discord.NotFound:
+                        await self._drop(int(wid))  # apagado no Discord: não volta por aqui
+                        wh = None
                     except Exception:
                         pass
                     if wh is not None:
@@ -120,12 +130,7 @@ class WebhookSender:
                     continue  # NÃO usar/salvar webhooks alheios (ex.: Tupperbox)
 
                 self.cache[channel.id] = h
-                try:
-                    await upsert_webhook_token(
-                        DB_PATH, channel.guild.id, channel.id, int(h.id), str(h.token), int(time.time())
-                    )
-                except Exception:
-                    pass
+                await self._persist(channel, h)
                 return h
         except Exception:
             pass
@@ -134,17 +139,32 @@ class WebhookSender:
         try:
             wh = await channel.create_webhook(name=TARGET_NAME, reason="Proxy de tradução")
             self.cache[channel.id] = wh
-            try:
-                await upsert_webhook_token(
-                    DB_PATH, channel.guild.id, channel.id, int(wh.id), str(wh.token), int(time.time())
-                )
-            except Exception:
-                pass
+            await self._persist(channel, wh)
             return wh
         except Exception as e:
             log.warning("Falha ao criar webhook em #%s: %s", channel.name, e)
             return None
 
+    async def _persist(self, channel: discord.TextChannel, wh: discord.Webhook) -> None:
+        """Grava (id, token) e marca o webhook como nosso no índice (antes do 1º envio)."""
+        if self.own_webhooks is not None:
+            self.own_webhooks.add(int(wh.id))
+        try:
+            await upsert_webhook_token(
+                DB_PATH, channel.guild.id, channel.id, int(wh.id), str(wh.token), int(time.time())
+            )
+        except Exception:
+            pass
+
+    async def _drop(self, webhook_id: int) -> None:
+        """Webhook apagado/inválido: sai do índice de próprios e do banco."""
+        if self.own_webhooks is not None:
+            self.own_webhooks.discard(webhook_id)
+        try:
+            await delete_webhook_token(DB_PATH, int(webhook_id))
+        except Exception:
+            pass
+
     def _norm_kwargs(self, kwargs: dict, default_allowed: AllowedMentions) -> dict:
         # normaliza embeds únicos
         if "embeds" in kwargs and isinstance(kwargs["embeds"], discord.Embed):
@@ -163,8 +183,9 @@ class WebhookSender:
         try:
             return await wh.send(**payload)
         except discord.NotFound:
-            # webhook inválido → limpa cache e tenta outro
+            # webhook inválido → limpa cache/índice/banco e tenta outro
             self.cache.pop(channel.id, None)
+            await self._drop(int(wh.id))
             new = await self.get_or_create(channel)
             if not new:
                 raise
@@ -331,7 +352,7 @@ class WebhookSender:
             if resp.status >= 400:
                 text = await resp.text()
                 raise RuntimeError(f"Webhook execute falhou: {resp.status} {text}")
-            data = await resp.json()
+            data = await resp.json(loads=fastjson.loads)
 
         # “Message-like” mínimo com id e canal
         class _SimpleMsg:
@@ -0,0 +1,85 @@
+# evtranslator/webhook_index.py
+from __future__ import annotations
+import os
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from evtranslator.db import get_webhook_token_by_id
+
+
+class OwnWebhookIndex:
+    """
+    IDs dos webhooks do bot (tabela webhook_tokens) em memória, para cortar o eco.
+      - fica em `bot.own_webhooks`, carregado no setup_hook (db.list_webhook_ids);
+      - o WebhookSender adiciona cada webhook que grava com upsert_webhook_token
+        e tira (discard) o que o Discord responde como apagado (NotFound);
+      - webhooks de terceiros (Tupperbox etc.) caem num cache negativo limitado
+        (LRU + TTL): uma consulta ao banco por ID a cada TTL, não por mensagem.
+    """
+
+    def __init__(self, max_negative: int | None = None, negative_ttl_sec: float | None = None):
+        self.max_negative = max_negative if max_negative is not None else int(os.getenv("EV_FOREIGN_WH_CACHE", "5000"))
+        self.negative_ttl_sec = (
+            negative_ttl_sec if negative_ttl_sec is not None else float(os.getenv("EV_FOREIGN_WH_TTL_SEC", "600"))
+        )
+        self._own: set[int] = set()
+        self._foreign: OrderedDict[int, float] = OrderedDict()  # webhook_id -> expira em (monotonic)
+        self.loaded = False
+        self.stats = {"own_hits": 0, "foreign_hits": 0, "db_lookups": 0}
+
+    def carregar(self, ids: Iterable[int]) -> None:
+        self._own = {int(i) for i in ids}
+        self._foreign.clear()
+        self.loaded = True
+
+    def add(self, webhook_id: int) -> None:
+        wid = int(webhook_id)
+        self._own.add(wid)
+        self._foreign.pop(wid, None)
+
+    def discard(self, webhook_id: int) -> None:
+        self._own.discard(int(webhook_id))
+
+    def is_known_own(self, webhook_id: int) -> bool:
+        """Só memória (síncrono): True se o ID é de um webhook nosso."""
+        return int(webhook_id) in self._own
+
+    def _foreign_fresh(self, wid: int) -> bool:
+        exp = self._foreign.get(wid)
+        if exp is None:
+            return False
+        if exp < time.monotonic():
+            del self._foreign[wid]
+            return False
+        self._foreign.move_to_end(wid)
+        return True
+
+    def _mark_foreign(self, wid: int) -> None:
+        self._foreign[wid] = time.monotonic() + self.negative_ttl_sec
+        self._foreign.move_to_end(wid)
+        while len(self._foreign) > self.max_negative:
+            self._foreign.popitem(last=False)
+
+    async def is_own(self, db_path: str, webhook_id: int) -> bool:
+        """Memória primeiro; ID desconhecido consulta o banco uma vez (linha gravada por outro processo)."""
+        wid = int(webhook_id)
+        if wid in self._own:
+            self.stats["own_hits"] += 1
+            return True
+        if self._foreign_fresh(wid):
+            self.stats["foreign_hits"] += 1
+            return False
+        self.stats["db_lookups"] += 1
+        try:
+            info = await get_webhook_token_by_id(db_path, wid)
+        except Exception:
+            return False  # na dúvida, não marca nada (próxima mensagem tenta de novo)
+        if info is not None:
+            self._own.add(wid)
+            return True
+        self._mark_foreign(wid)
+        return False
+
+    def snapshot(self) -> dict:
+        return {"loaded": self.loaded, "own": len(self._own), "foreign_cached": len(self._foreign), **self.stats}
@@ -9,6 +9,8 @@ from aiohttp import web
 
 from evtranslator.config import DISCORD_TOKEN, DB_PATH, SUPABASE_URL, SUPABASE_KEY
 from evtranslator.bot import EVTranslatorBot
+from evtranslator import fastjson
+from evtranslator.runtime import install_event_loop
 
 # painel
 from painel.routes import setup_painel_routes
@@ -83,6 +85,8 @@ async def main():
                 pass
 
 if __name__ == "__main__":
+    loop_name = install_event_loop()  # EV_FAST_RUNTIME=true → uvloop (se instalado)
+    logging.info("⚡ runtime: loop=%s json=%s", loop_name, fastjson.BACKEND)
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -0,0 +1,7 @@
+# tests/conftest.py
+import os
+
+# evtranslator.config aborta sem estas variáveis; os testes não falam com Discord/Supabase
+os.environ.setdefault("DISCORD_TOKEN", "test")
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "test")
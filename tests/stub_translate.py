@@ -0,0 +1,94 @@
+# tests/stub_translate.py
+"""
+Servidor stub do endpoint translate_a/single (aiohttp.web), para testar o
+EndpointPool sem rede. Cada variante é um prefixo de caminho com um modo:
+
+    ok         200 no formato do Google (data[0] = segmentos)
+    429        429 Too Many Requests
+    500        500 Internal Server Error
+    malformed  200 com corpo que não é JSON
+
+Uso manual (na raiz do repo):
+    python tests/stub_translate.py --port 8099 a=ok b=429
+    EV_TRANSLATE_ENDPOINTS="http://127.0.0.1:8099/a/translate_a/single,http://127.0.0.1:8099/b/translate_a/single"
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+
+from aiohttp import web
+
+MODES = ("ok", "429", "500", "malformed")
+
+
+class StubTranslate:
+    def __init__(self, modes: dict[str, str] | None = None):
+        self.modes: dict[str, str] = dict(modes or {})
+        self.hits: dict[str, int] = {}
+        self._runner: web.AppRunner | None = None
+        self.base = ""
+
+    def url(self, variant: str) -> str:
+        return f"{self.base}/{variant}/translate_a/single"
+
+    def set_mode(self, variant: str, mode: str) -> None:
+        if mode not in MODES:
+            raise ValueError(f"modo inválido: {mode!r} (use {', '.join(MODES)})")
+        self.modes[variant] = mode
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        variant = request.match_info["variant"]
+        self.hits[variant] = self.hits.get(variant, 0) + 1
+        mode = self.modes.get(variant, "ok")
+        if mode == "429":
+            return web.Response(status=429, text="rate limited")
+        if mode == "500":
+            return web.Response(status=500, text="internal error")
+        if mode == "malformed":
+            return web.Response(status=200, text="<html>not json", content_type="text/html")
+        q = request.query.get("q", "")
+        tl = request.query.get("tl", "")
+        body = [[[f"[{tl}] {q}", q, None, None]], None, request.query.get("sl", "")]
+        return web.Response(text=json.dumps(body), content_type="application/json")
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get("/{variant}/translate_a/single", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        sock = site._server.sockets[0]  # porta real quando port=0
+        self.base = f"http://{host}:{sock.getsockname()[1]}"
+        return self.base
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(port: int, modes: dict[str, str]) -> None:
+    stub = StubTranslate(modes)
+    await stub.start(port=port)
+    for name in modes or {"a": "ok"}:
+        print(f"{name}: {stub.url(name)} ({stub.modes.get(name, 'ok')})")
+    await asyncio.Event().wait()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("variants", nargs="*", help="nome=modo (ok, 429, 500, malformed)")
+    args = ap.parse_args()
+    modes = dict(v.split("=", 1) for v in args.variants)
+    try:
+        asyncio.run(_serve(args.port, modes))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
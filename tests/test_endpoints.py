@@ -0,0 +1,104 @@
+# tests/test_endpoints.py
+"""EndpointPool contra o servidor stub local (sem rede)."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+pytest.importorskip("discord")  # evtranslator.config importa discord
+
+from evtranslator.relay.endpoints import EndpointPool, EndpointVariant  # noqa: E402
+from evtranslator.translate import TranslateHTTPError, TranslateParseError  # noqa: E402
+from stub_translate import StubTranslate  # noqa: E402
+
+
+def _run(coro_fn, modes: dict[str, str]):
+    async def go():
+        stub = StubTranslate(modes)
+        await stub.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                return await coro_fn(stub, session)
+        finally:
+            await stub.stop()
+    return asyncio.run(go())
+
+
+def _pool(stub: StubTranslate, names: list[str], **kw) -> EndpointPool:
+    return EndpointPool([EndpointVariant(stub.url(n), rate=100, burst=100) for n in names], **kw)
+
+
+def test_429_parks_variant_and_traffic_moves_on():
+    async def scenario(stub, session):
+        pool = _pool(stub, ["a", "b"])
+        a, b = pool.variants
+        with pytest.raises(TranslateHTTPError) as exc:
+            await pool.translate(session, "olá", "pt", "en", attempts=1)
+        assert exc.value.status == 429
+        assert a.parked_until > 0 and a.stats["parked"] == 1
+
+        assert await pool.translate(session, "olá", "pt", "en", attempts=1) == "[en] olá"
+        assert await pool.translate(session, "tudo bem", "pt", "en", attempts=1) == "[en] tudo bem"
+        assert stub.hits == {"a": 1, "b": 2}
+        assert b.stats["ok"] == 2
+
+    _run(scenario, {"a": "429", "b": "ok"})
+
+
+def test_cooldown_recovery():
+    async def scenario(stub, session):
+        pool = _pool(stub, ["a"], cooldown_sec=0.2)
+        a = pool.variants[0]
+        with pytest.raises(TranslateHTTPError):
+            await pool.translate(session, "oi", "pt", "en", attempts=1)
+        assert a.strikes == 1
+
+        # estacionada: falha na hora, sem requisição
+        with pytest.raises(TranslateHTTPError) as exc:
+            await pool.translate(session, "oi", "pt", "en", attempts=1)
+        assert exc.value.status == 429
+        assert pool.stats["all_parked"] == 1
+        assert stub.hits["a"] == 1
+
+        stub.set_mode("a", "ok")
+        await asyncio.sleep(0.25)
+        assert await pool.translate(session, "oi", "pt", "en", attempts=1) == "[en] oi"
+        assert a.strikes == 0
+
+    _run(scenario, {"a": "429"})
+
+
+def test_malformed_lowers_health_without_parking_and_healthiest_wins():
+    async def scenario(stub, session):
+        pool = _pool(stub, ["a", "b"])
+        a, b = pool.variants
+        with pytest.raises(TranslateParseError):  # corpo inválido = erro, não throttling
+            await pool.translate(session, "oi", "pt", "en", attempts=1)
+        assert a.parked_until == 0
+        assert a.health < b.health
+
+        for _ in range(3):
+            assert await pool.translate(session, "oi", "pt", "en", attempts=1) == "[en] oi"
+        assert stub.hits == {"a": 1, "b": 3}
+
+    _run(scenario, {"a": "malformed", "b": "ok"})
+
+
+def test_repeated_429_backs_off_exponentially():
+    async def scenario(stub, session):
+        pool = _pool(stub, ["a"], cooldown_sec=0.05, max_cooldown_sec=1.0)
+        a = pool.variants[0]
+        cooldowns = []
+        for _ in range(3):
+            t0 = time.monotonic()
+            with pytest.raises(TranslateHTTPError):
+                await pool.translate(session, "oi", "pt", "en", attempts=1)
+            cooldowns.append(a.parked_until - t0)
+            a.parked_until = 0  # libera sem esperar o cooldown
+        assert a.strikes == 3
+        assert cooldowns[0] < cooldowns[1] < cooldowns[2]
+
+    _run(scenario, {"a": "429"})
@@ -0,0 +1,62 @@
+# tests/test_translate_wrap.py
+"""Classificação de erros do translate_with_controls (circuit breaker / AIMD) contra o stub."""
+from __future__ import annotations
+
+import asyncio
+import functools
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+pytest.importorskip("discord")  # evtranslator.config importa discord
+
+from evtranslator.relay.adaptive import AdaptiveController, AIMDCfg  # noqa: E402
+from evtranslator.relay.backoff import BackoffCfg, CircuitBreaker  # noqa: E402
+from evtranslator.relay.translate_wrap import translate_with_controls  # noqa: E402
+from evtranslator.translate import google_web_translate  # noqa: E402
+from stub_translate import StubTranslate  # noqa: E402
+
+
+async def _no_rate(_priority) -> None:
+    return None
+
+
+def _run_many(mode: str, n: int):
+    """Faz n traduções contra uma variante no `mode`; devolve (resultados, cb, adaptive, hits)."""
+    async def go():
+        stub = StubTranslate({"a": mode})
+        await stub.start()
+        cb = CircuitBreaker(fail_threshold=3, cooldown_sec=60)
+        adaptive = AdaptiveController(AIMDCfg(cut_cooldown=0), init_concurrency=8, init_rate=10)
+        provider = functools.partial(google_web_translate, base_url=stub.url("a"))
+        try:
+            async with aiohttp.ClientSession() as session:
+                results = [
+                    await translate_with_controls(
+                        session, "oi", "pt", "en", asyncio.Semaphore(4), 2.0, 0,
+                        BackoffCfg(attempts=1), cb, _no_rate,
+                        adaptive=adaptive, provider_fn=provider,
+                    )
+                    for _ in range(n)
+                ]
+        finally:
+            await stub.stop()
+        return results, cb, adaptive, stub.hits.get("a", 0)
+    return asyncio.run(go())
+
+
+def test_malformed_body_does_not_open_breaker_or_cut_aimd():
+    results, cb, adaptive, hits = _run_many("malformed", 6)
+    assert results == [None] * 6
+    assert hits == 6  # nenhuma recusada pelo breaker
+    assert cb.state == CircuitBreaker.CLOSED
+    assert cb.stats["opened"] == 0 and cb.fail_count == 0
+    assert adaptive.stats["overloads"] == 0 and adaptive.stats["decreases"] == 0
+
+
+def test_5xx_opens_breaker():
+    results, cb, adaptive, hits = _run_many("500", 6)
+    assert results == [None] * 6
+    assert hits == 3  # abriu na 3ª falha; o resto nem saiu
+    assert cb.state == CircuitBreaker.OPEN and cb.stats["opened"] == 1
+    assert adaptive.stats["overloads"] == 3